@@ -4,7 +4,7 @@ from .models import Course, Attendance
 
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
-    list_display = ['code', 'name', 'teacher', 'get_student_count', 'is_active', 'created_at']
+    list_display = ['code', 'name', 'teacher', 'student_count', 'is_active', 'created_at']
     list_filter = ['is_active', 'teacher', 'created_at']
     search_fields = ['code', 'name', 'teacher__username']
     filter_horizontal = ['students']
@@ -22,6 +22,13 @@ class CourseAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).for_listing()
+    
+    @admin.display(description='Students', ordering='student_count')
+    def student_count(self, obj):
+        return obj.student_count
 
 
 @admin.register(Attendance)
@@ -0,0 +1,303 @@
+"""
+Archival of closed academic years.
+
+archive_year() moves one year of attendance into ArchivedAttendance, which
+lives in ATTENDANCE_ARCHIVE_DATABASE. The rows are first copied, then the
+year is registered in ArchivedYear (from that point reads of its dates go
+to the archive), and only then are the live rows deleted. The daily
+rollup and packed calendars are left in place, so summaries, trends and
+calendars never need to read the archive.
+
+Reads that can reach archived dates split their query at the archive
+boundary with live_and_archived() and page over both parts with
+ArchiveChain.
+"""
+from collections import Counter
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from .calendar import academic_year, academic_year_bounds
+from .models import ArchivedAttendance, ArchivedYear, Attendance, Course
+
+CHUNK_SIZE = 2000
+
+# Columns copied between Attendance and ArchivedAttendance
+ARCHIVED_FIELDS = (
+    'id', 'user_id', 'course_id', 'date', 'status', 'remarks',
+    'marked_by_id', 'created_at', 'updated_at',
+)
+
+
+def is_archived(day):
+    """True when attendance for `day` has moved to the archive"""
+    archived_before = ArchivedYear.objects.archived_before()
+    return archived_before is not None and day < archived_before
+
+
+def closed_years(today=None):
+    """Academic years that still have live attendance and have ended"""
+    current = academic_year(today or timezone.localdate())
+    first_day = Attendance.objects.order_by('date').values_list('date', flat=True).first()
+    if first_day is None:
+        return []
+    return list(range(academic_year(first_day), current))
+
+
+def _copy_chunks(queryset, year, chunk_size, **options):
+    """
+    Copy `queryset` to the archive in primary key order, `chunk_size`
+    rows at a time. Yields the primary keys of each copied chunk.
+    """
+    last_pk = 0
+    while True:
+        rows = list(
+            queryset.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list(*ARCHIVED_FIELDS)[:chunk_size]
+        )
+        if not rows:
+            return
+        ArchivedAttendance.objects.bulk_create(
+            [
+                ArchivedAttendance(academic_year=year, **dict(zip(ARCHIVED_FIELDS, row)))
+                for row in rows
+            ],
+            **options
+        )
+        pks = [row[0] for row in rows]
+        last_pk = pks[-1]
+        yield pks
+
+
+def archive_year(year, chunk_size=CHUNK_SIZE):
+    """
+    Move attendance for academic `year` to the archive and return the
+    number of records archived. Can be re-run to finish an interrupted
+    run. Raises ValueError when the year has not ended, is already
+    archived, or earlier dates still have live attendance.
+    """
+    start_date, end_date = academic_year_bounds(year)
+    live = Attendance.objects.filter(date__range=[start_date, end_date])
+    registered = ArchivedYear.objects.filter(year=year).first()
+
+    if registered is None:
+        if year >= academic_year(timezone.localdate()):
+            raise ValueError(f"Academic year {year} has not ended yet.")
+        if Attendance.objects.filter(date__lt=start_date).exists():
+            raise ValueError("Earlier academic years must be archived first.")
+
+        for _ in _copy_chunks(live, year, chunk_size, ignore_conflicts=True):
+            pass
+        registered = ArchivedYear.objects.create(
+            year=year, start_date=start_date, end_date=end_date
+        )
+    elif not live.exists():
+        raise ValueError(f"Academic year {year} is already archived.")
+
+    # Reads of this year now go to the archive. Copy once more, picking up
+    # rows written since the first pass, and drop each chunk from the live
+    # table with a raw DELETE: the per-row delete signals would take the
+    # records out of the rollup and calendars, which stay behind.
+    upsert = {
+        'update_conflicts': True,
+        'unique_fields': ['id'],
+        'update_fields': ['status', 'remarks', 'marked_by_id', 'updated_at'],
+    }
+    for pks in _copy_chunks(live, year, chunk_size, **upsert):
+        Attendance.objects.filter(pk__in=pks)._raw_delete(Attendance.objects.db)
+
+    registered.records = ArchivedAttendance.objects.filter(academic_year=year).count()
+    registered.save(update_fields=['records'])
+    return registered.records
+
+
+def restore_year(year, chunk_size=CHUNK_SIZE):
+    """
+    Move the most recently archived academic year back into the live
+    table and return the number of records restored. created_at and
+    updated_at are reset by the insert. Raises ValueError for any other
+    year.
+    """
+    latest = ArchivedYear.objects.order_by('-year').first()
+    if latest is None or latest.year != year:
+        raise ValueError("Only the most recently archived academic year can be restored.")
+
+    archived = ArchivedAttendance.objects.filter(academic_year=year)
+    fields = [name for name in ARCHIVED_FIELDS if name not in ('created_at', 'updated_at')]
+    last_pk = 0
+    restored = 0
+    while True:
+        rows = list(
+            archived.filter(pk__gt=last_pk).order_by('pk').values_list(*fields)[:chunk_size]
+        )
+        if not rows:
+            break
+        Attendance.objects.bulk_create(
+            [Attendance(**dict(zip(fields, row))) for row in rows],
+            ignore_conflicts=True
+        )
+        restored += len(rows)
+        last_pk = rows[-1][0]
+
+    latest.delete()
+    archived.delete()
+    return restored
+
+
+def archived_for(user, archived_before):
+    """
+    Archived attendance visible to `user`, mirroring the role filters on
+    the live table. Teachers are matched on course ids, as the archive
+    may be in another database.
+    """
+    queryset = ArchivedAttendance.objects.filter(date__lt=archived_before)
+    if user.role == 'student':
+        queryset = queryset.filter(user_id=user.pk)
+    elif user.role == 'teacher':
+        queryset = queryset.filter(
+            course_id__in=list(Course.objects.filter(teacher=user).values_list('pk', flat=True))
+        )
+    return queryset
+
+
+def live_and_archived(live, archived, start_date=None, end_date=None, archived_before=None):
+    """
+    Split a read of `live` attendance at the archive boundary, with
+    `archived` as the matching ArchivedAttendance queryset. Returns the
+    non-empty parts in date order: [live], [archived] or [archived, live].
+    `start_date`/`end_date` bound the read when known.
+    """
+    if archived_before is None:
+        archived_before = ArchivedYear.objects.archived_before()
+    if archived_before is None or (start_date is not None and start_date >= archived_before):
+        return [live]
+
+    archived = archived.filter(date__lt=archived_before)
+    if end_date is not None and end_date < archived_before:
+        return [archived]
+    return [archived, live.filter(date__gte=archived_before)]
+
+
+def combined_status_counts(parts):
+    """status_counts() summed over live and archived parts"""
+    counts = Counter()
+    for part in parts:
+        counts.update(part.status_counts())
+    return dict(counts)
+
+
+def combined_status_counts_by(parts, *group_by):
+    """with_status_counts(*group_by) merged over live and archived parts"""
+    groups = {}
+    for part in parts:
+        for row in part.with_status_counts(*group_by):
+            key = tuple(row[field] for field in group_by)
+            if key in groups:
+                for name, value in row.items():
+                    if name not in group_by:
+                        groups[key][name] += value
+            else:
+                groups[key] = row
+    return [groups[key] for key in sorted(groups)]
+
+
+def as_attendance(records):
+    """
+    Unsaved Attendance instances for archived records, with user, course
+    and marked_by loaded in one query per model
+    """
+    users = get_user_model().objects.in_bulk(
+        {record.user_id for record in records}
+        | {record.marked_by_id for record in records if record.marked_by_id}
+    )
+    courses = Course.objects.in_bulk({record.course_id for record in records})
+
+    instances = []
+    for record in records:
+        attendance = Attendance(**{name: getattr(record, name) for name in ARCHIVED_FIELDS})
+        for field, related in (('user', users.get(record.user_id)),
+                               ('course', courses.get(record.course_id)),
+                               ('marked_by', users.get(record.marked_by_id))):
+            if related is not None:
+                setattr(attendance, field, related)
+        instances.append(attendance)
+    return instances
+
+
+class ArchiveChain:
+    """
+    Querysets over live and archived attendance read as one sequence, as
+    returned by live_and_archived(). Supports what the paginators use:
+    count(), slicing, order_by() and filter(); archived rows come back as
+    Attendance instances (see as_attendance()). Filters must use field
+    names both models share (date, status, course_id, user_id, id).
+    """
+    model = Attendance
+    ordered = True
+
+    # Attendance ordering names and their ArchivedAttendance columns
+    ARCHIVED_NAMES = {
+        'course': 'course_id',
+        'user': 'user_id',
+        'marked_by': 'marked_by_id',
+        'pk': 'id',
+    }
+
+    def __init__(self, *parts):
+        self.parts = parts
+        self._counts = {}
+
+    def _archived_name(self, field):
+        prefix = '-' if field.startswith('-') else ''
+        name = field.lstrip('-')
+        return prefix + self.ARCHIVED_NAMES.get(name, name)
+
+    def order_by(self, *fields):
+        return ArchiveChain(*(
+            part.order_by(*(
+                [self._archived_name(field) for field in fields]
+                if part.model is ArchivedAttendance else fields
+            ))
+            for part in self.parts
+        ))
+
+    def filter(self, *args, **kwargs):
+        return ArchiveChain(*(part.filter(*args, **kwargs) for part in self.parts))
+
+    def _count(self, index):
+        if index not in self._counts:
+            self._counts[index] = self.parts[index].count()
+        return self._counts[index]
+
+    def count(self):
+        return sum(self._count(index) for index in range(len(self.parts)))
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+
+        offset = index.start or 0
+        remaining = None if index.stop is None else max(index.stop - offset, 0)
+        results = []
+        for position, part in enumerate(self.parts):
+            if remaining == 0:
+                break
+            if offset:
+                size = self._count(position)
+                if offset >= size:
+                    offset -= size
+                    continue
+            stop = None if remaining is None else offset + remaining
+            rows = list(part[offset:stop])
+            if part.model is ArchivedAttendance:
+                rows = as_attendance(rows)
+            results.extend(rows)
+            if remaining is not None:
+                remaining -= len(rows)
+            offset = 0
+        return results
+
+    def __iter__(self):
+        return iter(self[0:])
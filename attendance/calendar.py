@@ -0,0 +1,125 @@
+"""
+Packed per-term attendance calendars.
+
+A calendar holds one student's attendance in one course for one term as
+two bit arrays indexed by day offset from the term start: a 1-bit
+`recorded` mask and a 2-bit status code per day. A full term fits in a
+few dozen bytes.
+"""
+from datetime import date as date_type, timedelta
+from django.conf import settings
+
+# 2-bit status codes; keep in step with Attendance.STATUS_CHOICES
+STATUS_CODES = {
+    'present': 0,
+    'absent': 1,
+    'late': 2,
+    'excused': 3,
+}
+CODE_STATUSES = {code: status for status, code in STATUS_CODES.items()}
+
+# Statuses that count towards an attendance streak
+ATTENDED = ('present', 'late')
+
+
+def term_bounds(day):
+    """
+    Return (first_day, last_day) of the term containing `day`. Terms start
+    on the first of each month in ACADEMIC_TERM_START_MONTHS (default
+    January, May and September) and run until the next one starts.
+    """
+    months = sorted(getattr(settings, 'ACADEMIC_TERM_START_MONTHS', (1, 5, 9)))
+    start_month = max((m for m in months if m <= day.month), default=None)
+    if start_month is None:
+        start = date_type(day.year - 1, months[-1], 1)
+    else:
+        start = date_type(day.year, start_month, 1)
+
+    later = [m for m in months if m > start.month]
+    if later:
+        next_start = date_type(start.year, later[0], 1)
+    else:
+        next_start = date_type(start.year + 1, months[0], 1)
+    return start, next_start - timedelta(days=1)
+
+
+def academic_year(day):
+    """
+    Academic year containing `day`, named by the calendar year it starts
+    in. The year starts with the first term in ACADEMIC_TERM_START_MONTHS.
+    """
+    first_month = min(getattr(settings, 'ACADEMIC_TERM_START_MONTHS', (1, 5, 9)))
+    return day.year if day.month >= first_month else day.year - 1
+
+
+def academic_year_bounds(year):
+    """Return (first_day, last_day) of academic `year`"""
+    first_month = min(getattr(settings, 'ACADEMIC_TERM_START_MONTHS', (1, 5, 9)))
+    start = date_type(year, first_month, 1)
+    return start, date_type(year + 1, first_month, 1) - timedelta(days=1)
+
+
+def term_length(term_start):
+    start, end = term_bounds(term_start)
+    return (end - start).days + 1
+
+
+def empty_bitmaps(days):
+    return bytearray((days + 7) // 8), bytearray((days + 3) // 4)
+
+
+def set_day(recorded, statuses, offset, status):
+    """Record `status` on day `offset`, or clear the day when status is None"""
+    byte, bit = divmod(offset, 8)
+    if status is None:
+        recorded[byte] &= ~(1 << bit) & 0xFF
+        code = 0
+    else:
+        recorded[byte] |= 1 << bit
+        code = STATUS_CODES[status]
+    byte, slot = divmod(offset, 4)
+    shift = slot * 2
+    statuses[byte] = (statuses[byte] & ~(0b11 << shift) & 0xFF) | (code << shift)
+
+
+def get_day(recorded, statuses, offset):
+    """Status recorded on day `offset`, or None"""
+    byte, bit = divmod(offset, 8)
+    if byte >= len(recorded) or not recorded[byte] >> bit & 1:
+        return None
+    byte, slot = divmod(offset, 4)
+    return CODE_STATUSES[statuses[byte] >> (slot * 2) & 0b11]
+
+
+def iter_days(recorded, statuses, days):
+    """Yield (offset, status) for each recorded day in order"""
+    for offset in range(days):
+        status = get_day(recorded, statuses, offset)
+        if status is not None:
+            yield offset, status
+
+
+def calendar_stats(recorded, statuses, days):
+    """Counts, attendance percentage and streaks computed from the bitmaps"""
+    counts = dict.fromkeys(STATUS_CODES, 0)
+    longest = current = 0
+    for _, status in iter_days(recorded, statuses, days):
+        counts[status] += 1
+        if status in ATTENDED:
+            current += 1
+            longest = max(longest, current)
+        else:
+            current = 0
+
+    total = sum(counts.values())
+    percentage = (counts['present'] / total * 100) if total > 0 else 0
+    return {
+        'total_days': total,
+        'present_count': counts['present'],
+        'absent_count': counts['absent'],
+        'late_count': counts['late'],
+        'excused_count': counts['excused'],
+        'attendance_percentage': round(percentage, 2),
+        'current_streak': current,
+        'longest_streak': longest,
+    }
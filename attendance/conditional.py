@@ -0,0 +1,79 @@
+"""
+Conditional GET for read endpoints that poll well.
+
+A view with ConditionalGetMixin describes its data with get_data_version(),
+a cheap string (usually a CourseQuerySet data_version() or
+listing_version()) that changes whenever the response could. The ETag is
+a digest of that version, the view, the caller's visibility scope, the
+query string and the negotiated media type. A GET or HEAD whose
+If-None-Match matches is answered with 304 as soon as the request is
+authenticated, before the view runs its queries or serializes anything.
+
+No Last-Modified is sent: updated_at timestamps cannot see deleted rows,
+so If-Modified-Since alone could return 304 for a changed response.
+"""
+import hashlib
+import json
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from .result_cache import visibility_scope
+
+CONDITIONAL_METHODS = ('GET', 'HEAD')
+
+
+class PreconditionResponse(Exception):
+    """Carries the 304 (or 412) response out of APIView.initial()"""
+
+    def __init__(self, response):
+        super().__init__(response.status_code)
+        self.response = response
+
+
+def compute_etag(view, request, version):
+    payload = json.dumps([
+        f"{type(view).__module__}.{type(view).__qualname__}",
+        visibility_scope(request.user),
+        request.accepted_media_type,
+        sorted(request.query_params.lists()),
+        version,
+    ], default=str)
+    return quote_etag(hashlib.sha1(payload.encode('utf-8')).hexdigest())
+
+
+class ConditionalGetMixin:
+    """
+    For APIViews whose GET response is determined by the caller's scope,
+    the query string and get_data_version(). List it before
+    ReplicaReadMixin so the version is read from the same database as
+    the response.
+    
+    The version is kept in self.data_version (None for other methods),
+    so the view can pass it on to cached_result() instead of reading it
+    again.
+    """
+
+    def get_data_version(self, request):
+        raise NotImplementedError('Views with ConditionalGetMixin must define get_data_version()')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = self.data_version = None
+        if request.method not in CONDITIONAL_METHODS:
+            return
+        self.data_version = self.get_data_version(request)
+        self.etag = compute_etag(self, request, self.data_version)
+        response = get_conditional_response(request._request, etag=self.etag)
+        if response is not None:
+            response['ETag'] = self.etag
+            raise PreconditionResponse(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, PreconditionResponse):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'etag', None) and response.status_code == 200:
+            response['ETag'] = self.etag
+        return response
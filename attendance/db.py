@@ -0,0 +1,37 @@
+"""
+Retrying writes that lose a race for a database lock.
+"""
+import random
+import time
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+# Substrings of lock contention errors: SQLite's busy timeout expiring, and
+# PostgreSQL deadlocks or serialization failures
+LOCK_ERRORS = (
+    'database is locked',
+    'database table is locked',
+    'deadlock detected',
+    'could not serialize access',
+)
+
+
+def is_lock_error(exc):
+    message = str(exc).lower()
+    return isinstance(exc, OperationalError) and any(error in message for error in LOCK_ERRORS)
+
+
+def retry_on_lock(func, *args, attempts=4, delay=0.05, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Call func(*args, **kwargs), retrying with jittered exponential backoff
+    when it fails on lock contention. `func` must run its own transaction;
+    nothing is retried inside an outer atomic block, whose transaction is
+    already broken.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return func(*args, **kwargs)
+        except OperationalError as exc:
+            if (attempt == attempts or not is_lock_error(exc)
+                    or connections[using].in_atomic_block):
+                raise
+            time.sleep(delay * 2 ** (attempt - 1) * (0.5 + random.random()))
@@ -0,0 +1,72 @@
+import threading
+from django.contrib.auth import get_user_model
+from .models import Course
+
+
+class EnrollmentIndex:
+    """
+    In-process cache of each course's roster (the enrolled students and
+    their roles), so attendance validation needs no per-row queries.
+
+    A roster is kept together with the course's enrollment_version, which
+    is bumped when its enrollment changes or an enrolled user's role
+    changes (see attendance.signals). Each lookup reads the current
+    version by primary key and reloads the roster when it has moved, so
+    every worker process sees a change on its next request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rosters = {}
+
+    def roster(self, course_id):
+        """Return {user_id: role} for the users enrolled in the course"""
+        version = (
+            Course.objects.filter(pk=course_id)
+            .values_list('enrollment_version', flat=True)
+            .first()
+        )
+        if version is None:
+            with self._lock:
+                self._rosters.pop(course_id, None)
+            return {}
+
+        entry = self._rosters.get(course_id)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        roles = dict(
+            get_user_model().objects
+            .filter(courses_enrolled=course_id)
+            .values_list('id', 'role')
+        )
+        with self._lock:
+            self._rosters[course_id] = (version, roles)
+        return roles
+
+    def students(self, course_id):
+        """Return the ids of enrolled users with the student role"""
+        return frozenset(
+            user_id for user_id, role in self.roster(course_id).items() if role == 'student'
+        )
+
+    def is_enrolled(self, course_id, user_id):
+        return user_id in self.roster(course_id)
+
+    def roles(self, user_ids):
+        """
+        Return {user_id: role} for the given ids in one query. Unknown ids
+        are left out.
+        """
+        return dict(
+            get_user_model().objects
+            .filter(pk__in=list(user_ids))
+            .values_list('id', 'role')
+        )
+
+    def clear(self):
+        with self._lock:
+            self._rosters.clear()
+
+
+enrollment_index = EnrollmentIndex()
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from attendance.archive import archive_year, closed_years, restore_year
+from attendance.models import ArchivedYear
+
+
+class Command(BaseCommand):
+    help = "Move attendance from closed academic years to the archive, or restore it"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--year',
+            type=int,
+            help="Archive academic years up to and including this one (default: every closed year)",
+        )
+        parser.add_argument(
+            '--restore',
+            type=int,
+            metavar='YEAR',
+            help="Move the most recently archived year back to the live table",
+        )
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help="Show the archived years and exit",
+        )
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for archived in ArchivedYear.objects.all():
+                self.stdout.write(str(archived))
+            return
+
+        if options['restore'] is not None:
+            try:
+                restored = restore_year(options['restore'])
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(self.style.SUCCESS(
+                f"Restored {restored} records for {options['restore']}"
+            ))
+            return
+
+        years = closed_years()
+        if options['year'] is not None:
+            years = [year for year in years if year <= options['year']]
+
+        if not years:
+            self.stdout.write("No closed academic years with live attendance")
+            return
+
+        for year in years:
+            try:
+                records = archive_year(year)
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(self.style.SUCCESS(f"Archived {records} records for {year}"))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from attendance.models import AttendanceRollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild or verify the daily attendance rollup used by the summary reports"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help="Only compare the rollup with the attendance table; exit non-zero on drift",
+        )
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            mismatches = AttendanceRollup.objects.mismatches()
+            for course_id, date, status, stored, actual in mismatches:
+                self.stdout.write(
+                    f"course={course_id} date={date} status={status}: "
+                    f"rollup has {stored}, attendance has {actual}"
+                )
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} rollup rows are out of sync")
+            self.stdout.write(self.style.SUCCESS("Rollup is in sync"))
+            return
+
+        written = AttendanceRollup.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rollup with {written} rows"))
@@ -0,0 +1,105 @@
+import io
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+from attendance.models import Attendance
+from attendance.views import AttendanceListCreateView
+from attendance_webapp.parsers import FastJSONParser
+from attendance_webapp.renderers import FastJSONRenderer, orjson
+
+RENDERERS = (
+    ('stdlib', JSONRenderer, JSONParser),
+    ('orjson', FastJSONRenderer, FastJSONParser),
+)
+
+
+def _timed(function, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return time.perf_counter() - started
+
+
+def _request_host():
+    """A host name the request validation accepts, for the `next` links"""
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+    return 'localhost'
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF's JSONRenderer/JSONParser with the orjson ones on "
+        "AttendanceListCreateView pages from the current database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=500, help="Records per page (at most 500)")
+        parser.add_argument('--iterations', type=int, default=50, help="Pages rendered per measurement")
+        parser.add_argument('--repeat', type=int, default=5, help="Rounds per measurement; the fastest is reported")
+        parser.add_argument('--user', help="Username to list attendance as (default: the first admin)")
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError("orjson is not installed (pip install orjson)")
+
+        User = get_user_model()
+        users = User.objects.filter(username=options['user']) if options['user'] else User.objects.filter(role='admin')
+        user = users.order_by('pk').first()
+        if user is None:
+            raise CommandError("No such user" if options['user'] else "No admin user to list attendance as")
+        if not Attendance.objects.exists():
+            raise CommandError("There is no attendance to list")
+
+        iterations = options['iterations']
+        factory = APIRequestFactory(SERVER_NAME=_request_host())
+
+        def get_page(renderer_class):
+            request = factory.get('/api/attendance/', {'cursor': '', 'page_size': options['page_size']})
+            force_authenticate(request, user=user)
+            view = AttendanceListCreateView.as_view(renderer_classes=[renderer_class])
+            response = view(request)
+            response.render()
+            return response
+
+        page = get_page(JSONRenderer)
+        data = page.data
+        records = len(data['results'])
+        outputs = {}
+
+        self.stdout.write(f"{records} records per page, {len(page.content) / 1024:.1f} KiB")
+
+        # Alternate the renderers within each round and keep each one's
+        # fastest round, so warm-up and background noise don't favour
+        # whichever runs second
+        measurements = {name: {'render': [], 'parse': [], 'request': []} for name, _, _ in RENDERERS}
+        for _ in range(options['repeat']):
+            for name, renderer_class, parser_class in RENDERERS:
+                renderer = renderer_class()
+                parser = parser_class()
+                content = outputs[name] = renderer.render(data, 'application/json')
+                timings = measurements[name]
+                timings['render'].append(
+                    _timed(lambda: renderer.render(data, 'application/json'), iterations)
+                )
+                timings['parse'].append(
+                    _timed(lambda: parser.parse(io.BytesIO(content), 'application/json'), iterations)
+                )
+                timings['request'].append(_timed(lambda: get_page(renderer_class), iterations))
+
+        for name, _, _ in RENDERERS:
+            megabytes = len(outputs[name]) * iterations / 1024 / 1024
+            render, parse, request = (min(measurements[name][key]) for key in ('render', 'parse', 'request'))
+            self.stdout.write(
+                f"{name:<7} render {iterations / render:>8.1f} pages/s {megabytes / render:>7.1f} MB/s  "
+                f"parse {iterations / parse:>8.1f} pages/s {megabytes / parse:>7.1f} MB/s  "
+                f"full request {iterations / request:>7.1f} pages/s"
+            )
+
+        same = outputs['stdlib'] == outputs['orjson']
+        self.stdout.write(f"identical output: {'yes' if same else 'NO'}")
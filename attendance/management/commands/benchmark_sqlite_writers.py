@@ -0,0 +1,124 @@
+import multiprocessing
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections
+from attendance.db import retry_on_lock
+from attendance.models import Attendance, Course
+from attendance_webapp.database import database_from_env
+
+STATUSES = ['present', 'present', 'present', 'late', 'absent']
+
+
+def _configure(alias, path, production):
+    """Register a SQLite database alias for one benchmark run"""
+    environ = {'DATABASE_URL': f'sqlite:///{path}'}
+    if production:
+        environ['DB_SQLITE_PRODUCTION'] = 'true'
+    config = database_from_env(environ)
+    connections.settings[alias] = connections.configure_settings(
+        {'default': connections.settings['default'], alias: config}
+    )[alias]
+
+
+def _seed(alias, workers, students):
+    """One course per writer, each with its own roster"""
+    User = get_user_model()
+    teacher = User.objects.db_manager(alias).create(
+        username='benchmark-teacher', email='benchmark-teacher@example.com', role='teacher'
+    )
+    User.objects.using(alias).bulk_create([
+        User(
+            username=f'benchmark-{worker}-{i}',
+            email=f'benchmark-{worker}-{i}@example.com',
+            role='student',
+        )
+        for worker in range(workers) for i in range(students)
+    ])
+    for worker in range(workers):
+        course = Course.objects.using(alias).create(
+            code=f'BENCH{worker}', name=f'Benchmark {worker}', teacher=teacher
+        )
+        course.students.set(
+            User.objects.using(alias).filter(username__startswith=f'benchmark-{worker}-')
+        )
+
+
+def _writer(alias, worker, transactions, production, results):
+    """Mark one roster per transaction, as BulkAttendanceView does"""
+    connections[alias].close()
+    course = Course.objects.using(alias).get(code=f'BENCH{worker}')
+    student_ids = list(course.students.values_list('pk', flat=True))
+    committed = failed = 0
+    start = date(2025, 1, 1)
+    for i in range(transactions):
+        roster = [
+            {'user_id': str(pk), 'status': STATUSES[(i + pk) % len(STATUSES)]}
+            for pk in student_ids
+        ]
+        args = (course, start + timedelta(days=i), roster)
+        try:
+            if production:
+                retry_on_lock(Attendance.objects.db_manager(alias).bulk_mark, *args, using=alias)
+            else:
+                Attendance.objects.db_manager(alias).bulk_mark(*args)
+            committed += 1
+        except OperationalError:
+            failed += 1
+    connections[alias].close()
+    results.put((committed, failed))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare concurrent bulk attendance writers on SQLite with the default "
+        "settings and with DB_SQLITE_PRODUCTION"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help="Concurrent writer processes")
+        parser.add_argument('--transactions', type=int, default=50, help="Rosters marked per writer")
+        parser.add_argument('--students', type=int, default=30, help="Students per roster")
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        transactions = options['transactions']
+        context = multiprocessing.get_context('fork')
+
+        for mode, production in (('default', False), ('production', True)):
+            with tempfile.TemporaryDirectory() as tmp:
+                alias = f'benchmark_{mode}'
+                _configure(alias, os.path.join(tmp, 'benchmark.sqlite3'), production)
+                call_command('migrate', database=alias, verbosity=0)
+                _seed(alias, workers, options['students'])
+                connections.close_all()
+
+                results = context.Queue()
+                processes = [
+                    context.Process(
+                        target=_writer,
+                        args=(alias, worker, transactions, production, results)
+                    )
+                    for worker in range(workers)
+                ]
+                started = time.perf_counter()
+                for process in processes:
+                    process.start()
+                outcomes = [results.get() for _ in processes]
+                for process in processes:
+                    process.join()
+                elapsed = time.perf_counter() - started
+
+                committed = sum(outcome[0] for outcome in outcomes)
+                failed = sum(outcome[1] for outcome in outcomes)
+                rows = Attendance.objects.using(alias).count()
+                connections[alias].close()
+
+            self.stdout.write(
+                f"{mode:<11} {committed:>6} committed {failed:>6} failed (database is locked)  "
+                f"{committed / elapsed:>8.1f} rosters/s  {rows} rows in {elapsed:.2f}s"
+            )
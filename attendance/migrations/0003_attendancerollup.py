@@ -0,0 +1,58 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_rollup(apps, schema_editor):
+    Attendance = apps.get_model('attendance', 'Attendance')
+    AttendanceRollup = apps.get_model('attendance', 'AttendanceRollup')
+    db_alias = schema_editor.connection.alias
+
+    rows = (
+        Attendance.objects.using(db_alias)
+        .order_by()
+        .values('course_id', 'date', 'status')
+        .annotate(total=Count('id'))
+    )
+    AttendanceRollup.objects.using(db_alias).bulk_create(
+        (
+            AttendanceRollup(
+                course_id=row['course_id'],
+                date=row['date'],
+                status=row['status'],
+                count=row['total'],
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0002_alter_course_teacher'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('present', 'Present'), ('absent', 'Absent'), ('late', 'Late'), ('excused', 'Excused')], max_length=10)),
+                ('count', models.IntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to='attendance.course')),
+            ],
+            options={
+                'verbose_name': 'Attendance Rollup',
+                'verbose_name_plural': 'Attendance Rollups',
+                'ordering': ['-date', 'course', 'status'],
+                'indexes': [models.Index(fields=['date', 'course'], name='attendance__date_eb4c24_idx')],
+                'unique_together': {('course', 'date', 'status')},
+            },
+        ),
+        migrations.RunPython(populate_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_attendancerollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['-date', 'course', 'user', 'id'], name='attendance_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_attendance_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='data_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Bumped on every attendance write to this course; used to invalidate cached results'),
+        ),
+    ]
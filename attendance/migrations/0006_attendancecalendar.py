@@ -0,0 +1,79 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from attendance import calendar
+
+
+def populate_calendars(apps, schema_editor):
+    Attendance = apps.get_model('attendance', 'Attendance')
+    AttendanceCalendar = apps.get_model('attendance', 'AttendanceCalendar')
+    db_alias = schema_editor.connection.alias
+
+    rows = (
+        Attendance.objects.using(db_alias)
+        .order_by('user_id', 'course_id', 'date')
+        .values_list('user_id', 'course_id', 'date', 'status')
+        .iterator(chunk_size=2000)
+    )
+    batch = []
+    current_key = None
+    recorded = statuses = None
+
+    def finish():
+        user_id, course_id, term_start = current_key
+        batch.append(AttendanceCalendar(
+            user_id=user_id,
+            course_id=course_id,
+            term_start=term_start,
+            recorded=bytes(recorded),
+            statuses=bytes(statuses),
+        ))
+        if len(batch) >= 1000:
+            AttendanceCalendar.objects.using(db_alias).bulk_create(batch)
+            batch.clear()
+
+    for user_id, course_id, date, status in rows:
+        term_start, _ = calendar.term_bounds(date)
+        key = (user_id, course_id, term_start)
+        if key != current_key:
+            if current_key is not None:
+                finish()
+            current_key = key
+            recorded, statuses = calendar.empty_bitmaps(calendar.term_length(term_start))
+        calendar.set_day(recorded, statuses, (date - term_start).days, status)
+
+    if current_key is not None:
+        finish()
+    AttendanceCalendar.objects.using(db_alias).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_course_data_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term_start', models.DateField()),
+                ('recorded', models.BinaryField()),
+                ('statuses', models.BinaryField()),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_calendars', to='attendance.course')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_calendars', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Attendance Calendar',
+                'verbose_name_plural': 'Attendance Calendars',
+                'ordering': ['-term_start', 'course'],
+                'unique_together': {('user', 'course', 'term_start')},
+            },
+        ),
+        migrations.RunPython(populate_calendars, migrations.RunPython.noop),
+    ]
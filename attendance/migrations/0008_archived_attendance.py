@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0007_attendance_streak_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedYear',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(unique=True)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('records', models.PositiveIntegerField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archived Year',
+                'verbose_name_plural': 'Archived Years',
+                'ordering': ['year'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedAttendance',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('academic_year', models.PositiveSmallIntegerField()),
+                ('user_id', models.BigIntegerField()),
+                ('course_id', models.BigIntegerField()),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('present', 'Present'), ('absent', 'Absent'), ('late', 'Late'), ('excused', 'Excused')], max_length=10)),
+                ('remarks', models.TextField(blank=True, null=True)),
+                ('marked_by_id', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Archived Attendance Record',
+                'verbose_name_plural': 'Archived Attendance Records',
+                'ordering': ['-date', 'course_id', 'user_id'],
+                'indexes': [models.Index(fields=['user_id', 'date'], name='attendance__user_id_9ca600_idx'), models.Index(fields=['course_id', 'date'], name='attendance__course__b44ef1_idx'), models.Index(fields=['academic_year'], name='attendance__academi_b9f0b0_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0008_archived_attendance'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='course',
+            name='data_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text="Bumped on every attendance write to this course and on edits to the course or its users' names; used to invalidate cached results"),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0009_course_data_version_help'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='enrollment_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text="Bumped when students are enrolled or removed, or an enrolled user's role changes; used to invalidate cached rosters"),
+        ),
+    ]
@@ -1,7 +1,180 @@
-from django.db import models
+from collections import Counter
+from datetime import timedelta
+from django.db import connections, models, transaction, IntegrityError
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDay, TruncMonth, TruncWeek
 from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.db.models.signals import m2m_changed
 from django.utils import timezone
+from . import calendar
+
+# Enrollment rows inserted or deleted per statement by change_enrollment()
+ENROLLMENT_BATCH_SIZE = 1000
+
+
+class CourseQuerySet(models.QuerySet):
+    """
+    QuerySet helpers for listing courses without per-row queries
+    """
+
+    def with_student_count(self):
+        """
+        Annotate `student_count` with a correlated COUNT over the
+        enrollment table. A subquery is used rather than Count('students')
+        so the count stays correct when the queryset is itself filtered
+        on students.
+        """
+        enrollments = (
+            Course.students.through.objects
+            .filter(course_id=OuterRef('pk'))
+            .order_by()
+            .values('course_id')
+            .annotate(total=Count('*'))
+            .values('total')
+        )
+        return self.annotate(
+            student_count=Coalesce(Subquery(enrollments), 0)
+        )
+
+    def for_listing(self):
+        """Courses with the teacher joined in and the student count annotated"""
+        return self.select_related('teacher').with_student_count()
+
+    def bump_data_version(self, course_ids=None):
+        """Mark attendance data for these courses (default: the whole queryset) as changed"""
+        courses = self if course_ids is None else self.filter(pk__in=course_ids)
+        return courses.update(data_version=F('data_version') + 1)
+
+    def bump_enrollment_version(self, course_ids=None):
+        """Mark the rosters of these courses (default: the whole queryset) as changed"""
+        courses = self if course_ids is None else self.filter(pk__in=course_ids)
+        return courses.update(enrollment_version=F('enrollment_version') + 1)
+
+    def data_version(self):
+        """
+        A string that changes whenever attendance for any course in this
+        queryset is written, a course or a user named in its results is
+        edited (see attendance.signals), or a course joins or leaves the
+        queryset
+        """
+        result = self.order_by().aggregate(
+            courses=Count('id'),
+            version=Sum('data_version'),
+            last=Max('id'),
+        )
+        return f"{result['courses']}.{result['version'] or 0}.{result['last'] or 0}"
+
+    def listing_version(self):
+        """
+        A string that changes whenever a course in this queryset is edited,
+        has students enrolled or removed, or joins or leaves the queryset,
+        or its teacher or one of its students is edited (the course and
+        attendance lists show their names)
+        """
+        courses = self.order_by()
+        result = courses.aggregate(
+            courses=Count('id'),
+            last=Max('id'),
+            updated=Max('updated_at'),
+            teachers=Max('teacher__updated_at'),
+        )
+        # The sum of course ids catches an enrollment moving between
+        # courses when the database reuses the highest row id
+        field = Course._meta.get_field('students')
+        enrollment = field.remote_field.through.objects.using(self.db).filter(
+            course__in=courses.values('pk')
+        ).aggregate(
+            rows=Count('id'),
+            last=Max('id'),
+            courses=Sum('course_id'),
+            students=Max(f'{field.m2m_reverse_field_name()}__updated_at'),
+        )
+        updated = [
+            value.timestamp() if value else 0
+            for value in (result['updated'], result['teachers'], enrollment['students'])
+        ]
+        return (
+            f"{result['courses']}.{result['last'] or 0}.{updated[0]}.{updated[1]}."
+            f"{enrollment['rows']}.{enrollment['last'] or 0}.{enrollment['courses'] or 0}.{updated[2]}"
+        )
+
+    def change_enrollment(self, student_ids, action):
+        """
+        Add, remove or replace (leave exactly) `student_ids` in every course
+        of this queryset. The courses are locked, their enrollment rows are
+        read in one query and only the difference is bulk inserted or
+        deleted.
+        Sends m2m_changed as Course.students.add()/remove() would.
+        Returns {course_id: (added_ids, removed_ids)}.
+        """
+        field = Course._meta.get_field('students')
+        through = field.remote_field.through
+        course_field = field.m2m_field_name()
+        user_field = field.m2m_reverse_field_name()
+        User = get_user_model()
+        student_ids = set(student_ids)
+
+        def send(action_name, index):
+            for course_id, change in changes.items():
+                if change[index]:
+                    m2m_changed.send(
+                        sender=through, action=action_name, instance=courses[course_id],
+                        reverse=False, model=User, pk_set=set(change[index]), using=self.db,
+                    )
+
+        with transaction.atomic(using=self.db):
+            # The difference is computed from the rows read here, so
+            # concurrent changes to the same courses wait until this commits.
+            # Locking in pk order keeps two multi-course changes from
+            # deadlocking.
+            courses = {
+                course.pk: course
+                for course in self.select_for_update().order_by('pk').only('pk')
+            }
+            enrolled = {course_id: {} for course_id in courses}
+            rows = through.objects.using(self.db).filter(**{f'{course_field}__in': list(courses)})
+            for pk, course_id, user_id in rows.values_list('pk', f'{course_field}_id', f'{user_field}_id'):
+                enrolled[course_id][user_id] = pk
+
+            changes = {}
+            for course_id, current in enrolled.items():
+                added = student_ids - current.keys() if action in ('add', 'replace') else set()
+                if action == 'remove':
+                    removed = student_ids & current.keys()
+                elif action == 'replace':
+                    removed = current.keys() - student_ids
+                else:
+                    removed = set()
+                changes[course_id] = (added, removed)
+
+            send('pre_remove', 1)
+            removed_pks = [
+                enrolled[course_id][user_id]
+                for course_id, (_, removed) in changes.items() for user_id in removed
+            ]
+            for start in range(0, len(removed_pks), ENROLLMENT_BATCH_SIZE):
+                through.objects.using(self.db).filter(
+                    pk__in=removed_pks[start:start + ENROLLMENT_BATCH_SIZE]
+                ).delete()
+            send('post_remove', 1)
+
+            send('pre_add', 0)
+            through.objects.using(self.db).bulk_create(
+                [
+                    through(**{f'{course_field}_id': course_id, f'{user_field}_id': user_id})
+                    for course_id, (added, _) in changes.items() for user_id in added
+                ],
+                batch_size=ENROLLMENT_BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+            send('post_add', 0)
+
+        return {
+            course_id: (sorted(added), sorted(removed))
+            for course_id, (added, removed) in changes.items()
+        }
 
 
 class Course(models.Model):
@@ -38,6 +211,25 @@ class Course(models.Model):
         default=True,
         help_text="Inactive courses won't appear in attendance marking"
     )
+    data_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text=(
+            "Bumped on every attendance write to this course and on edits to the "
+            "course or its users' names; used to invalidate cached results"
+        )
+    )
+
+    enrollment_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text=(
+            "Bumped when students are enrolled or removed, or an enrolled user's "
+            "role changes; used to invalidate cached rosters"
+        )
+    )
+
+    objects = CourseQuerySet.as_manager()
     
     class Meta:
         ordering = ['code']
@@ -47,6 +239,17 @@ class Course(models.Model):
     def __str__(self):
         return f"{self.code} - {self.name}"
     
+    def save(self, *args, **kwargs):
+        # The versions only move through bump_data_version() and
+        # bump_enrollment_version(); writing back a stale in-memory value
+        # could reuse an old version number
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ('data_version', 'enrollment_version')
+            ]
+        super().save(*args, **kwargs)
+    
     def get_student_count(self):
         return self.students.count()
     
@@ -72,6 +275,156 @@ class Course(models.Model):
 
 
 
+class StatusCountQuerySet(models.QuerySet):
+    """
+    Per-status counting shared by live and archived attendance
+    """
+
+    def _status_aggregates(self):
+        aggregates = {'total': Count('id')}
+        for value, _ in self.model.STATUS_CHOICES:
+            aggregates[value] = Count('id', filter=Q(status=value))
+        return aggregates
+
+    def status_counts(self):
+        """
+        Count records per status in a single conditional-aggregate query.
+        Returns a dict with 'total' plus one key per status value.
+        """
+        return self.order_by().aggregate(**self._status_aggregates())
+
+    def rollup_counts(self):
+        """Record counts per course, date and status, as AttendanceRollup stores them"""
+        return (
+            self.order_by()
+            .values('course_id', 'date', 'status')
+            .annotate(total=Count('id'))
+            .iterator()
+        )
+
+    def with_status_counts(self, *group_by):
+        """
+        Group by the given fields and annotate each group with the
+        same counts as status_counts()
+        """
+        return self.order_by().values(*group_by).annotate(**self._status_aggregates())
+
+
+class AttendanceQuerySet(StatusCountQuerySet):
+    """
+    QuerySet with set-based read and write helpers for attendance
+    """
+
+    def bulk_mark(self, course, date, attendance_data, marked_by=None,
+                  allowed_user_ids=None):
+        """
+        Upsert a roster of attendance rows for one course and date.
+
+        Runs in a single transaction with a constant number of queries:
+        the course row and the existing attendance rows are locked, the
+        users resolved, then one INSERT ... ON CONFLICT DO UPDATE on the
+        (user, date, course) unique key. The course lock serializes
+        concurrent marks for the course, so rows another mark is
+        inserting are never counted as new twice. When `allowed_user_ids`
+        is given, rows for any other user are reported as errors.
+
+        Returns a (created_count, updated_count, errors) tuple.
+        """
+        errors = []
+        rows = {}
+        for item in attendance_data:
+            user_id = item.get('user_id')
+            try:
+                user_id = int(user_id)
+            except (TypeError, ValueError):
+                errors.append({
+                    'user_id': user_id,
+                    'error': f"Invalid user_id '{user_id}'."
+                })
+                continue
+            if allowed_user_ids is not None and user_id not in allowed_user_ids:
+                errors.append({
+                    'user_id': user_id,
+                    'error': f"User is not a student enrolled in {course.code}."
+                })
+                continue
+            # Later entries for the same student win, as they did when
+            # each row was written one at a time.
+            rows.setdefault(user_id, []).append(item)
+
+        if not rows:
+            return 0, 0, errors
+
+        User = get_user_model()
+
+        with transaction.atomic(using=self.db):
+            # Created/updated counts and rollup deltas come from the rows
+            # read here, so they must not change until this commits
+            list(
+                Course.objects.using(self.db).select_for_update()
+                .filter(pk=course.pk).values_list('pk', flat=True)
+            )
+            existing = dict(
+                self.select_for_update()
+                .filter(course=course, date=date, user_id__in=rows.keys())
+                .order_by().values_list('user_id', 'status')
+            )
+            found = set(
+                User.objects.using(self.db)
+                .filter(pk__in=rows.keys())
+                .values_list('pk', flat=True)
+            )
+
+            created_count = 0
+            updated_count = 0
+            objs = []
+            deltas = Counter()
+            for user_id, items in rows.items():
+                if user_id not in found:
+                    for _ in items:
+                        errors.append({
+                            'user_id': user_id,
+                            'error': 'User does not exist.'
+                        })
+                    continue
+
+                item = items[-1]
+                old_status = existing.get(user_id)
+                if old_status is None:
+                    created_count += 1
+                    updated_count += len(items) - 1
+                else:
+                    updated_count += len(items)
+                    deltas[(course.pk, date, old_status)] -= 1
+                deltas[(course.pk, date, item['status'])] += 1
+
+                objs.append(self.model(
+                    user_id=user_id,
+                    course=course,
+                    date=date,
+                    status=item['status'],
+                    remarks=item.get('remarks', ''),
+                    marked_by=marked_by,
+                ))
+
+            if objs:
+                self.bulk_create(
+                    objs,
+                    update_conflicts=True,
+                    unique_fields=['user', 'date', 'course'],
+                    update_fields=['status', 'remarks', 'marked_by', 'updated_at'],
+                )
+                # bulk_create skips model signals, so keep the rollup and
+                # the course data version in step here
+                AttendanceRollup.objects.using(self.db).apply_deltas(deltas)
+                AttendanceCalendar.objects.using(self.db).apply_changes(
+                    (obj.user_id, course.pk, date, obj.status) for obj in objs
+                )
+                Course.objects.using(self.db).bump_data_version([course.pk])
+
+        return created_count, updated_count, errors
+
+
 class Attendance(models.Model):
     """
     Records individual attendance entries
@@ -120,6 +473,8 @@ class Attendance(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = AttendanceQuerySet.as_manager()
     
     class Meta:
         unique_together = ('user', 'date', 'course')
@@ -129,6 +484,16 @@ class Attendance(models.Model):
         indexes = [
             models.Index(fields=['date', 'course']),
             models.Index(fields=['user', 'date']),
+            # Keyset pagination order for AttendanceCursorPagination
+            models.Index(
+                fields=['-date', 'course', 'user', 'id'],
+                name='attendance_keyset_idx'
+            ),
+            # Covers the chronic-absenteeism scan in reports.absenteeism
+            models.Index(
+                fields=['user', 'course', 'date', 'status'],
+                name='attendance_streak_idx'
+            ),
         ]
     
     def __str__(self):
@@ -161,4 +526,398 @@ class Attendance(models.Model):
                         'marked_by': "Attendance can only be marked by teachers or admins."
                     })
             except Exception:
-                pass
\ No newline at end of file
+                pass
+
+
+class ArchivedAttendanceQuerySet(StatusCountQuerySet):
+    """
+    QuerySet for attendance moved to the archive by attendance.archive
+    """
+
+
+class ArchivedAttendance(models.Model):
+    """
+    Attendance from a closed academic year, moved out of the live table
+    by `manage.py archive_attendance`. Keeps the original ids and plain
+    id columns instead of foreign keys, so the table can live in a
+    separate database (see ATTENDANCE_ARCHIVE_DATABASE).
+    """
+    STATUS_CHOICES = Attendance.STATUS_CHOICES
+
+    id = models.BigIntegerField(primary_key=True)
+    academic_year = models.PositiveSmallIntegerField()
+    user_id = models.BigIntegerField()
+    course_id = models.BigIntegerField()
+    date = models.DateField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    remarks = models.TextField(blank=True, null=True)
+    marked_by_id = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    objects = ArchivedAttendanceQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-date', 'course_id', 'user_id']
+        verbose_name = 'Archived Attendance Record'
+        verbose_name_plural = 'Archived Attendance Records'
+        indexes = [
+            models.Index(fields=['user_id', 'date']),
+            models.Index(fields=['course_id', 'date']),
+            models.Index(fields=['academic_year']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.course_id} - {self.date} ({self.get_status_display()})"
+
+
+class ArchivedYearQuerySet(models.QuerySet):
+    """
+    QuerySet for the catalog of archived academic years
+    """
+
+    def archived_before(self):
+        """
+        First date still held in the live Attendance table, or None when
+        nothing is archived. Years are archived oldest first, so every
+        earlier date is in the archive.
+        """
+        last_day = self.aggregate(last_day=Max('end_date'))['last_day']
+        return last_day + timedelta(days=1) if last_day else None
+
+
+class ArchivedYear(models.Model):
+    """
+    An academic year whose attendance lives in ArchivedAttendance.
+    The daily rollup and packed calendars for it stay in place.
+    """
+    year = models.PositiveSmallIntegerField(unique=True)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    records = models.PositiveIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ArchivedYearQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['year']
+        verbose_name = 'Archived Year'
+        verbose_name_plural = 'Archived Years'
+
+    def __str__(self):
+        return f"{self.year} ({self.start_date} to {self.end_date}): {self.records} records"
+
+
+class AttendanceRollupQuerySet(models.QuerySet):
+    """
+    QuerySet for maintaining and reading the daily rollup
+    """
+
+    TREND_BUCKETS = {
+        'day': TruncDay,
+        'week': TruncWeek,
+        'month': TruncMonth,
+    }
+
+    def apply_deltas(self, deltas):
+        """
+        Add signed counts to rollup rows.
+        `deltas` maps (course_id, date, status) to the change in count.
+        """
+        connection = connections[self.db]
+        if connection.features.supports_update_conflicts_with_target:
+            increments = {key: delta for key, delta in deltas.items() if delta > 0}
+            if increments:
+                self._upsert_increments(connection, increments)
+            deltas = {key: delta for key, delta in deltas.items() if delta < 0}
+
+        for (course_id, date, status), delta in deltas.items():
+            if not delta:
+                continue
+            lookup = {'course_id': course_id, 'date': date, 'status': status}
+            if self.filter(**lookup).update(count=F('count') + delta):
+                continue
+            # Nothing to decrement, e.g. the course row is being cascade
+            # deleted along with its rollup
+            if delta < 0:
+                continue
+            try:
+                with transaction.atomic(using=self.db):
+                    self.create(count=delta, **lookup)
+            except IntegrityError:
+                # Another writer created the row first
+                self.filter(**lookup).update(count=F('count') + delta)
+
+    def _upsert_increments(self, connection, increments):
+        """
+        Add positive counts with one INSERT ... ON CONFLICT DO UPDATE
+        (PostgreSQL, SQLite), instead of an UPDATE and possibly an INSERT
+        per row
+        """
+        meta = self.model._meta
+        table = connection.ops.quote_name(meta.db_table)
+        columns = [
+            connection.ops.quote_name(meta.get_field(name).column)
+            for name in ('course', 'date', 'status', 'count')
+        ]
+        count_column = columns[3]
+        date_field = meta.get_field('date')
+        items = list(increments.items())
+        with connection.cursor() as cursor:
+            for start in range(0, len(items), 500):
+                batch = items[start:start + 500]
+                params = []
+                for (course_id, date, status), delta in batch:
+                    params += [
+                        course_id,
+                        date_field.get_db_prep_value(date_field.to_python(date), connection),
+                        status,
+                        delta,
+                    ]
+                values = ', '.join(['(%s, %s, %s, %s)'] * len(batch))
+                cursor.execute(
+                    f"INSERT INTO {table} ({', '.join(columns)}) VALUES {values} "
+                    f"ON CONFLICT ({', '.join(columns[:3])}) "
+                    f"DO UPDATE SET {count_column} = {table}.{count_column} + EXCLUDED.{count_column}",
+                    params
+                )
+
+    def _expected_counts(self):
+        """
+        Record counts per (course_id, date, status) from the Attendance
+        table plus any archived years
+        """
+        live = Attendance.objects.using(self.db)
+        sources = [live]
+        archived_before = ArchivedYear.objects.using(self.db).archived_before()
+        if archived_before is not None:
+            sources = [
+                ArchivedAttendance.objects.filter(date__lt=archived_before),
+                live.filter(date__gte=archived_before),
+            ]
+
+        expected = Counter()
+        for source in sources:
+            for row in source.rollup_counts():
+                expected[(row['course_id'], row['date'], row['status'])] += row['total']
+        return expected
+
+    def rebuild(self):
+        """
+        Recompute the whole rollup from the Attendance table and archive.
+        Returns the number of rollup rows written.
+        """
+        expected = self._expected_counts()
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            rollups = self.bulk_create(
+                (
+                    self.model(
+                        course_id=course_id,
+                        date=date,
+                        status=status,
+                        count=count,
+                    )
+                    for (course_id, date, status), count in expected.items()
+                ),
+                batch_size=1000,
+            )
+        return len(rollups)
+
+    def mismatches(self):
+        """
+        Compare the rollup with the Attendance table and archive.
+        Returns a list of (course_id, date, status, stored, actual) tuples.
+        """
+        expected = self._expected_counts()
+        stored = {
+            (row['course_id'], row['date'], row['status']): row['count']
+            for row in self.order_by().values('course_id', 'date', 'status', 'count')
+        }
+        return [
+            (*key, stored.get(key, 0), expected.get(key, 0))
+            for key in sorted(expected.keys() | stored.keys())
+            if stored.get(key, 0) != expected.get(key, 0)
+        ]
+
+    def _summary_aggregates(self):
+        aggregates = {
+            'total': Sum('count'),
+            'days': Count('date', distinct=True, filter=Q(count__gt=0)),
+        }
+        for value, _ in Attendance.STATUS_CHOICES:
+            aggregates[value] = Sum('count', filter=Q(status=value))
+        return aggregates
+
+    def summary(self):
+        """
+        Totals per status plus the number of distinct days with records,
+        in the same shape as AttendanceQuerySet.status_counts()
+        """
+        result = self.order_by().aggregate(**self._summary_aggregates())
+        return {key: value or 0 for key, value in result.items()}
+
+    def trend(self, bucket='month'):
+        """
+        summary() per day, week (starting Monday) or month, as a list of
+        dicts with a `period` key in date order, from one GROUP BY
+        """
+        period = self.TREND_BUCKETS[bucket]('date', output_field=models.DateField())
+        rows = (
+            self.order_by()
+            .annotate(period=period)
+            .values('period')
+            .annotate(**self._summary_aggregates())
+            .order_by('period')
+        )
+        trend = []
+        for row in rows:
+            period = row.pop('period')
+            trend.append({'period': period, **{key: value or 0 for key, value in row.items()}})
+        return trend
+
+
+class AttendanceRollup(models.Model):
+    """
+    Number of attendance records per course, date and status.
+    Kept in sync by attendance signals and Attendance.objects.bulk_mark();
+    rebuild or verify it with `manage.py attendance_rollup`.
+    """
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='attendance_rollups'
+    )
+    date = models.DateField()
+    status = models.CharField(
+        max_length=10,
+        choices=Attendance.STATUS_CHOICES
+    )
+    count = models.IntegerField(default=0)
+
+    objects = AttendanceRollupQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ('course', 'date', 'status')
+        ordering = ['-date', 'course', 'status']
+        verbose_name = 'Attendance Rollup'
+        verbose_name_plural = 'Attendance Rollups'
+        indexes = [
+            models.Index(fields=['date', 'course']),
+        ]
+
+    def __str__(self):
+        return f"{self.course_id} - {self.date} - {self.status}: {self.count}"
+
+
+class AttendanceCalendarQuerySet(models.QuerySet):
+    """
+    QuerySet for maintaining packed attendance calendars
+    """
+
+    def apply_changes(self, changes):
+        """
+        Write day changes into the calendars, creating them as needed.
+        `changes` yields (user_id, course_id, date, status) tuples; a
+        status of None clears that day. Reads and writes every affected
+        calendar with a constant number of queries.
+        """
+        to_date = models.DateField().to_python
+        grouped = {}
+        for user_id, course_id, day, status in changes:
+            day = to_date(day)
+            term_start, _ = calendar.term_bounds(day)
+            key = (user_id, course_id, term_start)
+            grouped.setdefault(key, []).append(((day - term_start).days, status))
+
+        if not grouped:
+            return
+
+        def locked_rows(keys):
+            return {
+                (row.user_id, row.course_id, row.term_start): row
+                for row in self.select_for_update().filter(
+                    user_id__in={key[0] for key in keys},
+                    course_id__in={key[1] for key in keys},
+                    term_start__in={key[2] for key in keys},
+                )
+                if (row.user_id, row.course_id, row.term_start) in keys
+            }
+
+        with transaction.atomic(using=self.db):
+            rows = locked_rows(grouped.keys())
+
+            # Missing calendars are created empty first; one created by a
+            # concurrent write in the meantime is skipped here and locked
+            # by the second read, so the days are always applied to the
+            # committed row
+            missing = {
+                key for key, days in grouped.items()
+                if key not in rows
+                # Nothing to clear, e.g. the calendar went with a cascade
+                # delete of its user or course
+                and any(status is not None for _, status in days)
+            }
+            if missing:
+                to_create = []
+                for user_id, course_id, term_start in missing:
+                    recorded, statuses = calendar.empty_bitmaps(calendar.term_length(term_start))
+                    to_create.append(self.model(
+                        user_id=user_id,
+                        course_id=course_id,
+                        term_start=term_start,
+                        recorded=bytes(recorded),
+                        statuses=bytes(statuses),
+                    ))
+                self.bulk_create(to_create, ignore_conflicts=True)
+                rows.update(locked_rows(missing))
+
+            for key, row in rows.items():
+                recorded = bytearray(row.recorded)
+                statuses = bytearray(row.statuses)
+                for offset, status in grouped[key]:
+                    calendar.set_day(recorded, statuses, offset, status)
+                row.recorded = bytes(recorded)
+                row.statuses = bytes(statuses)
+
+            if rows:
+                self.bulk_update(rows.values(), ['recorded', 'statuses'])
+
+
+class AttendanceCalendar(models.Model):
+    """
+    One student's attendance in one course for one term, packed as a
+    1-bit recorded mask and 2-bit status codes per day (see
+    attendance.calendar). Maintained alongside Attendance writes.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='attendance_calendars'
+    )
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='attendance_calendars'
+    )
+    term_start = models.DateField()
+    recorded = models.BinaryField()
+    statuses = models.BinaryField()
+
+    objects = AttendanceCalendarQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ('user', 'course', 'term_start')
+        ordering = ['-term_start', 'course']
+        verbose_name = 'Attendance Calendar'
+        verbose_name_plural = 'Attendance Calendars'
+
+    def __str__(self):
+        return f"{self.user_id} - {self.course_id} - term from {self.term_start}"
+
+    @property
+    def days(self):
+        return calendar.term_length(self.term_start)
+
+    def stats(self):
+        return calendar.calendar_stats(self.recorded, self.statuses, self.days)
@@ -0,0 +1,180 @@
+"""
+Sending read-only reporting traffic to a replica database.
+
+Views that opt in with ReplicaReadMixin read from ATTENDANCE_REPLICA_DATABASE
+unless:
+    - the replica is behind the primary by more than
+      ATTENDANCE_REPLICA_MAX_LAG seconds (default 10) or cannot be reached;
+      this is checked at most every ATTENDANCE_REPLICA_CHECK_INTERVAL
+      seconds (default 5) per process
+    - the user changed something within the last
+      ATTENDANCE_REPLICA_STICKY_SECONDS (default 15), so they see their
+      own writes. ReplicaStickinessMiddleware records this in the
+      ATTENDANCE_REPLICA_CACHE cache alias (default 'default'), which must
+      be shared between worker processes
+Everything else, and every write, uses the primary. A view whose POST
+only reads (a query too long for a URL) lists it in read_only_methods,
+so it is routed like a GET and does not count as a change; one whose POST
+only sometimes reads pins those querysets to database_for_reads() itself
+and calls count_as_read().
+"""
+import threading
+import time
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+# The alias reads go to for the current request, or None for the primary
+_read_database = ContextVar('attendance_read_database', default=None)
+
+# PostgreSQL hot standby: seconds since the last replayed transaction, or
+# 0 when everything received has been replayed (an idle primary)
+POSTGRES_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+
+def replica_database():
+    """Database alias of the read replica, or None when there is none"""
+    alias = getattr(settings, 'ATTENDANCE_REPLICA_DATABASE', None)
+    if alias and alias in settings.DATABASES:
+        return alias
+    return None
+
+
+def read_database():
+    return _read_database.get()
+
+
+def replica_lag(alias):
+    """
+    Seconds the replica is behind the primary. Backends without a way to
+    ask (e.g. a copied SQLite file) only need to be reachable.
+    """
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        if connection.vendor != 'postgresql':
+            cursor.execute('SELECT 1')
+            return 0
+        cursor.execute(POSTGRES_LAG_QUERY)
+        lag = cursor.fetchone()[0]
+    # NULL before the standby has replayed anything
+    return float('inf') if lag is None else float(lag)
+
+
+class ReplicaHealth:
+    """Per-process record of whether the replica is fit to read from"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked = {}
+
+    def healthy(self, alias):
+        interval = getattr(settings, 'ATTENDANCE_REPLICA_CHECK_INTERVAL', 5)
+        entry = self._checked.get(alias)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        try:
+            lag = replica_lag(alias)
+        except DatabaseError:
+            connections[alias].close()
+            lag = None
+        max_lag = getattr(settings, 'ATTENDANCE_REPLICA_MAX_LAG', 10)
+        healthy = lag is not None and lag <= max_lag
+        with self._lock:
+            self._checked[alias] = (time.monotonic() + interval, healthy)
+        return healthy
+
+    def reset(self):
+        with self._lock:
+            self._checked.clear()
+
+
+replica_health = ReplicaHealth()
+
+
+def _sticky_cache():
+    return caches[getattr(settings, 'ATTENDANCE_REPLICA_CACHE', 'default')]
+
+
+def _sticky_key(user):
+    return f"replica-sticky:{user.pk}"
+
+
+def mark_recent_write(user):
+    """Read this user's requests from the primary for a while"""
+    _sticky_cache().set(
+        _sticky_key(user), True,
+        getattr(settings, 'ATTENDANCE_REPLICA_STICKY_SECONDS', 15)
+    )
+
+
+def has_recent_write(user):
+    return bool(_sticky_cache().get(_sticky_key(user)))
+
+
+def database_for_reads(user):
+    """The alias this user's reporting reads should use, or None for the primary"""
+    alias = replica_database()
+    if alias is None or not user.is_authenticated:
+        return None
+    if has_recent_write(user) or not replica_health.healthy(alias):
+        return None
+    return alias
+
+
+def count_as_read(request):
+    """Don't remember this request as a change (see ReplicaStickinessMiddleware)"""
+    getattr(request, '_request', request).replica_read_only = True
+
+
+class ReplicaReadMixin:
+    """
+    For read-only APIViews: once the request is authenticated, route the
+    queries of its read_only_methods to the replica when
+    database_for_reads() allows
+    """
+    read_only_methods = SAFE_METHODS
+
+    def dispatch(self, request, *args, **kwargs):
+        token = _read_database.set(None)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            _read_database.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in self.read_only_methods:
+            _read_database.set(database_for_reads(request.user))
+
+
+class ReplicaStickinessMiddleware:
+    """Remember users whose requests changed data (see mark_recent_write)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        request.replica_read_only = request.method in getattr(
+            view_class, 'read_only_methods', SAFE_METHODS
+        )
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        read_only = getattr(request, 'replica_read_only', request.method in SAFE_METHODS)
+        if (not read_only and response.status_code < 400
+                and replica_database() is not None):
+            # DRF sets request.user once the view has authenticated it
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                mark_recent_write(user)
+        return response
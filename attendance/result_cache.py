@@ -0,0 +1,158 @@
+"""
+Cache for computed report and statistics results.
+
+Entries are keyed by endpoint, request parameters, the caller's
+visibility scope and the data version of the courses the result covers
+(see CourseQuerySet.data_version). Any attendance write bumps its
+course's version, as do edits to the course and renames of users, whose
+names results carry (see attendance.signals). Stale entries are never
+read again and simply age out of the backend.
+
+The backend is chosen by the RESULT_CACHE setting:
+
+    RESULT_CACHE = {
+        'BACKEND': 'attendance.result_cache.LRUCacheBackend',
+        'OPTIONS': {'max_entries': 2048},
+    }
+
+Use 'attendance.result_cache.DjangoCacheBackend' with
+{'alias': '<CACHES alias>'} to share entries between worker processes.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from .models import Course
+
+
+class LRUCacheBackend:
+    """Bounded in-process cache that evicts the least recently used entry"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                return None
+            return self._entries[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DjangoCacheBackend:
+    """Store entries in one of the CACHES, e.g. a shared Redis or memcached"""
+
+    def __init__(self, alias='default', timeout=24 * 60 * 60):
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value):
+        self.cache.set(key, value, self.timeout)
+
+    def clear(self):
+        self.cache.clear()
+
+
+DEFAULT_RESULT_CACHE = {
+    'BACKEND': 'attendance.result_cache.LRUCacheBackend',
+    'OPTIONS': {'max_entries': 1024},
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_result_cache():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                config = getattr(settings, 'RESULT_CACHE', DEFAULT_RESULT_CACHE)
+                backend_class = import_string(config['BACKEND'])
+                _backend = backend_class(**config.get('OPTIONS', {}))
+    return _backend
+
+
+@receiver(setting_changed)
+def reset_result_cache(setting, **kwargs):
+    global _backend
+    if setting == 'RESULT_CACHE':
+        _backend = None
+
+
+def visibility_scope(user):
+    """Callers in the same scope see the same data for the same request"""
+    if user.role == 'admin':
+        return 'admin'
+    return f"{user.role}:{user.pk}"
+
+
+def scope_courses(user=None, course_id=None):
+    """
+    Courses whose attendance can appear in a result: one course when
+    course_id is given, narrowed to a teacher's own courses when `user`
+    is a teacher
+    """
+    queryset = Course.objects.all()
+    if course_id not in (None, ''):
+        try:
+            queryset = queryset.filter(pk=int(course_id))
+        except (TypeError, ValueError):
+            pass
+    if user is not None and user.role == 'teacher':
+        queryset = queryset.filter(teacher=user)
+    return queryset
+
+
+def cache_key(endpoint, user, params, version):
+    digest = hashlib.sha1(
+        json.dumps(params, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()
+    return f"result:{endpoint}:{visibility_scope(user)}:{version}:{digest}"
+
+
+def cached_result(endpoint, user, params, compute, courses, version=None):
+    """
+    Return compute() for this endpoint/params/caller, reusing an earlier
+    result while no attendance in `courses` (a Course queryset covering
+    everything the result reads) has changed.
+    
+    Pass `version` when the request already read the data version of
+    these courses, or of a queryset containing them, to skip the query.
+    """
+    if version is None:
+        version = courses.data_version()
+    key = cache_key(endpoint, user, params, version)
+    cache = get_result_cache()
+
+    result = cache.get(key)
+    if result is None:
+        result = compute()
+        cache.set(key, result)
+    return result
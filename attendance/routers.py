@@ -0,0 +1,69 @@
+from django.conf import settings
+from .replica import read_database, replica_database
+
+
+def archive_database():
+    """Database alias holding ArchivedAttendance"""
+    return getattr(settings, 'ATTENDANCE_ARCHIVE_DATABASE', 'default')
+
+
+def is_archive_model(model):
+    return (
+        model._meta.app_label == 'attendance'
+        and model._meta.model_name == 'archivedattendance'
+    )
+
+
+class ArchiveRouter:
+    """
+    Send archived attendance to ATTENDANCE_ARCHIVE_DATABASE and keep every
+    other model out of that database when it is not 'default'
+    """
+    archive_model = 'archivedattendance'
+
+    def db_for_read(self, model, **hints):
+        if is_archive_model(model):
+            return archive_database()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return self.db_for_read(model, **hints)
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        alias = archive_database()
+        if app_label == 'attendance' and model_name == self.archive_model:
+            return db == alias
+        if alias != 'default' and db == alias:
+            return False
+        return None
+
+
+class ReplicaRouter:
+    """
+    Send reads to the replica during requests that ReplicaReadMixin has
+    routed there (see attendance.replica). List it before ArchiveRouter.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = read_database()
+        if alias is None:
+            return None
+        if is_archive_model(model) and archive_database() != 'default':
+            # A separate archive database is not replicated
+            return None
+        return alias
+
+    def allow_relation(self, obj1, obj2, **hints):
+        alias = replica_database()
+        if alias is None:
+            return None
+        replicated = {'default', alias}
+        if obj1._state.db in replicated and obj2._state.db in replicated:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives its schema from the primary
+        if db == replica_database():
+            return False
+        return None
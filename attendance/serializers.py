@@ -1,14 +1,28 @@
+import base64
 from rest_framework import serializers
-from .models import Course, Attendance
+from .models import Course, Attendance, AttendanceCalendar
+from .archive import is_archived
+from .enrollment import enrollment_index
 from users.serializers import UserSerializer
 
 
+def get_student_count(course):
+    """
+    Use the `student_count` annotation from Course.objects.for_listing()
+    when present, otherwise fall back to a COUNT query
+    """
+    student_count = getattr(course, 'student_count', None)
+    if student_count is None:
+        student_count = course.get_student_count()
+    return student_count
+
+
 class CourseSerializer(serializers.ModelSerializer):
     """
     Serializer for Course model
     """
     teacher_name = serializers.CharField(source='teacher.get_full_name', read_only=True)
-    student_count = serializers.IntegerField(source='get_student_count', read_only=True)
+    student_count = serializers.SerializerMethodField()
     students_detail = UserSerializer(source='students', many=True, read_only=True)
     
     class Meta:
@@ -18,6 +32,19 @@ class CourseSerializer(serializers.ModelSerializer):
                   'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # ?students_detail=false keeps course metadata responses small;
+        # the full roster is available from /api/courses/<id>/students/
+        request = self.context.get('request')
+        if request is not None:
+            include = request.query_params.get('students_detail', 'true')
+            if include.lower() in ('false', '0', 'no'):
+                self.fields.pop('students_detail', None)
+    
+    def get_student_count(self, obj):
+        return get_student_count(obj)
+    
     def validate_teacher(self, value):
         """Ensure teacher has the correct role"""
         if value.role != 'Class teacher':
@@ -43,27 +70,29 @@ class CourseListSerializer(serializers.ModelSerializer):
     Lightweight serializer for listing courses
     """
     teacher_name = serializers.CharField(source='teacher.get_full_name', read_only=True)
-    student_count = serializers.IntegerField(source='get_student_count', read_only=True)
+    student_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Course
         fields = ['id', 'code', 'name', 'teacher', 'teacher_name', 
                   'student_count', 'is_active']
+    
+    def get_student_count(self, obj):
+        return get_student_count(obj)
 
 
 class AttendanceSerializer(serializers.ModelSerializer):
     """
     Serializer for Attendance model with full details
     """
-    user_name = serializers.CharField(source='user.get_full_name', read_only=True)
+    # Method fields rather than source='user.get_full_name' and the like:
+    # DRF inspects the signature of a callable source for every record,
+    # which dominated serializing large pages
+    user_name = serializers.SerializerMethodField()
     course_name = serializers.CharField(source='course.name', read_only=True)
     course_code = serializers.CharField(source='course.code', read_only=True)
-    marked_by_name = serializers.CharField(
-        source='marked_by.get_full_name', 
-        read_only=True, 
-        allow_null=True
-    )
-    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    marked_by_name = serializers.SerializerMethodField()
+    status_display = serializers.SerializerMethodField()
     
     class Meta:
         model = Attendance
@@ -72,19 +101,34 @@ class AttendanceSerializer(serializers.ModelSerializer):
                   'marked_by_name', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
     
+    def get_user_name(self, obj):
+        return obj.user.get_full_name()
+    
+    def get_marked_by_name(self, obj):
+        return obj.marked_by.get_full_name() if obj.marked_by is not None else None
+    
+    def get_status_display(self, obj):
+        return obj.get_status_display()
+    
     def validate_user(self, value):
         """Ensure user is a student"""
         if value.role != 'student':
             raise serializers.ValidationError("Attendance can only be marked for students.")
         return value
     
+    def validate_date(self, value):
+        """Archived academic years are read-only"""
+        if is_archived(value):
+            raise serializers.ValidationError("Attendance for archived academic years cannot be changed.")
+        return value
+    
     def validate(self, attrs):
         """Validate that student is enrolled in the course"""
         user = attrs.get('user')
         course = attrs.get('course')
         
         if user and course:
-            if not course.students.filter(id=user.id).exists():
+            if not enrollment_index.is_enrolled(course.pk, user.pk):
                 raise serializers.ValidationError({
                     "user": f"{user.get_full_name()} is not enrolled in {course.code}."
                 })
@@ -104,6 +148,12 @@ class BulkAttendanceSerializer(serializers.Serializer):
         )
     )
     
+    def validate_date(self, value):
+        """Archived academic years are read-only"""
+        if is_archived(value):
+            raise serializers.ValidationError("Attendance for archived academic years cannot be changed.")
+        return value
+    
     def validate_attendance_data(self, value):
         """
         Validate attendance data structure
@@ -128,6 +178,52 @@ class BulkAttendanceSerializer(serializers.Serializer):
         return value
 
 
+class EnrollmentSerializer(serializers.Serializer):
+    """
+    Serializer for bulk enrollment changes
+    Expected format: {"action": "add", "student_ids": [1, 2, 3], "course_ids": [4, 5]}
+    """
+    ENROLLMENT_ACTIONS = ('add', 'remove', 'replace')
+    
+    action = serializers.ChoiceField(choices=ENROLLMENT_ACTIONS)
+    student_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=20000
+    )
+    course_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=500,
+        required=False
+    )
+    
+    def validate_student_ids(self, value):
+        """Students being enrolled must exist and have the student role"""
+        student_ids = set(value)
+        if self.initial_data.get('action') == 'remove':
+            return student_ids
+        roles = enrollment_index.roles(student_ids)
+        invalid = sorted(
+            student_id for student_id in student_ids if roles.get(student_id) != 'student'
+        )
+        if invalid:
+            raise serializers.ValidationError(f"These ids are not students: {invalid}")
+        return student_ids
+    
+    def validate_course_ids(self, value):
+        course_ids = set(value)
+        found = set(Course.objects.filter(pk__in=course_ids).values_list('pk', flat=True))
+        missing = sorted(course_ids - found)
+        if missing:
+            raise serializers.ValidationError(f"Courses not found: {missing}")
+        return course_ids
+    
+    def validate(self, attrs):
+        if attrs['action'] != 'replace' and not attrs['student_ids']:
+            raise serializers.ValidationError({'student_ids': "This list may not be empty."})
+        return attrs
+
+
 class AttendanceStatsSerializer(serializers.Serializer):
     """
     Serializer for attendance statistics
@@ -137,4 +233,63 @@ class AttendanceStatsSerializer(serializers.Serializer):
     absent_count = serializers.IntegerField()
     late_count = serializers.IntegerField()
     excused_count = serializers.IntegerField()
-    attendance_percentage = serializers.FloatField()
\ No newline at end of file
+    attendance_percentage = serializers.FloatField()
+
+
+class AttendanceStatsBatchSerializer(serializers.Serializer):
+    """
+    Serializer for batch statistics requests
+    Expected format: {"user_ids": [1, 2, 3], "course_id": 1}
+    """
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=1000
+    )
+    course_id = serializers.IntegerField(required=False, allow_null=True)
+
+
+class CourseStatsSerializer(AttendanceStatsSerializer):
+    """
+    Attendance statistics for one student in one course
+    """
+    course_id = serializers.IntegerField()
+
+
+class UserStatsSerializer(serializers.Serializer):
+    """
+    Attendance statistics for one student, overall and per course
+    """
+    user_id = serializers.IntegerField()
+    stats = AttendanceStatsSerializer()
+    courses = CourseStatsSerializer(many=True)
+
+
+class CalendarStatsSerializer(AttendanceStatsSerializer):
+    """
+    Attendance statistics computed from a packed calendar
+    """
+    current_streak = serializers.IntegerField()
+    longest_streak = serializers.IntegerField()
+
+
+class AttendanceCalendarSerializer(serializers.ModelSerializer):
+    """
+    Packed term calendar for one course. `recorded` (1 bit per day) and
+    `statuses` (2 bits per day, least significant bits first) are base64
+    encoded; day N of the term is bit N of `recorded`.
+    """
+    course_code = serializers.CharField(source='course.code', read_only=True)
+    recorded = serializers.SerializerMethodField()
+    statuses = serializers.SerializerMethodField()
+    stats = CalendarStatsSerializer(read_only=True)
+    
+    class Meta:
+        model = AttendanceCalendar
+        fields = ['course', 'course_code', 'recorded', 'statuses', 'stats']
+    
+    def get_recorded(self, obj):
+        return base64.b64encode(bytes(obj.recorded)).decode('ascii')
+    
+    def get_statuses(self, obj):
+        return base64.b64encode(bytes(obj.statuses)).decode('ascii')
@@ -0,0 +1,133 @@
+from collections import Counter
+from django.conf import settings
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import ArchivedAttendance, Attendance, AttendanceCalendar, AttendanceRollup, Course
+
+# User fields shown in reports and statistics
+DISPLAYED_USER_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(pre_save, sender=Attendance)
+def remember_stored_values(sender, instance, raw=False, using=None, **kwargs):
+    """
+    Remember the stored user/course/date/status so post_save can move the
+    record in the rollup and calendar
+    """
+    instance._stored_values = None
+    if raw or instance.pk is None:
+        return
+    instance._stored_values = (
+        sender.objects.using(using)
+        .filter(pk=instance.pk)
+        .values_list('user_id', 'course_id', 'date', 'status')
+        .first()
+    )
+
+
+@receiver(post_save, sender=Attendance)
+def update_derived_on_save(sender, instance, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    deltas = Counter()
+    changes = []
+    stored = getattr(instance, '_stored_values', None)
+    if stored:
+        user_id, course_id, date, status = stored
+        deltas[(course_id, date, status)] -= 1
+        changes.append((user_id, course_id, date, None))
+    deltas[(instance.course_id, instance.date, instance.status)] += 1
+    changes.append((instance.user_id, instance.course_id, instance.date, instance.status))
+
+    AttendanceRollup.objects.using(using).apply_deltas(deltas)
+    AttendanceCalendar.objects.using(using).apply_changes(changes)
+    Course.objects.using(using).bump_data_version(
+        {key[0] for key in deltas}
+    )
+
+
+@receiver(post_delete, sender=Attendance)
+def update_derived_on_delete(sender, instance, using=None, **kwargs):
+    AttendanceRollup.objects.using(using).apply_deltas(
+        {(instance.course_id, instance.date, instance.status): -1}
+    )
+    AttendanceCalendar.objects.using(using).apply_changes(
+        [(instance.user_id, instance.course_id, instance.date, None)]
+    )
+    Course.objects.using(using).bump_data_version([instance.course_id])
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def bump_enrollment_version(sender, instance, action, reverse, pk_set, using=None, **kwargs):
+    """
+    Enrollment changes bump the course's enrollment_version, which the
+    cached rosters in enrollment_index are checked against
+    """
+    courses = Course.objects.using(using)
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            courses.bump_enrollment_version([instance.pk])
+    elif action in ('post_add', 'post_remove') and pk_set:
+        courses.bump_enrollment_version(pk_set)
+    elif action == 'pre_clear':
+        # A user's enrollments are about to be cleared; find their courses
+        # while the rows are still there
+        courses.filter(students=instance).bump_enrollment_version()
+
+
+@receiver(post_save, sender=Course)
+def bump_edited_course(sender, instance, created, raw=False, using=None, **kwargs):
+    # Cached results show course codes and names
+    if not created and not raw:
+        Course.objects.using(using).bump_data_version([instance.pk])
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def remember_displayed_names(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    """Remember the stored names and role so post_save can tell what changed"""
+    instance._stored_names = None
+    if raw or instance.pk is None:
+        return
+    fields = (*DISPLAYED_USER_FIELDS, 'role')
+    if update_fields is not None and not set(update_fields) & set(fields):
+        return
+    instance._stored_names = (
+        sender.objects.using(using)
+        .filter(pk=instance.pk)
+        .values_list(*fields)
+        .first()
+    )
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def bump_renamed_user(sender, instance, raw=False, using=None, **kwargs):
+    stored = getattr(instance, '_stored_names', None)
+    if raw or stored is None:
+        return
+    courses = Course.objects.using(using)
+    if stored[:-1] != tuple(getattr(instance, field) for field in DISPLAYED_USER_FIELDS):
+        # A user can be named in any course's results, as a student,
+        # teacher or marker of live or archived records. Renames are rare,
+        # so every course is bumped rather than working out which.
+        courses.bump_data_version()
+    elif stored[-1] != instance.role:
+        # Rosters cache their students' roles
+        courses.filter(students=instance).bump_enrollment_version()
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def bump_deleted_user_courses(sender, instance, using=None, **kwargs):
+    # The enrollment rows go with the user without an m2m_changed signal
+    Course.objects.using(using).filter(students=instance).bump_enrollment_version()
+
+
+@receiver(post_delete, sender=Course)
+def delete_archived_course_attendance(sender, instance, **kwargs):
+    # The archive has no foreign keys to cascade from
+    ArchivedAttendance.objects.filter(course_id=instance.pk).delete()
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def delete_archived_user_attendance(sender, instance, **kwargs):
+    ArchivedAttendance.objects.filter(user_id=instance.pk).delete()
+    ArchivedAttendance.objects.filter(marked_by_id=instance.pk).update(marked_by_id=None)
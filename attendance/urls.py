@@ -2,10 +2,13 @@ from django.urls import path
 from .views import (
     CourseListCreateView,
     CourseDetailView,
+    CourseStudentListView,
+    EnrollmentView,
     AttendanceListCreateView,
     AttendanceDetailView,
     BulkAttendanceView,
     AttendanceStatsView,
+    AttendanceCalendarView,
 )
 
 app_name = 'attendance'
@@ -14,10 +17,14 @@ urlpatterns = [
     # Courses
     path('courses/', CourseListCreateView.as_view(), name='course_list'),
     path('courses/<int:pk>/', CourseDetailView.as_view(), name='course_detail'),
+    path('courses/<int:pk>/students/', CourseStudentListView.as_view(), name='course_students'),
+    path('courses/<int:pk>/enrollment/', EnrollmentView.as_view(), name='course_enrollment'),
+    path('courses/enrollment/', EnrollmentView.as_view(), name='enrollment'),
     
     # Attendance
     path('attendance/', AttendanceListCreateView.as_view(), name='attendance_list'),
     path('attendance/<int:pk>/', AttendanceDetailView.as_view(), name='attendance_detail'),
     path('attendance/bulk/', BulkAttendanceView.as_view(), name='attendance_bulk'),
     path('attendance/stats/', AttendanceStatsView.as_view(), name='attendance_stats'),
+    path('attendance/calendar/', AttendanceCalendarView.as_view(), name='attendance_calendar'),
 ]
\ No newline at end of file
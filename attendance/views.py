@@ -5,22 +5,50 @@ from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
 from django.db.models import Count, Q
 from datetime import datetime, timedelta
+from django.utils import timezone
 from rest_framework.exceptions import PermissionDenied
-from .models import Course, Attendance
+from rest_framework.settings import api_settings
+from django.contrib.auth import get_user_model
+from django.utils.dateparse import parse_date
+from .models import Course, Attendance, AttendanceCalendar, ArchivedAttendance, ArchivedYear
+from . import calendar
+from .archive import (
+    ArchiveChain,
+    archived_for,
+    combined_status_counts,
+    combined_status_counts_by,
+    live_and_archived,
+)
+from .conditional import ConditionalGetMixin
+from .db import retry_on_lock
+from .enrollment import enrollment_index
+from .replica import ReplicaReadMixin
+from .result_cache import cached_result, scope_courses
 from .serializers import (
     CourseSerializer,
     CourseListSerializer,
     AttendanceSerializer,
     BulkAttendanceSerializer,
-    AttendanceStatsSerializer
+    EnrollmentSerializer,
+    AttendanceStatsSerializer,
+    AttendanceStatsBatchSerializer,
+    UserStatsSerializer,
+    AttendanceCalendarSerializer
 )
+from .pagination import AttendanceCursorPagination, CourseStudentPagination
 from .permissions import IsAdminOrTeacher, IsAdminOrTeacherOrOwner
+from users.serializers import UserSerializer
+
+User = get_user_model()
 
 
-class CourseListCreateView(generics.ListCreateAPIView):
+class CourseListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
     """
     List all courses or create new course
     GET/POST /api/courses/
+    
+    The list carries an ETag; send it back in If-None-Match to get 304
+    while the courses are unchanged.
     """
     queryset = Course.objects.all()
     permission_classes = [permissions.IsAuthenticated]
@@ -30,7 +58,7 @@ class CourseListCreateView(generics.ListCreateAPIView):
             return CourseListSerializer
         return CourseSerializer
     
-    def get_queryset(self):
+    def get_visible_courses(self):
         user = self.request.user
         queryset = Course.objects.filter(is_active=True)
         
@@ -42,7 +70,13 @@ class CourseListCreateView(generics.ListCreateAPIView):
         elif user.role == 'student':
             queryset = queryset.filter(students=user)
         
-        return queryset.order_by('code')
+        return queryset
+    
+    def get_queryset(self):
+        return self.get_visible_courses().for_listing().order_by('code')
+    
+    def get_data_version(self, request):
+        return self.get_visible_courses().listing_version()
     
     def perform_create(self, serializer):
         # Only admins can create courses
@@ -56,7 +90,7 @@ class CourseDetailView(generics.RetrieveUpdateDestroyAPIView):
     Retrieve, update or delete a course
     GET/PUT/DELETE /api/courses/<id>/
     """
-    queryset = Course.objects.all()
+    queryset = Course.objects.for_listing()
     serializer_class = CourseSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -64,7 +98,9 @@ class CourseDetailView(generics.RetrieveUpdateDestroyAPIView):
         # Only admins can update courses
         if self.request.user.role != 'admin':
             raise PermissionDenied("Only admins can update courses")
-        serializer.save()
+        instance = serializer.save()
+        # Enrollment may have changed, so drop the stale annotation
+        instance.__dict__.pop('student_count', None)
     
     def perform_destroy(self, instance):
         # Only admins can delete courses
@@ -73,14 +109,100 @@ class CourseDetailView(generics.RetrieveUpdateDestroyAPIView):
         instance.delete()
 
 
-class AttendanceListCreateView(generics.ListCreateAPIView):
+class CourseStudentListView(generics.ListAPIView):
+    """
+    List the students enrolled in a course, alphabetically by username
+    GET /api/courses/<id>/students/?search=<text>&cursor=<cursor>
+    
+    Uses keyset pagination; follow the `next` link for further pages.
+    """
+    serializer_class = UserSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CourseStudentPagination
+    
+    def get_queryset(self):
+        course = get_object_or_404(Course, pk=self.kwargs['pk'])
+        queryset = User.objects.filter(courses_enrolled=course)
+        
+        search = self.request.query_params.get('search', '').strip()
+        if search:
+            queryset = queryset.filter(
+                Q(username__icontains=search) |
+                Q(first_name__icontains=search) |
+                Q(last_name__icontains=search) |
+                Q(email__icontains=search)
+            )
+        
+        return queryset
+
+
+class EnrollmentView(APIView):
+    """
+    Add, remove or replace the students of one or many courses (admin only)
+    POST /api/courses/<id>/enrollment/  {"action": "add", "student_ids": [...]}
+    POST /api/courses/enrollment/  {"action": "add", "course_ids": [...], "student_ids": [...]}
+    
+    "replace" leaves exactly `student_ids` enrolled in each course.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request, pk=None):
+        if request.user.role != 'admin':
+            return Response({
+                'error': 'Only admins can change enrollment'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = EnrollmentSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        if pk is not None:
+            course_ids = [get_object_or_404(Course, pk=pk).pk]
+        else:
+            course_ids = serializer.validated_data.get('course_ids')
+            if not course_ids:
+                return Response({
+                    'error': 'course_ids is required'
+                }, status=status.HTTP_400_BAD_REQUEST)
+        
+        changes = Course.objects.filter(pk__in=course_ids).change_enrollment(
+            serializer.validated_data['student_ids'],
+            serializer.validated_data['action']
+        )
+        
+        courses = [
+            {'course_id': course_id, 'added': len(added), 'removed': len(removed)}
+            for course_id, (added, removed) in sorted(changes.items())
+        ]
+        return Response({
+            'action': serializer.validated_data['action'],
+            'courses': courses,
+            'added': sum(course['added'] for course in courses),
+            'removed': sum(course['removed'] for course in courses),
+        })
+
+
+class AttendanceListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
     """
     List attendance records or mark new attendance
     GET/POST /api/attendance/
+    
+    Pass ?cursor= (empty on the first request) to page through history
+    with keyset pagination instead of page numbers; follow the `next`
+    link for subsequent pages.
+    
+    Records from archived academic years follow the live ones. Lists
+    carry an ETag for If-None-Match.
     """
     serializer_class = AttendanceSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    @property
+    def pagination_class(self):
+        if AttendanceCursorPagination.cursor_query_param in self.request.query_params:
+            return AttendanceCursorPagination
+        return api_settings.DEFAULT_PAGINATION_CLASS
+    
     def get_queryset(self):
         user = self.request.user
         queryset = Attendance.objects.select_related('user', 'course', 'marked_by')
@@ -104,7 +226,38 @@ class AttendanceListCreateView(generics.ListCreateAPIView):
         if user_id:
             queryset = queryset.filter(user_id=user_id)
         
-        return queryset.order_by('-date', 'course')
+        queryset = queryset.order_by('-date', 'course')
+        
+        # Read archived years too when the requested dates reach them
+        archived_before = ArchivedYear.objects.archived_before()
+        if archived_before is None:
+            return queryset
+        
+        try:
+            day = parse_date(date) if date else None
+        except ValueError:
+            day = None
+        if day is not None and day >= archived_before:
+            return queryset
+        
+        archived = archived_for(user, archived_before)
+        if course_id:
+            archived = archived.filter(course_id=course_id)
+        if date:
+            archived = archived.filter(date=date)
+        if user_id:
+            archived = archived.filter(user_id=user_id)
+        
+        parts = live_and_archived(
+            queryset, archived.order_by('-date', 'course_id', 'user_id'),
+            start_date=day, end_date=day, archived_before=archived_before
+        )
+        return ArchiveChain(*reversed(parts))
+    
+    def get_data_version(self, request):
+        # Attendance writes, and course edits for the names shown per record
+        courses = scope_courses(request.user, request.query_params.get('course'))
+        return f"{courses.data_version()}:{courses.listing_version()}"
     
     def perform_create(self, serializer):
         # Only teachers and admins can mark attendance
@@ -164,38 +317,18 @@ class BulkAttendanceView(APIView):
             date = serializer.validated_data['date']
             attendance_data = serializer.validated_data['attendance_data']
             
-            created_count = 0
-            updated_count = 0
-            errors = []
+            # Validate roster membership from the in-process index rather
+            # than with a query per row
+            student_ids = enrollment_index.students(course.pk)
             
-            for item in attendance_data:
-                try:
-                    user_id = item['user_id']
-                    status_value = item['status']
-                    remarks = item.get('remarks', '')
-                    
-                    # Check if attendance already exists
-                    attendance, created = Attendance.objects.update_or_create(
-                        user_id=user_id,
-                        course=course,
-                        date=date,
-                        defaults={
-                            'status': status_value,
-                            'remarks': remarks,
-                            'marked_by': request.user
-                        }
-                    )
-                    
-                    if created:
-                        created_count += 1
-                    else:
-                        updated_count += 1
-                
-                except Exception as e:
-                    errors.append({
-                        'user_id': user_id,
-                        'error': str(e)
-                    })
+            # bulk_mark runs in its own transaction, so a write that loses
+            # the race for the database lock can simply be retried
+            created_count, updated_count, errors = retry_on_lock(
+                Attendance.objects.bulk_mark,
+                course, date, attendance_data,
+                marked_by=request.user,
+                allowed_user_ids=student_ids
+            )
             
             return Response({
                 'message': 'Bulk attendance processed',
@@ -207,17 +340,50 @@ class BulkAttendanceView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class AttendanceStatsView(APIView):
+def build_stats(counts):
+    """Turn the output of status_counts() into the stats payload"""
+    total_days = counts['total']
+    present_count = counts['present']
+    attendance_percentage = (present_count / total_days * 100) if total_days > 0 else 0
+    
+    return {
+        'total_days': total_days,
+        'present_count': present_count,
+        'absent_count': counts['absent'],
+        'late_count': counts['late'],
+        'excused_count': counts['excused'],
+        'attendance_percentage': round(attendance_percentage, 2)
+    }
+
+
+class AttendanceStatsView(ConditionalGetMixin, ReplicaReadMixin, APIView):
     """
-    Get attendance statistics for a student
+    Get attendance statistics for a student, or for many students at once
     GET /api/attendance/stats/?user_id=<id>&course_id=<id>
+    GET /api/attendance/stats/?user_ids=<id>,<id>,...&course_id=<id>
+    POST /api/attendance/stats/  {"user_ids": [<id>, ...], "course_id": <id>}
     """
     permission_classes = [permissions.IsAuthenticated]
+    # The POST form only reads: route it like a GET and don't pin the
+    # caller to the primary
+    read_only_methods = (*permissions.SAFE_METHODS, 'POST')
+    
+    def get_data_version(self, request):
+        return scope_courses(course_id=request.query_params.get('course_id')).data_version()
     
     def get(self, request):
-        user_id = request.query_params.get('user_id')
+        user_ids = request.query_params.get('user_ids')
         course_id = request.query_params.get('course_id')
         
+        if user_ids is not None:
+            serializer = AttendanceStatsBatchSerializer(data={
+                'user_ids': [value for value in user_ids.split(',') if value.strip()],
+                'course_id': course_id or None
+            })
+            return self._batch_stats(request, serializer)
+        
+        user_id = request.query_params.get('user_id')
+        
         if not user_id:
             user_id = request.user.id if request.user.role == 'student' else None
         
@@ -228,27 +394,155 @@ class AttendanceStatsView(APIView):
         
         # Build query
         queryset = Attendance.objects.filter(user_id=user_id)
+        archived = ArchivedAttendance.objects.filter(user_id=user_id)
         
         if course_id:
             queryset = queryset.filter(course_id=course_id)
+            archived = archived.filter(course_id=course_id)
         
-        # Calculate stats
-        total_days = queryset.count()
-        present_count = queryset.filter(status='present').count()
-        absent_count = queryset.filter(status='absent').count()
-        late_count = queryset.filter(status='late').count()
-        excused_count = queryset.filter(status='excused').count()
+        # Calculate stats in one query per live/archived part, or reuse a
+        # cached result
+        counts = cached_result(
+            'attendance_stats', request.user,
+            {'user_id': user_id, 'course_id': course_id},
+            lambda: combined_status_counts(live_and_archived(queryset, archived)),
+            scope_courses(course_id=course_id),
+            version=self.data_version
+        )
+        stats = build_stats(counts)
         
-        attendance_percentage = (present_count / total_days * 100) if total_days > 0 else 0
+        serializer = AttendanceStatsSerializer(stats)
+        return Response(serializer.data)
+    
+    def post(self, request):
+        serializer = AttendanceStatsBatchSerializer(data=request.data)
+        return self._batch_stats(request, serializer)
+    
+    def _batch_stats(self, request, serializer):
+        """Stats for many students, grouped by user and course, in one query"""
+        if request.user.role == 'student':
+            return Response({
+                'error': 'Students cannot view batch statistics'
+            }, status=status.HTTP_403_FORBIDDEN)
         
-        stats = {
-            'total_days': total_days,
-            'present_count': present_count,
-            'absent_count': absent_count,
-            'late_count': late_count,
-            'excused_count': excused_count,
-            'attendance_percentage': round(attendance_percentage, 2)
-        }
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        serializer = AttendanceStatsSerializer(stats)
-        return Response(serializer.data)
\ No newline at end of file
+        user_ids = list(dict.fromkeys(serializer.validated_data['user_ids']))
+        course_id = serializer.validated_data.get('course_id')
+        
+        queryset = Attendance.objects.filter(user_id__in=user_ids)
+        
+        if course_id:
+            queryset = queryset.filter(course_id=course_id)
+        
+        # Teachers only see stats for their own courses
+        if request.user.role == 'teacher':
+            queryset = queryset.filter(course__teacher=request.user)
+        
+        def compute():
+            statuses = [value for value, _ in Attendance.STATUS_CHOICES]
+            totals = {
+                user_id: dict.fromkeys(['total'] + statuses, 0)
+                for user_id in user_ids
+            }
+            courses = {user_id: [] for user_id in user_ids}
+            
+            archived_before = ArchivedYear.objects.archived_before()
+            if archived_before is None:
+                rows = queryset.with_status_counts('user_id', 'course_id').order_by('user_id', 'course_id')
+            else:
+                archived = archived_for(request.user, archived_before).filter(user_id__in=user_ids)
+                if course_id:
+                    archived = archived.filter(course_id=course_id)
+                rows = combined_status_counts_by(
+                    live_and_archived(queryset, archived, archived_before=archived_before),
+                    'user_id', 'course_id'
+                )
+            
+            for row in rows:
+                user_id = row['user_id']
+                for key in totals[user_id]:
+                    totals[user_id][key] += row[key]
+                courses[user_id].append({'course_id': row['course_id'], **build_stats(row)})
+            
+            return [
+                {
+                    'user_id': user_id,
+                    'stats': build_stats(totals[user_id]),
+                    'courses': courses[user_id]
+                }
+                for user_id in user_ids
+            ]
+        
+        results = cached_result(
+            'attendance_stats_batch', request.user,
+            {'user_ids': user_ids, 'course_id': course_id},
+            compute, scope_courses(request.user, course_id),
+            version=self.data_version
+        )
+        
+        serializer = UserStatsSerializer(results, many=True)
+        return Response({'results': serializer.data})
+
+
+class AttendanceCalendarView(APIView):
+    """
+    Packed per-course attendance calendars for one student and term
+    GET /api/attendance/calendar/?user_id=<id>&course_id=<id>&date=YYYY-MM-DD
+    
+    `date` picks the term (default: today); students always get their own
+    calendars. Each course carries bitmaps indexed by day offset from
+    `term_start` plus stats and streaks computed from them.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        user_id = request.query_params.get('user_id')
+        course_id = request.query_params.get('course_id')
+        date_str = request.query_params.get('date')
+        
+        if request.user.role == 'student':
+            user_id = request.user.id
+        
+        if not user_id:
+            return Response({
+                'error': 'user_id is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            user_id = int(user_id)
+        except ValueError:
+            return Response({
+                'error': 'Invalid user_id'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            day = datetime.strptime(date_str, '%Y-%m-%d').date() if date_str else timezone.localdate()
+        except ValueError:
+            return Response({
+                'error': 'Invalid date format. Use YYYY-MM-DD'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        term_start, term_end = calendar.term_bounds(day)
+        
+        queryset = AttendanceCalendar.objects.select_related('course').filter(
+            user_id=user_id,
+            term_start=term_start
+        )
+        
+        if course_id:
+            queryset = queryset.filter(course_id=course_id)
+        
+        if request.user.role == 'teacher':
+            queryset = queryset.filter(course__teacher=request.user)
+        
+        serializer = AttendanceCalendarSerializer(queryset, many=True)
+        return Response({
+            'user_id': user_id,
+            'term_start': term_start,
+            'term_end': term_end,
+            'days': (term_end - term_start).days + 1,
+            'status_codes': calendar.STATUS_CODES,
+            'courses': serializer.data
+        })
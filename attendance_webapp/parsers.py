@@ -0,0 +1,34 @@
+"""
+JSON request parsing with orjson.
+
+FastJSONParser is a drop-in for rest_framework's JSONParser (enabled with
+FAST_JSON=true alongside FastJSONRenderer). Bodies that orjson rejects are
+parsed again by the stdlib, so the same documents are accepted and the
+same ParseError messages returned. Other charsets than UTF-8, and every
+body when orjson isn't installed, go straight to the stdlib parser.
+
+One difference: integers beyond 64 bits are parsed as floats.
+"""
+import codecs
+import io
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from .renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # e.g. NaN when STRICT_JSON is off; otherwise this raises the
+            # usual ParseError
+            return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,49 @@
+"""
+JSON rendering with orjson.
+
+FastJSONRenderer is a drop-in for rest_framework's JSONRenderer (enable it
+with FAST_JSON=true, see settings.REST_FRAMEWORK). It produces the same
+bytes: dates and datetimes in ISO 8601 with 'Z' for UTC, Decimal as a
+number, and anything else orjson doesn't know through DRF's JSONEncoder.
+Output that orjson can't produce (indent other than 2 as used by the
+browsable API, ASCII-only or spaced output, integers beyond 64 bits,
+very deep nesting) goes through the stdlib renderer instead, as does
+everything when orjson isn't installed.
+
+One difference: NaN and infinite floats are written as null rather than
+rejected.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+    INDENT_OPTIONS = {None: OPTIONS, 2: OPTIONS | orjson.OPT_INDENT_2}
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent not in INDENT_OPTIONS:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=JSONEncoder().default, option=INDENT_OPTIONS[indent])
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # As JSONRenderer: keep the output a strict javascript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
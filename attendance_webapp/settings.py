@@ -10,8 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
+from .database import database_from_env, env_bool
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -53,6 +55,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'attendance.replica.ReplicaStickinessMiddleware',
 ]
 
 ROOT_URLCONF = 'attendance_webapp.urls'
@@ -78,17 +81,62 @@ WSGI_APPLICATION = 'attendance_webapp.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Configured from DATABASE_URL and the DB_* variables described in
+# attendance_webapp/database.py; defaults to db.sqlite3
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_from_env(base_dir=BASE_DIR),
 }
 
+# Archived academic years (manage.py archive_attendance) are stored in this
+# database. Set ARCHIVE_DATABASE_URL (e.g. sqlite:///archive.sqlite3) to keep
+# them in a separate one, then run `manage.py migrate --database archive`
+ATTENDANCE_ARCHIVE_DATABASE = 'default'
+if os.environ.get('ARCHIVE_DATABASE_URL'):
+    DATABASES['archive'] = database_from_env(
+        base_dir=BASE_DIR, url_variable='ARCHIVE_DATABASE_URL'
+    )
+    ATTENDANCE_ARCHIVE_DATABASE = 'archive'
+
+# Read replica for reports and statistics (see attendance/replica.py). Set
+# REPLICA_DATABASE_URL to use it; users who just changed something, and
+# everyone while the replica lags, read from the primary instead
+ATTENDANCE_REPLICA_DATABASE = None
+if os.environ.get('REPLICA_DATABASE_URL'):
+    DATABASES['replica'] = database_from_env(
+        base_dir=BASE_DIR, url_variable='REPLICA_DATABASE_URL'
+    )
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    ATTENDANCE_REPLICA_DATABASE = 'replica'
+ATTENDANCE_REPLICA_MAX_LAG = int(os.environ.get('REPLICA_MAX_LAG', 10))
+ATTENDANCE_REPLICA_STICKY_SECONDS = 15
+
+DATABASE_ROUTERS = [
+    'attendance.routers.ReplicaRouter',
+    'attendance.routers.ArchiveRouter',
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
+# PASSWORD_HASHER=argon2 (needs argon2-cffi) or scrypt hashes passwords
+# with a faster memory-hard algorithm than PBKDF2. Existing hashes are
+# upgraded transparently the next time their user logs in
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+_preferred_hasher = {
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+}.get(os.environ.get('PASSWORD_HASHER', '').lower())
+if _preferred_hasher:
+    PASSWORD_HASHERS.remove(_preferred_hasher)
+    PASSWORD_HASHERS.insert(0, _preferred_hasher)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -130,21 +178,72 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 #CONFIGURING REST FRAMEWORK
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWTAuthentication without the per-request user query; see
+        # users/authentication.py
+        'users.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # Login token buckets (users/throttling.py)
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': '30/min',
+        'login_username': '10/min',
+    },
+}
+
+# FAST_JSON=true renders and parses JSON with orjson (pip install orjson);
+# the output is the same as DRF's JSONRenderer. See attendance_webapp/renderers.py
+if env_bool(os.environ, 'FAST_JSON'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = (
+        'attendance_webapp.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    )
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'] = (
+        'attendance_webapp.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    )
+
+#LOGIN ADMISSION CONTROL (see users/throttling.py)
+LOGIN_THROTTLE_CACHE = 'login_throttle'
+LOGIN_MAX_CONCURRENT_HASHES = int(os.environ.get('LOGIN_MAX_CONCURRENT_HASHES', 0)) or None
+LOGIN_HASH_WAIT = 2
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'login_throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'login-throttle',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
 }
 
 #CONFIGURING JWT SETTINGS
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),    
+    # Refreshing re-reads the user, so role changes and deactivation reach
+    # the access token's claims
+    'TOKEN_REFRESH_SERIALIZER': 'users.authentication.TokenRefreshSerializer',
 }
 
+#CACHE FOR REPORT AND STATISTICS RESULTS
+# Swap the backend for 'attendance.result_cache.DjangoCacheBackend' with
+# OPTIONS {'alias': '<CACHES alias>'} to share results between workers
+RESULT_CACHE = {
+    'BACKEND': 'attendance.result_cache.LRUCacheBackend',
+    'OPTIONS': {'max_entries': 2048},
+}
+
+#ACADEMIC TERMS START ON THE FIRST OF THESE MONTHS (used by attendance calendars
+#and archiving; the academic year starts with the first of them)
+ACADEMIC_TERM_START_MONTHS = (1, 5, 9)
+
 #SETTING CUSTOM USERS
 AUTH_USER_MODEL = 'users.CustomUser'
 
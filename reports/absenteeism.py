@@ -0,0 +1,200 @@
+"""
+Chronic-absenteeism detection over every student in one pass.
+
+Attendance is streamed in (user, course, date) order straight from the
+covering `attendance_streak_idx` index, so no sort is needed. Each
+student's sessions in a course are packed into a byte string of one
+symbol per session; run lengths and rolling windows are then found with
+regex and bytes operations, which run in C over the whole sequence
+instead of per record in Python. When the period reaches archived
+academic years, the archived and live records are merged on the same
+order, so streaks and windows run across the archive boundary.
+"""
+import heapq
+import re
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from attendance.archive import ArchiveChain, live_and_archived
+from attendance.models import ArchivedAttendance, Attendance, Course
+
+# One byte per session
+ATTENDED = ord('P')
+ABSENT = ord('A')
+EXCUSED = ord('E')
+
+SESSION_SYMBOLS = {
+    'present': ATTENDED,
+    'late': ATTENDED,
+    'absent': ABSENT,
+    'excused': EXCUSED,
+}
+
+# A run of absences; excused sessions inside a run neither break nor extend it
+ABSENCE_RUN = re.compile(rb'A(?:E*A)*')
+
+DEFAULT_MIN_STREAK = 3
+DEFAULT_WINDOW = 10
+DEFAULT_RATE_DROP = 20.0
+DEFAULT_PERIOD_DAYS = 365
+
+CHUNK_SIZE = 5000
+
+
+def absenteeism_queryset(start_date, end_date, course_id=None, user=None):
+    """
+    Attendance read by the detector, in (user, course, date) order. Teachers
+    only get records for their own courses. When the period reaches
+    archived academic years, an ArchiveChain of the archived and live
+    records is returned instead; detect_absenteeism() merges its parts.
+    """
+    queryset = Attendance.objects.filter(date__range=[start_date, end_date])
+    archived = ArchivedAttendance.objects.filter(date__range=[start_date, end_date])
+
+    if course_id:
+        queryset = queryset.filter(course_id=course_id)
+        archived = archived.filter(course_id=course_id)
+
+    if user is not None and user.role == 'teacher':
+        queryset = queryset.filter(course__teacher=user)
+        archived = archived.filter(
+            course_id__in=list(Course.objects.filter(teacher=user).values_list('pk', flat=True))
+        )
+
+    parts = live_and_archived(queryset, archived, start_date, end_date)
+    if len(parts) == 1 and parts[0].model is Attendance:
+        return parts[0].order_by('user_id', 'course_id', 'date')
+    return ArchiveChain(*parts).order_by('user_id', 'course_id', 'date')
+
+
+def default_period(today=None):
+    """The year up to and including today"""
+    end_date = today or timezone.localdate()
+    return end_date - timedelta(days=DEFAULT_PERIOD_DAYS - 1), end_date
+
+
+def _rate(sessions):
+    if not sessions:
+        return None
+    return round(sessions.count(ATTENDED) / len(sessions) * 100, 2)
+
+
+def _session_rows(queryset, chunk_size):
+    """
+    (user_id, course_id, date, status) rows of `queryset`. The parts of an
+    ArchiveChain are each in (user, course, date) order over different
+    dates, so they are merged rather than read one after the other.
+    """
+    if isinstance(queryset, ArchiveChain):
+        return heapq.merge(*(_session_rows(part, chunk_size) for part in queryset.parts))
+    return queryset.values_list('user_id', 'course_id', 'date', 'status').iterator(
+        chunk_size=chunk_size
+    )
+
+
+def analyse_sessions(sessions, dates, min_streak=DEFAULT_MIN_STREAK,
+                     window=DEFAULT_WINDOW, rate_drop=DEFAULT_RATE_DROP):
+    """
+    Analyse one student's sessions in one course. `sessions` holds one
+    symbol per session in date order and `dates` the matching dates.
+    Returns a result dict when the student is flagged, otherwise None.
+    """
+    longest = current = None
+    longest_streak = current_streak = 0
+    for run in ABSENCE_RUN.finditer(sessions):
+        current = run
+        current_streak = run.group().count(b'A')
+        if current_streak > longest_streak:
+            longest, longest_streak = run, current_streak
+
+    reasons = []
+    if longest_streak >= min_streak:
+        reasons.append('consecutive_absences')
+
+    # Only trailing excused sessions may follow an ongoing run
+    if current is not None and sessions[current.end():].strip(b'E'):
+        current_streak = 0
+
+    # Rolling windows over the sessions that count towards the rate
+    counted = sessions.replace(b'E', b'')
+    recent = counted[-window:]
+    previous = counted[-2 * window:-window]
+    recent_rate = _rate(recent)
+    previous_rate = _rate(previous) if len(previous) == window else None
+    if previous_rate is not None and previous_rate - recent_rate >= rate_drop:
+        reasons.append('falling_rate')
+
+    if not reasons:
+        return None
+
+    return {
+        'sessions': len(sessions),
+        'attendance_rate': _rate(counted),
+        'longest_absence_streak': longest_streak,
+        'streak_start': dates[longest.start()] if longest else None,
+        'streak_end': dates[longest.end() - 1] if longest else None,
+        'current_absence_streak': current_streak,
+        'recent_rate': recent_rate,
+        'previous_rate': previous_rate,
+        'reasons': reasons,
+    }
+
+
+def detect_absenteeism(queryset, min_streak=DEFAULT_MIN_STREAK, window=DEFAULT_WINDOW,
+                       rate_drop=DEFAULT_RATE_DROP, chunk_size=CHUNK_SIZE):
+    """
+    Yield a result dict, with user_id and course_id, for every student and
+    course flagged by analyse_sessions(). `queryset` must be ordered by
+    user, course and date (see absenteeism_queryset()); only one
+    student's sessions in one course are held in memory at a time.
+    """
+    rows = _session_rows(queryset, chunk_size)
+    symbols = SESSION_SYMBOLS
+
+    def flush(key, sessions, dates):
+        if key is None:
+            return None
+        result = analyse_sessions(bytes(sessions), dates, min_streak, window, rate_drop)
+        if result is not None:
+            result['user_id'], result['course_id'] = key
+        return result
+
+    current = None
+    sessions = bytearray()
+    dates = []
+    for user_id, course_id, date, status in rows:
+        if (user_id, course_id) != current:
+            result = flush(current, sessions, dates)
+            if result is not None:
+                yield result
+            current = (user_id, course_id)
+            sessions = bytearray()
+            dates = []
+
+        sessions.append(symbols.get(status, EXCUSED))
+        dates.append(date)
+
+    result = flush(current, sessions, dates)
+    if result is not None:
+        yield result
+
+
+def with_names(results):
+    """
+    Add username, student_name and course_code to detector results with
+    one query for the users and one for the courses
+    """
+    results = list(results)
+    users = get_user_model().objects.in_bulk(
+        {result['user_id'] for result in results}
+    )
+    courses = Course.objects.only('code').in_bulk(
+        {result['course_id'] for result in results}
+    )
+    for result in results:
+        user = users.get(result['user_id'])
+        course = courses.get(result['course_id'])
+        result['username'] = user.username if user else None
+        result['student_name'] = (user.get_full_name() or user.username) if user else None
+        result['course_code'] = course.code if course else None
+    return results
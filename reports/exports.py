@@ -0,0 +1,284 @@
+import csv
+import io
+import itertools
+import operator
+from collections import Counter
+from django.contrib.auth import get_user_model
+from attendance.archive import ArchiveChain, live_and_archived
+from attendance.models import ArchivedAttendance, Attendance, Course
+from attendance.routers import archive_database
+from .pdf import PDFTableWriter
+
+
+REPORT_HEADER = [
+    'Date',
+    'Course Code',
+    'Course Name',
+    'Student Username',
+    'Student Name',
+    'Status',
+    'Remarks',
+    'Marked By'
+]
+
+# Narrow projection read by report_rows(); avoids building model instances
+REPORT_FIELDS = (
+    'date',
+    'course__code',
+    'course__name',
+    'user__username',
+    'user__first_name',
+    'user__last_name',
+    'status',
+    'remarks',
+    'marked_by_id',
+    'marked_by__first_name',
+    'marked_by__last_name',
+)
+
+# Report row order: date, course code, username. Archived records have no
+# foreign keys to sort on; archived_report_rows() sorts each day's rows
+# by the same key.
+REPORT_ORDERING = ('date', 'course__code', 'user__username')
+
+CHUNK_SIZE = 2000
+
+# Column widths, in characters, for the PDF table
+PDF_COLUMN_WIDTHS = [10, 11, 22, 16, 24, 8, 30, 20]
+
+
+def report_queryset(start_date, end_date, course_id=None, user=None, using=None):
+    """
+    Attendance records covered by a report, in report order. Teachers
+    only get records for their own courses. When the range reaches
+    archived academic years, an ArchiveChain of the archived and live
+    records is returned instead. `using` reads the records from that
+    database alias (the replica) however late they are consumed; a
+    separate archive database is not replicated and is read directly.
+    """
+    queryset = Attendance.objects.filter(date__range=[start_date, end_date])
+    archived = ArchivedAttendance.objects.filter(date__range=[start_date, end_date])
+    if using is not None:
+        queryset = queryset.using(using)
+        if archive_database() == 'default':
+            archived = archived.using(using)
+    
+    if course_id:
+        queryset = queryset.filter(course_id=course_id)
+        archived = archived.filter(course_id=course_id)
+    
+    if user is not None and user.role == 'teacher':
+        queryset = queryset.filter(course__teacher=user)
+        archived = archived.filter(
+            course_id__in=list(Course.objects.filter(teacher=user).values_list('pk', flat=True))
+        )
+    
+    parts = [
+        part.order_by('date') if part.model is ArchivedAttendance else part.order_by(*REPORT_ORDERING)
+        for part in live_and_archived(queryset, archived, start_date, end_date)
+    ]
+    if len(parts) == 1 and parts[0].model is Attendance:
+        return parts[0]
+    return ArchiveChain(*parts)
+
+
+def _full_name(first_name, last_name):
+    return f"{first_name or ''} {last_name or ''}".strip()
+
+
+def report_rows(queryset, summary, chunk_size=CHUNK_SIZE):
+    """
+    Yield one report row per attendance record, reading the queryset in
+    chunks (server-side cursors where the database supports them).
+    Each row's status is counted into the `summary` Counter as it passes.
+    """
+    if isinstance(queryset, ArchiveChain):
+        for part in queryset.parts:
+            yield from report_rows(part, summary, chunk_size)
+        return
+    if queryset.model is ArchivedAttendance:
+        yield from archived_report_rows(queryset, summary, chunk_size)
+        return
+    
+    status_display = dict(Attendance.STATUS_CHOICES)
+    rows = queryset.values_list(*REPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+    for (date, course_code, course_name, username, first_name, last_name,
+         status, remarks, marked_by_id, marked_by_first, marked_by_last) in rows:
+        summary[status] += 1
+        yield [
+            date.strftime('%Y-%m-%d'),
+            course_code,
+            course_name,
+            username,
+            _full_name(first_name, last_name) or username,
+            status_display.get(status, status),
+            remarks or '',
+            _full_name(marked_by_first, marked_by_last) if marked_by_id else 'N/A'
+        ]
+
+
+def archived_report_rows(queryset, summary, chunk_size=CHUNK_SIZE):
+    """
+    report_rows() for ArchivedAttendance, which has no foreign keys to
+    join or sort on: rows are read in date order, names are looked up for
+    ids not seen before, and each day's rows are sorted by course code and
+    username like the live ones
+    """
+    status_display = dict(Attendance.STATUS_CHOICES)
+    users = {}
+    courses = {}
+    rows = queryset.order_by('date').values_list(
+        'date', 'course_id', 'user_id', 'status', 'remarks', 'marked_by_id'
+    ).iterator(chunk_size=chunk_size)
+    
+    for date, day_rows in itertools.groupby(rows, key=operator.itemgetter(0)):
+        day_rows = list(day_rows)
+        
+        user_ids = {row[2] for row in day_rows} | {row[5] for row in day_rows if row[5]}
+        missing = list(user_ids - users.keys())
+        for start in range(0, len(missing), chunk_size):
+            users.update(
+                (pk, (username, _full_name(first_name, last_name)))
+                for pk, username, first_name, last_name in get_user_model().objects.filter(
+                    pk__in=missing[start:start + chunk_size]
+                ).values_list('pk', 'username', 'first_name', 'last_name')
+            )
+        missing = list({row[1] for row in day_rows} - courses.keys())
+        for start in range(0, len(missing), chunk_size):
+            courses.update(
+                (pk, (code, name))
+                for pk, code, name in Course.objects.filter(
+                    pk__in=missing[start:start + chunk_size]
+                ).values_list('pk', 'code', 'name')
+            )
+        
+        day_rows.sort(key=lambda row: (courses.get(row[1], ('',))[0], users.get(row[2], ('',))[0]))
+        for _, course_id, user_id, status, remarks, marked_by_id in day_rows:
+            summary[status] += 1
+            course_code, course_name = courses.get(course_id, ('', ''))
+            username, full_name = users.get(user_id, ('', ''))
+            yield [
+                date.strftime('%Y-%m-%d'),
+                course_code,
+                course_name,
+                username,
+                full_name or username,
+                status_display.get(status, status),
+                remarks or '',
+                users.get(marked_by_id, ('', 'N/A'))[1] if marked_by_id else 'N/A'
+            ]
+
+
+def summary_rows(summary):
+    """Rows for the summary block that follows the data"""
+    return [
+        [],
+        ['SUMMARY'],
+        ['Total Records', sum(summary.values())],
+        ['Present', summary['present']],
+        ['Absent', summary['absent']],
+        ['Late', summary['late']],
+        ['Excused', summary['excused']],
+    ]
+
+
+def _track_progress(rows, progress, every=CHUNK_SIZE):
+    """Pass rows through, calling progress(count) every `every` rows"""
+    count = 0
+    for count, row in enumerate(rows, start=1):
+        yield row
+        if progress is not None and count % every == 0:
+            progress(count)
+    if progress is not None:
+        progress(count)
+
+
+def csv_chunks(rows, summary, rows_per_chunk=500):
+    """
+    Render report rows as CSV text in chunks of `rows_per_chunk` rows,
+    so memory use stays flat however large the date range is.
+    `summary` must be the Counter that `rows` fills in as it is consumed.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return value
+
+    writer.writerow(REPORT_HEADER)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % rows_per_chunk == 0:
+            yield flush()
+
+    writer.writerows(summary_rows(summary))
+    yield flush()
+
+
+def render_csv(rows, summary, fileobj, title=''):
+    """Write report rows as CSV to a binary file object"""
+    for chunk in csv_chunks(rows, summary, rows_per_chunk=CHUNK_SIZE):
+        fileobj.write(chunk.encode('utf-8'))
+
+
+def render_excel(rows, summary, fileobj, title=''):
+    """
+    Write report rows as an .xlsx workbook to a binary file object.
+    Uses openpyxl's write-only mode, which streams rows to disk instead
+    of keeping every cell in memory.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise RuntimeError("Excel reports require openpyxl (pip install openpyxl)")
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Attendance')
+    sheet.append(REPORT_HEADER)
+    for row in rows:
+        sheet.append(row)
+    for row in summary_rows(summary):
+        sheet.append(row)
+    workbook.save(fileobj)
+
+
+def render_pdf(rows, summary, fileobj, title=''):
+    """Write report rows as a paginated PDF table to a binary file object"""
+    writer = PDFTableWriter(
+        fileobj,
+        list(zip(REPORT_HEADER, PDF_COLUMN_WIDTHS)),
+        title=title
+    )
+    for row in rows:
+        writer.add_row(row)
+    for row in summary_rows(summary):
+        writer.add_line('  '.join(str(value) for value in row))
+    writer.close()
+
+
+# format -> (file extension, content type, renderer)
+REPORT_FORMATS = {
+    'csv': ('csv', 'text/csv', render_csv),
+    'excel': (
+        'xlsx',
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        render_excel
+    ),
+    'pdf': ('pdf', 'application/pdf', render_pdf),
+}
+
+
+def write_report(queryset, report_format, fileobj, title='', progress=None):
+    """
+    Render the attendance queryset in the given format to a binary file
+    object, reading rows in chunks. `progress`, if given, is called with
+    the number of rows written so far.
+    """
+    _, _, render = REPORT_FORMATS[report_format]
+    summary = Counter()
+    rows = _track_progress(report_rows(queryset, summary), progress)
+    render(rows, summary, fileobj, title=title)
@@ -0,0 +1,176 @@
+"""
+Database-backed queue for rendering reports outside the request cycle.
+
+GenerateReportView enqueues an AttendanceReport row with status 'queued';
+`manage.py run_report_worker` claims queued rows, renders them into
+MEDIA_ROOT/attendance_reports/ and records progress on the row.
+"""
+import logging
+import tempfile
+from datetime import timedelta
+from django.core.files import File
+from django.db import connections, router, transaction
+from django.db.models import Q
+from django.utils import timezone
+from attendance.result_cache import scope_courses
+from .exports import REPORT_FORMATS, report_queryset, write_report
+from .models import AttendanceReport
+
+logger = logging.getLogger(__name__)
+
+# A running job whose row hasn't been touched for this long is assumed to
+# belong to a dead worker and is picked up again
+STALE_AFTER = timedelta(minutes=10)
+
+
+def enqueue_report(user, course_id, start_date, end_date, report_type, report_format):
+    """Create a queued report row for the worker to render"""
+    return AttendanceReport.objects.create(
+        generated_by=user,
+        course_id=course_id,
+        start_date=start_date,
+        end_date=end_date,
+        report_type=report_type,
+        format=report_format,
+        status='queued',
+    )
+
+
+def find_rendered_report(user, course_id, start_date, end_date, report_format, data_version):
+    """
+    Return a completed report with the same parameters and visibility
+    scope that was rendered from the current attendance data, if any
+    """
+    queryset = AttendanceReport.objects.filter(
+        status='completed',
+        course_id=course_id,
+        start_date=start_date,
+        end_date=end_date,
+        format=report_format,
+        data_version=data_version,
+    ).exclude(file_path='').exclude(file_path__isnull=True)
+
+    if user.role == 'admin':
+        queryset = queryset.filter(generated_by__role='admin')
+    else:
+        queryset = queryset.filter(generated_by=user)
+
+    for report in queryset.order_by('-completed_at')[:5]:
+        if report.file_path.storage.exists(report.file_path.name):
+            return report
+    return None
+
+
+def _claimable():
+    stale = timezone.now() - STALE_AFTER
+    return Q(status='queued') | Q(status='running', updated_at__lt=stale)
+
+
+def _claim_skip_locked():
+    """
+    Claim with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers
+    pass over each other's rows instead of racing for the same one
+    """
+    with transaction.atomic():
+        pk = (
+            AttendanceReport.objects.filter(_claimable())
+            .order_by('created_at', 'id')
+            .select_for_update(skip_locked=True)
+            .values_list('pk', flat=True)
+            .first()
+        )
+        if pk is None:
+            return None
+        now = timezone.now()
+        AttendanceReport.objects.filter(pk=pk).update(
+            status='running',
+            started_at=now,
+            updated_at=now,
+            rows_processed=0,
+            error='',
+        )
+    return AttendanceReport.objects.select_related('generated_by').get(pk=pk)
+
+
+def claim_next_report():
+    """
+    Atomically move the oldest claimable report to 'running' and return
+    it, or return None when the queue is empty. Safe to call from several
+    worker processes at once: only one UPDATE can win each row.
+    """
+    database = router.db_for_write(AttendanceReport)
+    if connections[database].features.has_select_for_update_skip_locked:
+        return _claim_skip_locked()
+    
+    candidates = (
+        AttendanceReport.objects.filter(_claimable())
+        .order_by('created_at', 'id')
+        .values_list('pk', flat=True)[:10]
+    )
+    for pk in candidates:
+        now = timezone.now()
+        claimed = AttendanceReport.objects.filter(_claimable(), pk=pk).update(
+            status='running',
+            started_at=now,
+            updated_at=now,
+            rows_processed=0,
+            error='',
+        )
+        if claimed:
+            return AttendanceReport.objects.select_related('generated_by').get(pk=pk)
+    return None
+
+
+def _record_progress(report_id, rows_processed):
+    AttendanceReport.objects.filter(pk=report_id).update(
+        rows_processed=rows_processed,
+        updated_at=timezone.now(),
+    )
+
+
+def run_report(report):
+    """Render a claimed report to its file and mark it completed or failed"""
+    try:
+        if report.generated_by is None:
+            raise ValueError("The user who requested this report no longer exists.")
+
+        extension, _, _ = REPORT_FORMATS[report.format]
+        report.data_version = scope_courses(
+            report.generated_by, report.course_id
+        ).data_version()
+        queryset = report_queryset(
+            report.start_date,
+            report.end_date,
+            report.course_id,
+            report.generated_by,
+        )
+        total_rows = queryset.count()
+        AttendanceReport.objects.filter(pk=report.pk).update(total_rows=total_rows)
+
+        filename = (
+            f"attendance_report_{report.start_date}_{report.end_date}_{report.pk}.{extension}"
+        )
+        with tempfile.TemporaryFile() as tmp:
+            write_report(
+                queryset, report.format, tmp,
+                title=str(report),
+                progress=lambda rows: _record_progress(report.pk, rows)
+            )
+            tmp.seek(0)
+            report.file_path.save(filename, File(tmp), save=False)
+
+        report.status = 'completed'
+        report.total_rows = total_rows
+        report.rows_processed = total_rows
+        report.completed_at = timezone.now()
+        report.save(update_fields=[
+            'file_path', 'status', 'total_rows', 'rows_processed',
+            'completed_at', 'updated_at', 'data_version',
+        ])
+    except Exception as exc:
+        logger.exception("Report %s failed", report.pk)
+        report.status = 'failed'
+        report.error = str(exc)
+        report.completed_at = timezone.now()
+        report.save(update_fields=['status', 'error', 'completed_at', 'updated_at'])
+    return report
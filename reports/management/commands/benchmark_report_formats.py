@@ -0,0 +1,84 @@
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from collections import Counter
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from reports.exports import REPORT_FORMATS
+
+
+def synthetic_rows(count, summary):
+    """Rows shaped like reports.exports.report_rows(), without a database"""
+    statuses = [('present', 'Present'), ('absent', 'Absent'),
+                ('late', 'Late'), ('excused', 'Excused')]
+    start = date(2025, 1, 1)
+    for i in range(count):
+        status, display = statuses[i % 7 % 4]
+        summary[status] += 1
+        yield [
+            (start + timedelta(days=i // 500)).strftime('%Y-%m-%d'),
+            f'CRS{i % 40:03d}',
+            f'Course number {i % 40}',
+            f'student{i % 5000:05d}',
+            f'Student {i % 5000}',
+            display,
+            'Arrived after roll call' if status == 'late' else '',
+            'Class Teacher'
+        ]
+
+
+def _rss_kb():
+    with open('/proc/self/status') as status_file:
+        for line in status_file:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _run(report_format, rows, results):
+    _, _, render = REPORT_FORMATS[report_format]
+    baseline = _rss_kb()
+    summary = Counter()
+    started = time.perf_counter()
+    with tempfile.TemporaryFile() as tmp:
+        render(synthetic_rows(rows, summary), summary, tmp, title='Benchmark')
+        size = tmp.tell()
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put((report_format, elapsed, size, baseline, peak))
+
+
+class Command(BaseCommand):
+    help = "Measure rows/sec and peak memory of each report format on synthetic rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500000)
+        parser.add_argument(
+            '--formats',
+            nargs='+',
+            choices=list(REPORT_FORMATS),
+            default=list(REPORT_FORMATS),
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        # Each format runs in its own process so peak RSS is not shared
+        context = multiprocessing.get_context('fork' if os.name == 'posix' else 'spawn')
+        results = context.Queue()
+
+        self.stdout.write(f"Rendering {rows} synthetic rows per format")
+        self.stdout.write(
+            f"{'format':<8}{'seconds':>10}{'rows/sec':>12}{'output MB':>12}"
+            f"{'start RSS MB':>14}{'peak RSS MB':>13}"
+        )
+        for report_format in options['formats']:
+            process = context.Process(target=_run, args=(report_format, rows, results))
+            process.start()
+            name, elapsed, size, baseline, peak = results.get()
+            process.join()
+            self.stdout.write(
+                f"{name:<8}{elapsed:>10.2f}{rows / elapsed:>12,.0f}{size / 1e6:>12.1f}"
+                f"{baseline / 1024:>14.1f}{peak / 1024:>13.1f}"
+            )
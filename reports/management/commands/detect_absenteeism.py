@@ -0,0 +1,75 @@
+import csv
+import time
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from reports.absenteeism import (
+    DEFAULT_MIN_STREAK,
+    DEFAULT_RATE_DROP,
+    DEFAULT_WINDOW,
+    absenteeism_queryset,
+    default_period,
+    detect_absenteeism,
+    with_names,
+)
+
+CSV_FIELDS = [
+    'username', 'student_name', 'course_code', 'sessions', 'attendance_rate',
+    'longest_absence_streak', 'streak_start', 'streak_end',
+    'current_absence_streak', 'recent_rate', 'previous_rate', 'reasons',
+]
+
+
+def _date(value):
+    return date.fromisoformat(value)
+
+
+class Command(BaseCommand):
+    help = "Find students with consecutive absences or a falling attendance rate"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-date', type=_date, help="YYYY-MM-DD (default: a year before --end-date)")
+        parser.add_argument('--end-date', type=_date, help="YYYY-MM-DD (default: today)")
+        parser.add_argument('--course', type=int, help="Only look at this course id")
+        parser.add_argument('--min-streak', type=int, default=DEFAULT_MIN_STREAK)
+        parser.add_argument('--window', type=int, default=DEFAULT_WINDOW)
+        parser.add_argument('--rate-drop', type=float, default=DEFAULT_RATE_DROP)
+        parser.add_argument('--csv', metavar='PATH', help="Write flagged students to a CSV file")
+
+    def handle(self, *args, **options):
+        default_start, default_end = default_period()
+        end_date = options['end_date'] or default_end
+        start_date = options['start_date'] or end_date - (default_end - default_start)
+        if start_date > end_date:
+            raise CommandError("--end-date must be after --start-date")
+        if options['min_streak'] < 1 or options['window'] < 1:
+            raise CommandError("--min-streak and --window must be at least 1")
+
+        started = time.perf_counter()
+        results = with_names(detect_absenteeism(
+            absenteeism_queryset(start_date, end_date, options['course']),
+            min_streak=options['min_streak'],
+            window=options['window'],
+            rate_drop=options['rate_drop'],
+        ))
+        elapsed = time.perf_counter() - started
+
+        if options['csv']:
+            with open(options['csv'], 'w', newline='') as csv_file:
+                writer = csv.DictWriter(csv_file, CSV_FIELDS, extrasaction='ignore')
+                writer.writeheader()
+                for result in results:
+                    writer.writerow(dict(result, reasons=' '.join(result['reasons'])))
+        else:
+            for result in results:
+                self.stdout.write(
+                    f"{result['username']} {result['course_code']}: "
+                    f"{', '.join(result['reasons'])} "
+                    f"(longest streak {result['longest_absence_streak']}, "
+                    f"rate {result['attendance_rate']}%, "
+                    f"recent {result['recent_rate']}% vs {result['previous_rate']}%)"
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(results)} students flagged between {start_date} and {end_date} "
+            f"in {elapsed:.1f}s"
+        ))
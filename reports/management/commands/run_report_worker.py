@@ -0,0 +1,47 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from reports.jobs import claim_next_report, run_report
+
+
+class Command(BaseCommand):
+    help = "Render queued attendance reports in the background"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="Process every queued report, then exit instead of polling",
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help="Seconds to wait between checks of an empty queue (default: 2)",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Report worker started")
+        try:
+            while True:
+                close_old_connections()
+                report = claim_next_report()
+                if report is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                self.stdout.write(f"Rendering report {report.pk} ({report.format})")
+                report = run_report(report)
+                if report.status == 'completed':
+                    self.stdout.write(self.style.SUCCESS(
+                        f"Report {report.pk} completed: {report.total_rows} rows"
+                    ))
+                else:
+                    self.stdout.write(self.style.ERROR(
+                        f"Report {report.pk} failed: {report.error}"
+                    ))
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write("Report worker stopped")
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_existing_reports_completed(apps, schema_editor):
+    # Rows created before report jobs existed were never meant to be
+    # picked up by the worker
+    AttendanceReport = apps.get_model('reports', 'AttendanceReport')
+    AttendanceReport.objects.using(schema_editor.connection.alias).update(status='completed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_attendance_keyset_index'),
+        ('reports', '0002_rename_attendacereport_attendancereport'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancereport',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attendancereport',
+            name='error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='attendancereport',
+            name='format',
+            field=models.CharField(choices=[('csv', 'CSV'), ('excel', 'Excel'), ('pdf', 'PDF')], default='csv', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='attendancereport',
+            name='rows_processed',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='attendancereport',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attendancereport',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', help_text='Progress of the background job rendering this report', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='attendancereport',
+            name='total_rows',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attendancereport',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='attendancereport',
+            index=models.Index(fields=['status', 'created_at'], name='reports_att_status_249fba_idx'),
+        ),
+        migrations.RunPython(mark_existing_reports_completed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_report_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancereport',
+            name='data_version',
+            field=models.CharField(blank=True, default='', help_text='Attendance data version the file was rendered from; lets identical requests reuse it', max_length=64),
+        ),
+    ]
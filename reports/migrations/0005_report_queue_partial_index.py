@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0008_archived_attendance'),
+        ('reports', '0004_report_data_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='attendancereport',
+            name='reports_att_status_249fba_idx',
+        ),
+        migrations.AddIndex(
+            model_name='attendancereport',
+            index=models.Index(condition=models.Q(('status__in', ['queued', 'running'])), fields=['created_at', 'id'], name='report_queue_idx'),
+        ),
+    ]
@@ -12,6 +12,19 @@ class AttendanceReport(models.Model):
         ('custom', 'Custom Range Report'),
     ]
 
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('excel', 'Excel'),
+        ('pdf', 'PDF'),
+    ]
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
     generated_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -41,16 +54,53 @@ class AttendanceReport(models.Model):
         null=True,
         help_text="Path to the generated report file"
     )
+    format = models.CharField(
+        max_length=10,
+        choices=FORMAT_CHOICES,
+        default='csv',
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='queued',
+        help_text="Progress of the background job rendering this report"
+    )
+    rows_processed = models.PositiveIntegerField(default=0)
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    data_version = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        help_text="Attendance data version the file was rendered from; lets identical requests reuse it"
+    )
 
     class Meta:
         ordering = ['created_at']
         verbose_name = "Attendance Report"
         verbose_name_plural = "Attendance Reports"
+        indexes = [
+            # Worker lookup of the next queued job; partial, so it only
+            # holds unfinished jobs (ignored on backends without support)
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='report_queue_idx'
+            ),
+        ]
 
     def __str__(self):
         course_name =  self.course.code if self.course else 'All Courses'
         return f'{self.get_report_type_display()}: {course_name} ({self.start_date} to {self.end_date})'
-    
-    
-    
 
+    @property
+    def progress(self):
+        """Percentage of rows rendered so far"""
+        if self.status == 'completed':
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(100, int(self.rows_processed * 100 / self.total_rows))
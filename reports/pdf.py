@@ -0,0 +1,129 @@
+"""
+Minimal PDF writer for tabular reports.
+
+Pages are written to the output file as soon as they fill up, so memory
+use depends on the page size rather than the number of rows. Only the
+built-in Courier font is used, which needs no embedding and gives fixed
+width columns.
+"""
+
+
+class PDFTableWriter:
+    """
+    Write rows of text as a fixed-width table across landscape A4 pages.
+
+    `columns` is a list of (title, width_in_characters) pairs.
+    Call add_row() for each row and add_line() for free text, then close().
+    """
+    page_width = 842
+    page_height = 595
+    margin = 36
+
+    def __init__(self, fileobj, columns, title='', font_size=7):
+        self.fileobj = fileobj
+        self.columns = columns
+        self.title = title
+        self.font_size = font_size
+        self.leading = font_size + 2
+        usable_height = self.page_height - 2 * self.margin
+        # Two lines of every page are taken by the title and column header
+        self.rows_per_page = int(usable_height // self.leading) - 2
+
+        self._position = 0
+        # Object 1 is the catalog, 2 the page tree and 3 the font; pages
+        # and their content streams are numbered from 4 upwards
+        self._offsets = {}
+        self._next_object = 4
+        self._page_objects = []
+        self._lines = []
+
+        self._write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def _write(self, data):
+        self.fileobj.write(data)
+        self._position += len(data)
+
+    def _write_object(self, number, body):
+        self._offsets[number] = self._position
+        self._write(b'%d 0 obj\n' % number + body + b'\nendobj\n')
+
+    def _format_row(self, values):
+        cells = []
+        for (_, width), value in zip(self.columns, values):
+            text = '' if value is None else str(value).replace('\n', ' ')
+            if len(text) > width:
+                text = text[:width - 1] + '~'
+            cells.append(text.ljust(width))
+        return '  '.join(cells).rstrip()
+
+    @staticmethod
+    def _escape(text):
+        data = text.encode('latin-1', 'replace')
+        return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+    def add_row(self, values):
+        self.add_line(self._format_row(values))
+
+    def add_line(self, text=''):
+        self._lines.append(text)
+        if len(self._lines) >= self.rows_per_page:
+            self._flush_page()
+
+    def _flush_page(self):
+        page_number = len(self._page_objects) + 1
+        header = [
+            f"{self.title}    Page {page_number}",
+            self._format_row([title for title, _ in self.columns]),
+        ]
+        top = self.page_height - self.margin - self.font_size
+
+        stream = [b'BT /F1 %d Tf %d TL %d %d Td' % (
+            self.font_size, self.leading, self.margin, top
+        )]
+        for line in header + self._lines:
+            stream.append(b'(' + self._escape(line) + b') Tj T*')
+        stream.append(b'ET')
+        content = b'\n'.join(stream)
+
+        page_number_obj = self._next_object
+        content_obj = self._next_object + 1
+        self._next_object += 2
+
+        self._write_object(
+            content_obj,
+            b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream'
+        )
+        self._write_object(
+            page_number_obj,
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % (
+                self.page_width, self.page_height, content_obj
+            )
+        )
+        self._page_objects.append(page_number_obj)
+        self._lines = []
+
+    def close(self):
+        if self._lines or not self._page_objects:
+            self._flush_page()
+
+        kids = b' '.join(b'%d 0 R' % number for number in self._page_objects)
+        self._write_object(
+            2, b'<< /Type /Pages /Kids [' + kids + b'] /Count %d >>' % len(self._page_objects)
+        )
+        self._write_object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+        self._write_object(
+            3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>'
+        )
+
+        xref_position = self._position
+        count = self._next_object
+        xref = [b'xref\n0 %d\n' % count, b'0000000000 65535 f \n']
+        for number in range(1, count):
+            xref.append(b'%010d 00000 n \n' % self._offsets[number])
+        self._write(b''.join(xref))
+        self._write(
+            b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+                count, xref_position
+            )
+        )
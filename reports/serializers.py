@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from django.urls import reverse
+from .absenteeism import DEFAULT_MIN_STREAK, DEFAULT_RATE_DROP, DEFAULT_WINDOW, default_period
 from .models import AttendanceReport
 from attendance.serializers import CourseListSerializer
 
@@ -17,13 +19,31 @@ class AttendanceReportSerializer(serializers.ModelSerializer):
         source='get_report_type_display', 
         read_only=True
     )
+    status_display = serializers.CharField(
+        source='get_status_display',
+        read_only=True
+    )
+    progress = serializers.IntegerField(read_only=True)
+    download_url = serializers.SerializerMethodField()
     
     class Meta:
         model = AttendanceReport
         fields = ['id', 'generated_by', 'generated_by_name', 'course', 
                   'course_detail', 'report_type', 'report_type_display',
-                  'start_date', 'end_date', 'created_at', 'file_path']
-        read_only_fields = ['id', 'created_at', 'file_path']
+                  'start_date', 'end_date', 'created_at', 'file_path',
+                  'format', 'status', 'status_display', 'progress',
+                  'rows_processed', 'total_rows', 'error', 'started_at',
+                  'completed_at', 'download_url']
+        read_only_fields = ['id', 'created_at', 'file_path', 'status',
+                            'rows_processed', 'total_rows', 'error',
+                            'started_at', 'completed_at']
+    
+    def get_download_url(self, obj):
+        if obj.status != 'completed' or not obj.file_path:
+            return None
+        url = reverse('reports:report_download', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
     
     def validate(self, attrs):
         """Ensure start_date is before end_date"""
@@ -54,6 +74,68 @@ class ReportGenerateSerializer(serializers.Serializer):
         choices=['csv', 'excel', 'pdf'],
         default='csv'
     )
+    mode = serializers.ChoiceField(
+        choices=['download', 'job'],
+        default='download',
+        help_text="'download' renders the report in the response; 'job' queues it for the report worker"
+    )
+    
+    def validate(self, attrs):
+        """Validate date range"""
+        if attrs['start_date'] > attrs['end_date']:
+            raise serializers.ValidationError({
+                "end_date": "End date must be after start date."
+            })
+        return attrs
+
+class AbsenteeismQuerySerializer(serializers.Serializer):
+    """
+    Query parameters for the chronic-absenteeism detector; the period
+    defaults to the year up to today
+    """
+    course_id = serializers.IntegerField(required=False, allow_null=True)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    min_streak = serializers.IntegerField(
+        min_value=1, default=DEFAULT_MIN_STREAK,
+        help_text="Flag runs of at least this many consecutive absences"
+    )
+    window = serializers.IntegerField(
+        min_value=1, max_value=365, default=DEFAULT_WINDOW,
+        help_text="Sessions per rolling window when comparing attendance rates"
+    )
+    rate_drop = serializers.FloatField(
+        min_value=0, max_value=100, default=DEFAULT_RATE_DROP,
+        help_text="Flag a fall of at least this many points between the last two windows"
+    )
+    
+    def validate(self, attrs):
+        """Fill in the default period and validate the date range"""
+        default_start, default_end = default_period()
+        attrs.setdefault('end_date', default_end)
+        attrs.setdefault('start_date', attrs['end_date'] - (default_end - default_start))
+        if attrs['start_date'] > attrs['end_date']:
+            raise serializers.ValidationError({
+                "end_date": "End date must be after start date."
+            })
+        return attrs
+
+
+class TrendQuerySerializer(serializers.Serializer):
+    """
+    Query parameters for the attendance trend endpoint
+    """
+    start_date = serializers.DateField(required=True)
+    end_date = serializers.DateField(required=True)
+    bucket = serializers.ChoiceField(
+        choices=['day', 'week', 'month'],
+        default='month'
+    )
+    course_id = serializers.IntegerField(required=False, allow_null=True)
+    teacher_id = serializers.IntegerField(
+        required=False, allow_null=True,
+        help_text="Only courses taught by this teacher (admins only)"
+    )
     
     def validate(self, attrs):
         """Validate date range"""
@@ -61,4 +143,4 @@ class ReportGenerateSerializer(serializers.Serializer):
             raise serializers.ValidationError({
                 "end_date": "End date must be after start date."
             })
-        return attrs
\ No newline at end of file
+        return attrs
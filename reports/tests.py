@@ -1,3 +1,592 @@
-from django.test import TestCase
+import csv
+import io
+import shutil
+import tempfile
+import threading
+from collections import Counter
+from datetime import date, timedelta
+from unittest import skipUnless
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.utils import timezone
+from rest_framework.test import APIClient
+from attendance.archive import ArchiveChain, archive_year
+from attendance.models import Attendance, Course
+from attendance.replica import has_recent_write, replica_health
+from attendance.result_cache import get_result_cache
+from .absenteeism import absenteeism_queryset, analyse_sessions, detect_absenteeism
+from .exports import REPORT_HEADER, csv_chunks, report_queryset, report_rows
+from .jobs import STALE_AFTER, _claim_skip_locked, claim_next_report, enqueue_report, run_report
+from .models import AttendanceReport
+from .pdf import PDFTableWriter
 
-# Create your tests here.
+try:
+    from openpyxl import load_workbook
+except ImportError:
+    load_workbook = None
+
+User = get_user_model()
+
+
+class SummaryVersionTests(TestCase):
+    """The data version read for the ETag is reused by the result cache"""
+
+    def setUp(self):
+        get_result_cache().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            username='admin', email='admin@test.com', role='admin'
+        ))
+
+    def test_cached_summary_reads_the_version_once(self):
+        url = '/api/reports/monthly-summary/?year=2025&month=1'
+        self.assertEqual(self.client.get(url).status_code, 200)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_summary_changes_after_a_write(self):
+        teacher = User.objects.create_user(username='teacher', email='teacher@test.com', role='teacher')
+        course = Course.objects.create(name='Mathematics', code='MATH101', teacher=teacher)
+        student = User.objects.create_user(username='student', email='student@test.com', role='student')
+        course.students.add(student)
+
+        url = '/api/reports/daily-summary/?date=2025-01-15'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        Attendance.objects.create(user=student, course=course, date=date(2025, 1, 15), status='absent')
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.data, response.data)
+
+
+class ReportJobTests(TestCase):
+    """Queued reports are claimed oldest first, rendered once and reused"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.teacher = User.objects.create_user(username='teacher', email='teacher@test.com', role='teacher')
+        self.course = Course.objects.create(name='Mathematics', code='MATH101', teacher=self.teacher)
+        self.student = User.objects.create_user(username='student', email='student@test.com', role='student')
+        self.course.students.add(self.student)
+        Attendance.objects.create(user=self.student, course=self.course, date=date(2025, 1, 15), status='present')
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def generate(self, mode='job', report_format='csv'):
+        return self.client.post('/api/reports/generate/', {
+            'course_id': self.course.pk, 'start_date': '2025-01-01', 'end_date': '2025-01-31',
+            'report_type': 'monthly', 'format': report_format, 'mode': mode,
+        }, format='json')
+
+    def enqueue(self, user=None):
+        return enqueue_report(
+            user or self.teacher, self.course.pk, date(2025, 1, 1), date(2025, 1, 31), 'monthly', 'csv'
+        )
+
+    def test_enqueue_render_and_reuse(self):
+        response = self.generate()
+        self.assertEqual(response.status_code, 202)
+        report = AttendanceReport.objects.get(pk=response.data['id'])
+        self.assertEqual((report.status, report.generated_by, report.course), ('queued', self.teacher, self.course))
+
+        call_command('run_report_worker', '--once', stdout=io.StringIO())
+        report.refresh_from_db()
+        self.assertEqual((report.status, report.total_rows, report.progress), ('completed', 1, 100))
+        self.assertEqual(report.data_version, Course.objects.filter(pk=self.course.pk).data_version())
+        with report.file_path.open('rb') as rendered:
+            self.assertIn(b'student', rendered.read())
+
+        # The same request is answered from the rendered file, as a job or a download
+        response = self.generate()
+        self.assertEqual((response.status_code, response.data['id']), (200, report.pk))
+        response = self.generate(mode='download')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'student', b''.join(response.streaming_content))
+        self.assertEqual(AttendanceReport.objects.count(), 1)
+
+        # Not once the attendance has changed, nor for another user
+        Attendance.objects.create(user=self.student, course=self.course, date=date(2025, 1, 16), status='absent')
+        self.assertEqual(self.generate().status_code, 202)
+        admin = User.objects.create_user(username='admin', email='admin@test.com', role='admin')
+        self.client.force_authenticate(admin)
+        self.assertEqual(self.generate().status_code, 202)
+
+    def test_claims_oldest_first_and_each_once(self):
+        for claim in (claim_next_report, _claim_skip_locked):
+            with self.subTest(claim=claim.__name__):
+                AttendanceReport.objects.all().delete()
+                first, second = self.enqueue(), self.enqueue()
+                self.assertEqual(claim().pk, first.pk)
+                self.assertEqual(claim().pk, second.pk)
+                self.assertIsNone(claim())
+
+                first.refresh_from_db()
+                self.assertEqual(first.status, 'running')
+                self.assertIsNotNone(first.started_at)
+
+    def test_stale_running_report_is_claimed_again(self):
+        report = self.enqueue()
+        self.assertEqual(claim_next_report().pk, report.pk)
+        self.assertIsNone(claim_next_report())
+
+        AttendanceReport.objects.filter(pk=report.pk).update(
+            updated_at=timezone.now() - STALE_AFTER - timedelta(seconds=1)
+        )
+        self.assertEqual(claim_next_report().pk, report.pk)
+
+    def test_failure_is_recorded(self):
+        admin = User.objects.create_user(username='admin', email='admin@test.com', role='admin')
+        self.enqueue(admin)
+        admin.delete()
+        with self.assertLogs('reports.jobs', 'ERROR'):
+            report = run_report(claim_next_report())
+        report.refresh_from_db()
+        self.assertEqual(report.status, 'failed')
+        self.assertIn('no longer exists', report.error)
+        self.assertIsNotNone(report.completed_at)
+        self.assertIsNone(claim_next_report())
+
+
+class ReportDownloadTests(TestCase):
+    """Downloaded reports hold the records in report order and a summary"""
+
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username='teacher', email='teacher@test.com', role='teacher', first_name='Tess', last_name='Baker'
+        )
+        self.course = Course.objects.create(name='Mathematics', code='MATH101', teacher=self.teacher)
+        other_teacher = User.objects.create_user(username='other', email='other@test.com', role='teacher')
+        self.other = Course.objects.create(name='Art', code='ART101', teacher=other_teacher)
+        students = [
+            User.objects.create_user(username=name, email=f'{name}@test.com', role='student', first_name=first)
+            for name, first in (('zed', 'Zed'), ('amy', ''))
+        ]
+        for course in (self.course, self.other):
+            course.students.set(students)
+        for day, status in ((date(2025, 1, 16), 'absent'), (date(2025, 1, 15), 'present')):
+            for student in students:
+                Attendance.objects.create(
+                    user=student, course=self.course, date=day, status=status, marked_by=self.teacher,
+                    remarks='Late bus, "again"\nsecond line' if status == 'absent' and student.username == 'zed' else '',
+                )
+        Attendance.objects.create(user=students[0], course=self.other, date=date(2025, 1, 15), status='late')
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def download(self, report_format):
+        response = self.client.post('/api/reports/generate/', {
+            'start_date': '2025-01-01', 'end_date': '2025-01-31',
+            'report_type': 'monthly', 'format': report_format,
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    # The teacher's own course only, by date then username
+    EXPECTED_ROWS = [
+        ['2025-01-15', 'MATH101', 'Mathematics', 'amy', 'amy', 'Present', '', 'Tess Baker'],
+        ['2025-01-15', 'MATH101', 'Mathematics', 'zed', 'Zed', 'Present', '', 'Tess Baker'],
+        ['2025-01-16', 'MATH101', 'Mathematics', 'amy', 'amy', 'Absent', '', 'Tess Baker'],
+        ['2025-01-16', 'MATH101', 'Mathematics', 'zed', 'Zed', 'Absent', 'Late bus, "again"\nsecond line', 'Tess Baker'],
+    ]
+    EXPECTED_SUMMARY = [
+        ['SUMMARY'], ['Total Records', 4], ['Present', 2], ['Absent', 2], ['Late', 0], ['Excused', 0],
+    ]
+
+    def test_csv_is_streamed(self):
+        response, content = self.download('csv')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(
+            response['Content-Disposition'], 'attachment; filename="attendance_report_2025-01-01_2025-01-31.csv"'
+        )
+
+        rows = list(csv.reader(io.StringIO(content.decode('utf-8'))))
+        self.assertEqual(rows[0], REPORT_HEADER)
+        self.assertEqual(rows[1:5], self.EXPECTED_ROWS)
+        self.assertEqual(rows[5:], [[]] + [[str(value) for value in row] for row in self.EXPECTED_SUMMARY])
+
+    def test_csv_chunks(self):
+        summary = Counter()
+        chunks = list(csv_chunks(report_rows(report_queryset(
+            date(2025, 1, 1), date(2025, 1, 31), user=self.teacher
+        ), summary), summary, rows_per_chunk=2))
+        # Header and two rows, two rows, then the summary
+        self.assertEqual([chunk.count('\r\n') for chunk in chunks], [3, 2, 7])
+        self.assertEqual(summary, Counter(present=2, absent=2))
+
+    @skipUnless(load_workbook, "Excel reports require openpyxl")
+    def test_excel(self):
+        response, content = self.download('excel')
+        self.assertEqual(
+            response['Content-Type'], 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+        self.assertTrue(response['Content-Disposition'].endswith('.xlsx"'))
+
+        sheet = load_workbook(io.BytesIO(content), read_only=True)['Attendance']
+        rows = [[value if value is not None else '' for value in row] for row in sheet.iter_rows(values_only=True)]
+        self.assertEqual(rows[0], REPORT_HEADER)
+        self.assertEqual([row[:8] for row in rows[1:5]], self.EXPECTED_ROWS)
+        self.assertEqual([[value for value in row if value != ''] for row in rows[5:]], [[]] + self.EXPECTED_SUMMARY)
+
+    def test_pdf(self):
+        response, content = self.download('pdf')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(content.startswith(b'%PDF-1.4'))
+        self.assertTrue(content.endswith(b'%%EOF\n'))
+        self.assertPDFIndexed(content)
+        self.assertIn(b'(2025-01-16  MATH101      Mathematics             zed', content)
+        self.assertIn(b'Total Records  4', content)
+
+    def test_pdf_pages(self):
+        output = io.BytesIO()
+        writer = PDFTableWriter(output, [('Name', 6), ('Note', 10)], title='Long (report)')
+        for i in range(writer.rows_per_page * 2 + 1):
+            writer.add_row([f'row{i}', 'far too long a note'])
+        writer.close()
+        content = output.getvalue()
+
+        self.assertPDFIndexed(content)
+        self.assertIn(b'/Count 3', content)
+        self.assertEqual(content.count(b'Long \\(report\\)    Page'), 3)
+        # Values are cut to the column width
+        self.assertIn(b'(row0    far too l~) Tj', content)
+
+    def assertPDFIndexed(self, content):
+        """Every object in the cross-reference table starts at its offset"""
+        xref = int(content.rsplit(b'startxref\n', 1)[1].split()[0])
+        lines = content[xref:].split(b'\n')
+        count = int(lines[1].split()[1])
+        for number, entry in enumerate(lines[3:2 + count], start=1):
+            offset = int(entry.split()[0])
+            self.assertTrue(content[offset:].startswith(b'%d 0 obj' % number), number)
+
+
+@override_settings(ATTENDANCE_REPLICA_DATABASE='default')
+class ReportReplicaTests(TestCase):
+    """Report downloads read like the summaries; queued jobs are writes"""
+
+    def setUp(self):
+        cache.clear()
+        replica_health.reset()
+        self.teacher = User.objects.create_user(username='teacher', email='teacher@test.com', role='teacher')
+        self.course = Course.objects.create(name='Mathematics', code='MATH101', teacher=self.teacher)
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def generate(self, mode):
+        return self.client.post('/api/reports/generate/', {
+            'course_id': self.course.pk, 'start_date': '2025-01-01', 'end_date': '2025-01-31',
+            'report_type': 'monthly', 'format': 'csv', 'mode': mode,
+        }, format='json')
+
+    def test_download_is_a_read(self):
+        response = self.generate('download')
+        self.assertEqual(response.status_code, 200)
+        b''.join(response.streaming_content)
+        self.assertFalse(has_recent_write(self.teacher))
+
+    def test_queued_job_is_a_write(self):
+        self.assertEqual(self.generate('job').status_code, 202)
+        self.assertTrue(has_recent_write(self.teacher))
+
+    def test_queryset_is_pinned_to_the_replica(self):
+        student = User.objects.create_user(username='student', email='student@test.com', role='student')
+        Attendance.objects.create(user=student, course=self.course, date=date(2023, 1, 16), status='present')
+        archive_year(2023)
+
+        chain = report_queryset(date(2023, 1, 1), date(2025, 1, 31), using='replica')
+        self.assertIsInstance(chain, ArchiveChain)
+        self.assertEqual([part.db for part in chain.parts], ['replica', 'replica'])
+
+        with override_settings(ATTENDANCE_ARCHIVE_DATABASE='archive'):
+            chain = report_queryset(date(2023, 1, 1), date(2025, 1, 31), using='replica')
+            self.assertEqual([part.db for part in chain.parts], ['archive', 'replica'])
+
+
+@skipUnlessDBFeature('has_select_for_update_skip_locked')
+class ConcurrentReportClaimTests(TransactionTestCase):
+    """Workers claiming at the same time skip each other's rows"""
+
+    def test_workers_claim_different_reports(self):
+        admin = User.objects.create_user(username='admin', email='admin@test.com', role='admin')
+        queued = {
+            enqueue_report(admin, None, date(2025, 1, 1), date(2025, 1, 31), 'monthly', 'csv').pk
+            for _ in range(4)
+        }
+        barrier = threading.Barrier(4)
+        claimed = []
+
+        def work():
+            try:
+                barrier.wait()
+                claimed.append(claim_next_report().pk)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(claimed), sorted(queued))
+
+
+class TrendTests(TestCase):
+    """Trend counts are bucketed by day, Monday-based week or month"""
+
+    def setUp(self):
+        get_result_cache().clear()
+        self.teacher = User.objects.create_user(username='teacher', email='teacher@test.com', role='teacher')
+        self.course = Course.objects.create(name='Mathematics', code='MATH101', teacher=self.teacher)
+        other_teacher = User.objects.create_user(username='other', email='other@test.com', role='teacher')
+        self.other = Course.objects.create(name='Art', code='ART101', teacher=other_teacher)
+        students = [
+            User.objects.create_user(username=f'student{i}', email=f'student{i}@test.com', role='student')
+            for i in range(2)
+        ]
+        # Sunday 5 January, Monday 6, Tuesday 7 and Monday 3 February
+        for day, statuses in (
+            (date(2025, 1, 5), ('present', 'absent')),
+            (date(2025, 1, 6), ('present', 'present')),
+            (date(2025, 1, 7), ('late', 'excused')),
+            (date(2025, 2, 3), ('absent', 'present')),
+        ):
+            for student, status in zip(students, statuses):
+                Attendance.objects.create(user=student, course=self.course, date=day, status=status)
+        Attendance.objects.create(user=students[0], course=self.other, date=date(2025, 1, 6), status='absent')
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def trend(self, bucket, **params):
+        response = self.client.get('/api/reports/trend/', {
+            'start_date': '2025-01-01', 'end_date': '2025-02-28', 'bucket': bucket, **params,
+        })
+        self.assertEqual(response.status_code, 200)
+        return [
+            (row['period'], row['total'], row['present'], row['days'], row['attendance_rate'])
+            for row in response.data['results']
+        ]
+
+    def test_buckets(self):
+        self.assertEqual(self.trend('day'), [
+            (date(2025, 1, 5), 2, 1, 1, 50.0),
+            (date(2025, 1, 6), 2, 2, 1, 100.0),
+            (date(2025, 1, 7), 2, 0, 1, 0),
+            (date(2025, 2, 3), 2, 1, 1, 50.0),
+        ])
+        self.assertEqual(self.trend('week'), [
+            (date(2024, 12, 30), 2, 1, 1, 50.0),
+            (date(2025, 1, 6), 4, 2, 2, 50.0),
+            (date(2025, 2, 3), 2, 1, 1, 50.0),
+        ])
+        self.assertEqual(self.trend('month'), [
+            (date(2025, 1, 1), 6, 3, 3, 50.0),
+            (date(2025, 2, 1), 2, 1, 1, 50.0),
+        ])
+
+    def test_status_columns_and_range(self):
+        response = self.client.get('/api/reports/trend/', {
+            'start_date': '2025-01-06', 'end_date': '2025-01-31', 'bucket': 'month',
+        })
+        self.assertEqual(
+            {key: response.data['results'][0][key] for key in ('present', 'absent', 'late', 'excused')},
+            {'present': 2, 'absent': 0, 'late': 1, 'excused': 1}
+        )
+
+    def test_scope(self):
+        admin = User.objects.create_user(username='admin', email='admin@test.com', role='admin')
+        self.client.force_authenticate(admin)
+        self.assertEqual(self.trend('day')[1], (date(2025, 1, 6), 3, 2, 1, 66.67))
+        self.assertEqual(
+            self.trend('day', teacher_id=self.teacher.pk),
+            self.trend('day', course_id=self.course.pk),
+        )
+
+        # Teachers always get their own courses
+        self.client.force_authenticate(self.teacher)
+        self.assertEqual(self.trend('month', teacher_id=self.other.teacher_id)[0][1], 6)
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.get('/api/reports/trend/', {
+            'start_date': '2025-01-01', 'end_date': '2025-02-28', 'bucket': 'year',
+        }).status_code, 400)
+        self.assertEqual(self.client.get('/api/reports/trend/', {
+            'start_date': '2025-03-01', 'end_date': '2025-02-28',
+        }).status_code, 400)
+
+        student = User.objects.get(username='student0')
+        self.client.force_authenticate(student)
+        self.assertEqual(self.client.get('/api/reports/trend/', {
+            'start_date': '2025-01-01', 'end_date': '2025-02-28',
+        }).status_code, 403)
+
+
+def analyse(sessions, **options):
+    dates = [date(2025, 1, 1 + day) for day in range(len(sessions))]
+    return analyse_sessions(sessions, dates, **options)
+
+
+class AbsenteeismThresholdTests(TestCase):
+    """Where analyse_sessions() starts and stops flagging a student"""
+
+    def test_streak_threshold_is_inclusive(self):
+        self.assertIsNone(analyse(b'PPAAP', min_streak=3))
+        result = analyse(b'PPAAAP', min_streak=3)
+        self.assertEqual(result['reasons'], ['consecutive_absences'])
+        self.assertEqual(result['longest_absence_streak'], 3)
+        self.assertEqual((result['streak_start'], result['streak_end']), (date(2025, 1, 3), date(2025, 1, 5)))
+
+    def test_excused_sessions_neither_break_nor_extend_a_streak(self):
+        self.assertIsNone(analyse(b'AEEAP', min_streak=3))
+        result = analyse(b'AEAEA', min_streak=3)
+        self.assertEqual(result['longest_absence_streak'], 3)
+        self.assertEqual(result['current_absence_streak'], 3)
+
+    def test_current_streak_ends_at_an_attended_session(self):
+        self.assertEqual(analyse(b'AAAPE', min_streak=3)['current_absence_streak'], 0)
+        self.assertEqual(analyse(b'PAAAE', min_streak=3)['current_absence_streak'], 3)
+
+    def test_rate_drop_threshold_is_inclusive(self):
+        # 100% over the previous window of five, then 80%
+        sessions = b'PPPPPAPPPP'
+        result = analyse(sessions, min_streak=10, window=5, rate_drop=20)
+        self.assertEqual(result['reasons'], ['falling_rate'])
+        self.assertEqual((result['previous_rate'], result['recent_rate']), (100.0, 80.0))
+        self.assertIsNone(analyse(sessions, min_streak=10, window=5, rate_drop=20.5))
+
+    def test_rate_needs_two_full_windows_of_counted_sessions(self):
+        # Excused sessions don't count towards a window
+        self.assertIsNone(analyse(b'PPPPEAAAAA', min_streak=10, window=5, rate_drop=20))
+        self.assertIsNotNone(analyse(b'PPPPPAAAAA', min_streak=10, window=5, rate_drop=20))
+
+    def test_students_are_analysed_per_course(self):
+        teacher = User.objects.create_user(username='teacher', email='teacher@test.com', role='teacher')
+        courses = [
+            Course.objects.create(name=code, code=code, teacher=teacher) for code in ('MATH101', 'ART101')
+        ]
+        student = User.objects.create_user(username='student', email='student@test.com', role='student')
+        # Five absences in a row, but only three of them in ART101
+        for day, course, status in (
+            (date(2025, 1, 6), courses[0], 'absent'),
+            (date(2025, 1, 7), courses[1], 'absent'),
+            (date(2025, 1, 8), courses[0], 'absent'),
+            (date(2025, 1, 9), courses[1], 'absent'),
+            (date(2025, 1, 10), courses[1], 'absent'),
+        ):
+            Attendance.objects.create(user=student, course=course, date=day, status=status)
+
+        queryset = absenteeism_queryset(date(2025, 1, 1), date(2025, 1, 31))
+        results = list(detect_absenteeism(queryset, min_streak=3))
+        self.assertEqual([(result['course_id'], result['sessions']) for result in results], [(courses[1].pk, 3)])
+
+
+class AbsenteeismNameTests(TestCase):
+    """Cached absenteeism results pick up renamed students and edited courses"""
+
+    def setUp(self):
+        get_result_cache().clear()
+        teacher = User.objects.create_user(username='teacher', email='teacher@test.com', role='teacher')
+        self.course = Course.objects.create(name='Mathematics', code='MATH101', teacher=teacher)
+        self.student = User.objects.create_user(username='student', email='student@test.com', role='student')
+        for day in range(6, 9):
+            Attendance.objects.create(
+                user=self.student, course=self.course, date=date(2025, 1, day), status='absent'
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(teacher)
+        self.url = '/api/reports/absenteeism/?start_date=2025-01-01&end_date=2025-01-31'
+
+    def flagged(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        return [(result['username'], result['student_name'], result['course_code']) for result in results]
+
+    def test_rename_and_course_edit(self):
+        self.assertEqual(self.flagged(), [('student', 'student', 'MATH101')])
+
+        self.student.first_name, self.student.last_name = 'Amy', 'Pond'
+        self.student.save()
+        self.assertEqual(self.flagged(), [('student', 'Amy Pond', 'MATH101')])
+
+        self.course.code = 'MATH102'
+        self.course.save()
+        self.assertEqual(self.flagged(), [('student', 'Amy Pond', 'MATH102')])
+
+
+class ArchivedReadTests(TestCase):
+    """Reports and the detector read archived years like live ones"""
+
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username='teacher', email='teacher@test.com', role='teacher'
+        )
+        # Codes and usernames sort the other way round from the ids
+        self.courses = [
+            Course.objects.create(name=name, code=code, teacher=self.teacher)
+            for name, code in (('Zoology', 'ZOO101'), ('Art', 'ART101'))
+        ]
+        self.students = [
+            User.objects.create_user(username=name, email=f'{name}@test.com', role='student')
+            for name in ('zed', 'amy')
+        ]
+        for course in self.courses:
+            course.students.set(self.students)
+
+    def mark(self, day, status, courses=None, students=None):
+        for course in courses or self.courses:
+            for student in students or self.students:
+                Attendance.objects.create(user=student, course=course, date=day, status=status)
+
+    def test_absence_streak_runs_across_the_archive_boundary(self):
+        student, course = self.students[0], self.courses[0]
+        for day in (date(2023, 12, 27), date(2023, 12, 28)):
+            self.mark(day, 'absent', [course], [student])
+        for day in (date(2024, 1, 3), date(2024, 1, 4)):
+            self.mark(day, 'absent', [course], [student])
+        self.mark(date(2024, 1, 5), 'present', [course], [student])
+        archive_year(2023)
+
+        queryset = absenteeism_queryset(date(2023, 12, 1), date(2024, 1, 31))
+        self.assertIsInstance(queryset, ArchiveChain)
+        results = list(detect_absenteeism(queryset, min_streak=4))
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['sessions'], 5)
+        self.assertEqual(results[0]['longest_absence_streak'], 4)
+        self.assertEqual(
+            (results[0]['streak_start'], results[0]['streak_end']),
+            (date(2023, 12, 27), date(2024, 1, 4))
+        )
+
+    def test_live_and_archived_export_rows_share_an_order(self):
+        archived_day, live_day = date(2023, 12, 28), date(2024, 1, 3)
+        self.mark(archived_day, 'present')
+        self.mark(live_day, 'present')
+        archive_year(2023)
+
+        rows = list(report_rows(report_queryset(archived_day, live_day), Counter()))
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(row[0], []).append((row[1], row[3]))
+        # By course code then username, as reports always were, in both parts
+        expected = [('ART101', 'amy'), ('ART101', 'zed'), ('ZOO101', 'amy'), ('ZOO101', 'zed')]
+        self.assertEqual(by_day, {'2023-12-28': expected, '2024-01-03': expected})
@@ -2,9 +2,12 @@ from django.urls import path
 from .views import (
     AttendanceReportListView,
     AttendanceReportDetailView,
+    AttendanceReportDownloadView,
     GenerateReportView,
     DailySummaryView,
     MonthlySummaryView,
+    AttendanceTrendView,
+    AbsenteeismView,
 )
 
 app_name = 'reports'
@@ -12,7 +15,10 @@ app_name = 'reports'
 urlpatterns = [
     path('reports/', AttendanceReportListView.as_view(), name='report_list'),
     path('reports/<int:pk>/', AttendanceReportDetailView.as_view(), name='report_detail'),
+    path('reports/<int:pk>/download/', AttendanceReportDownloadView.as_view(), name='report_download'),
     path('reports/generate/', GenerateReportView.as_view(), name='generate_report'),
     path('reports/daily-summary/', DailySummaryView.as_view(), name='daily_summary'),
     path('reports/monthly-summary/', MonthlySummaryView.as_view(), name='monthly_summary'),
+    path('reports/trend/', AttendanceTrendView.as_view(), name='attendance_trend'),
+    path('reports/absenteeism/', AbsenteeismView.as_view(), name='absenteeism'),
 ]
\ No newline at end of file
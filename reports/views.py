@@ -1,16 +1,28 @@
 from rest_framework import status, generics, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.http import HttpResponse
+from django.http import FileResponse, StreamingHttpResponse
 from django.db.models import Count, Q
+from django.utils import timezone
 from datetime import datetime
-import csv
+import os
+import tempfile
+from collections import Counter
+from .absenteeism import absenteeism_queryset, detect_absenteeism, with_names
+from .exports import REPORT_FORMATS, csv_chunks, report_rows, report_queryset, write_report
+from .jobs import enqueue_report, find_rendered_report
 from .models import AttendanceReport
-from .serializers import AttendanceReportSerializer, ReportGenerateSerializer
-from attendance.models import Attendance, Course
+from .serializers import (
+    AbsenteeismQuerySerializer, AttendanceReportSerializer, ReportGenerateSerializer,
+    TrendQuerySerializer
+)
+from attendance.conditional import ConditionalGetMixin
+from attendance.models import AttendanceRollup, Course
+from attendance.replica import ReplicaReadMixin, count_as_read, database_for_reads
+from attendance.result_cache import cached_result, scope_courses
 
 
-class AttendanceReportListView(generics.ListAPIView):
+class AttendanceReportListView(ReplicaReadMixin, generics.ListAPIView):
     """
     List all generated reports
     GET /api/reports/
@@ -33,7 +45,7 @@ class AttendanceReportListView(generics.ListAPIView):
         return queryset.order_by('-created_at')
 
 
-class AttendanceReportDetailView(generics.RetrieveDestroyAPIView):
+class AttendanceReportDetailView(ReplicaReadMixin, generics.RetrieveDestroyAPIView):
     """
     Retrieve or delete a report
     GET/DELETE /api/reports/<id>/
@@ -52,11 +64,39 @@ class AttendanceReportDetailView(generics.RetrieveDestroyAPIView):
             queryset = queryset.none()
         
         return queryset
+    
+    def perform_destroy(self, instance):
+        if instance.file_path:
+            instance.file_path.delete(save=False)
+        instance.delete()
+
+
+class AttendanceReportDownloadView(AttendanceReportDetailView):
+    """
+    Download the file rendered for a report job
+    GET /api/reports/<id>/download/
+    """
+    http_method_names = ['get', 'head', 'options']
+    
+    def retrieve(self, request, *args, **kwargs):
+        report = self.get_object()
+        
+        if report.status != 'completed' or not report.file_path:
+            return Response({
+                'error': 'Report is not ready yet',
+                'status': report.status
+            }, status=status.HTTP_409_CONFLICT)
+        
+        return FileResponse(
+            report.file_path.open('rb'),
+            as_attachment=True,
+            filename=os.path.basename(report.file_path.name)
+        )
 
 
 class GenerateReportView(APIView):
     """
-    Generate attendance report and download as CSV
+    Generate attendance report and download as CSV, Excel or PDF
     POST /api/reports/generate/
     
     Request body:
@@ -65,8 +105,18 @@ class GenerateReportView(APIView):
         "start_date": "2025-01-01",
         "end_date": "2025-01-31",
         "report_type": "monthly",
-        "format": "csv"
+        "format": "csv" | "excel" | "pdf",
+        "mode": "download"
     }
+    
+    With "mode": "job" the report is queued instead and 202 is returned
+    with the report row; `manage.py run_report_worker` renders it, and
+    GET /api/reports/<id>/ shows its status and download link.
+    
+    If a report with the same parameters was already rendered from the
+    current attendance data, its file is reused instead. Downloads read
+    the records from the replica when one is configured; queued jobs are
+    writes and are rendered by the worker from the primary.
     """
     permission_classes = [permissions.IsAuthenticated]
     
@@ -88,79 +138,95 @@ class GenerateReportView(APIView):
         end_date = serializer.validated_data['end_date']
         report_type = serializer.validated_data['report_type']
         report_format = serializer.validated_data['format']
-        
-        # Build query
-        queryset = Attendance.objects.select_related('user', 'course', 'marked_by')
-        queryset = queryset.filter(date__range=[start_date, end_date])
-        
-        if course_id:
-            queryset = queryset.filter(course_id=course_id)
-        
-        # Teachers can only generate reports for their courses
-        if request.user.role == 'teacher':
-            queryset = queryset.filter(course__teacher=request.user)
-        
-        queryset = queryset.order_by('date', 'course', 'user')
+        mode = serializer.validated_data['mode']
+        if mode == 'download':
+            count_as_read(request)
+        
+        data_version = scope_courses(request.user, course_id).data_version()
+        rendered = find_rendered_report(
+            request.user, course_id, start_date, end_date,
+            report_format, data_version
+        )
+        if rendered is not None:
+            if mode == 'job':
+                data = AttendanceReportSerializer(rendered, context={'request': request}).data
+                return Response(data)
+            extension, content_type, _ = REPORT_FORMATS[report_format]
+            return FileResponse(
+                rendered.file_path.open('rb'),
+                as_attachment=True,
+                filename=f"attendance_report_{start_date}_{end_date}.{extension}",
+                content_type=content_type
+            )
+        
+        # Queue the report for the background worker
+        if mode == 'job':
+            report = enqueue_report(
+                request.user, course_id, start_date, end_date,
+                report_type, report_format
+            )
+            data = AttendanceReportSerializer(report, context={'request': request}).data
+            return Response(data, status=status.HTTP_202_ACCEPTED)
+        
+        # The file is streamed after the view returns, so the queryset is
+        # pinned to the replica rather than routed by ReplicaReadMixin
+        queryset = report_queryset(
+            start_date, end_date, course_id, request.user,
+            using=database_for_reads(request.user)
+        )
         
         # Generate CSV response
         if report_format == 'csv':
             return self._generate_csv(queryset, start_date, end_date)
         
-        return Response({
-            'error': 'Only CSV format is currently supported'
-        }, status=status.HTTP_400_BAD_REQUEST)
+        return self._generate_file(queryset, report_format, start_date, end_date)
     
     def _generate_csv(self, queryset, start_date, end_date):
-        """Generate CSV file from attendance queryset"""
-        response = HttpResponse(content_type='text/csv')
+        """
+        Stream a CSV file from the attendance queryset. Rows are read in
+        chunks and the summary is counted as they pass, so memory stays
+        flat regardless of the date range.
+        """
+        summary = Counter()
+        rows = report_rows(queryset, summary)
+        response = StreamingHttpResponse(csv_chunks(rows, summary), content_type='text/csv')
         response['Content-Disposition'] = f'attachment; filename="attendance_report_{start_date}_{end_date}.csv"'
         
-        writer = csv.writer(response)
-        
-        # Write header
-        writer.writerow([
-            'Date',
-            'Course Code',
-            'Course Name',
-            'Student Username',
-            'Student Name',
-            'Status',
-            'Remarks',
-            'Marked By'
-        ])
-        
-        # Write data rows
-        for attendance in queryset:
-            writer.writerow([
-                attendance.date.strftime('%Y-%m-%d'),
-                attendance.course.code,
-                attendance.course.name,
-                attendance.user.username,
-                attendance.user.get_full_name() or attendance.user.username,
-                attendance.get_status_display(),
-                attendance.remarks or '',
-                attendance.marked_by.get_full_name() if attendance.marked_by else 'N/A'
-            ])
-        
-        # Write summary
-        writer.writerow([])
-        writer.writerow(['SUMMARY'])
-        writer.writerow(['Total Records', queryset.count()])
-        writer.writerow(['Present', queryset.filter(status='present').count()])
-        writer.writerow(['Absent', queryset.filter(status='absent').count()])
-        writer.writerow(['Late', queryset.filter(status='late').count()])
-        writer.writerow(['Excused', queryset.filter(status='excused').count()])
-        
         return response
+    
+    def _generate_file(self, queryset, report_format, start_date, end_date):
+        """
+        Render an Excel or PDF report into a temporary file and stream it
+        back. Neither format can be produced as a pure byte stream (xlsx is
+        a zip, PDF needs a trailing index), so disk is used instead of
+        memory.
+        """
+        extension, content_type, _ = REPORT_FORMATS[report_format]
+        tmp = tempfile.TemporaryFile()
+        write_report(
+            queryset, report_format, tmp,
+            title=f"Attendance report {start_date} to {end_date}"
+        )
+        tmp.seek(0)
+        
+        return FileResponse(
+            tmp,
+            as_attachment=True,
+            filename=f"attendance_report_{start_date}_{end_date}.{extension}",
+            content_type=content_type
+        )
 
 
-class DailySummaryView(APIView):
+class DailySummaryView(ConditionalGetMixin, ReplicaReadMixin, APIView):
     """
     Get daily attendance summary
     GET /api/reports/daily-summary/?date=2025-01-15&course_id=1
     """
     permission_classes = [permissions.IsAuthenticated]
     
+    def get_data_version(self, request):
+        return scope_courses(request.user, request.query_params.get('course_id')).data_version()
+    
     def get(self, request):
         if request.user.role == 'student':
             return Response({
@@ -182,8 +248,8 @@ class DailySummaryView(APIView):
                 'error': 'Invalid date format. Use YYYY-MM-DD'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Build query
-        queryset = Attendance.objects.filter(date=date)
+        # Build query against the daily rollup
+        queryset = AttendanceRollup.objects.filter(date=date)
         
         if course_id:
             queryset = queryset.filter(course_id=course_id)
@@ -191,12 +257,19 @@ class DailySummaryView(APIView):
         if request.user.role == 'teacher':
             queryset = queryset.filter(course__teacher=request.user)
         
-        # Calculate summary
-        total = queryset.count()
-        present = queryset.filter(status='present').count()
-        absent = queryset.filter(status='absent').count()
-        late = queryset.filter(status='late').count()
-        excused = queryset.filter(status='excused').count()
+        # Calculate summary, reusing a cached result while no attendance
+        # for the covered courses has changed
+        summary = cached_result(
+            'daily_summary', request.user,
+            {'date': date, 'course_id': course_id},
+            queryset.summary, scope_courses(request.user, course_id),
+            version=self.data_version
+        )
+        total = summary['total']
+        present = summary['present']
+        absent = summary['absent']
+        late = summary['late']
+        excused = summary['excused']
         
         attendance_rate = (present / total * 100) if total > 0 else 0
         
@@ -211,13 +284,16 @@ class DailySummaryView(APIView):
         })
 
 
-class MonthlySummaryView(APIView):
+class MonthlySummaryView(ConditionalGetMixin, ReplicaReadMixin, APIView):
     """
     Get monthly attendance summary
     GET /api/reports/monthly-summary/?year=2025&month=1&course_id=1
     """
     permission_classes = [permissions.IsAuthenticated]
     
+    def get_data_version(self, request):
+        return scope_courses(request.user, request.query_params.get('course_id')).data_version()
+    
     def get(self, request):
         if request.user.role == 'student':
             return Response({
@@ -241,8 +317,8 @@ class MonthlySummaryView(APIView):
                 'error': 'Invalid year or month'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Build query
-        queryset = Attendance.objects.filter(
+        # Build query against the daily rollup
+        queryset = AttendanceRollup.objects.filter(
             date__year=year,
             date__month=month
         )
@@ -253,18 +329,23 @@ class MonthlySummaryView(APIView):
         if request.user.role == 'teacher':
             queryset = queryset.filter(course__teacher=request.user)
         
-        # Calculate summary
-        total = queryset.count()
-        present = queryset.filter(status='present').count()
-        absent = queryset.filter(status='absent').count()
-        late = queryset.filter(status='late').count()
-        excused = queryset.filter(status='excused').count()
+        # Calculate summary, including unique days with attendance,
+        # reusing a cached result while the covered courses are unchanged
+        summary = cached_result(
+            'monthly_summary', request.user,
+            {'year': year, 'month': month, 'course_id': course_id},
+            queryset.summary, scope_courses(request.user, course_id),
+            version=self.data_version
+        )
+        total = summary['total']
+        present = summary['present']
+        absent = summary['absent']
+        late = summary['late']
+        excused = summary['excused']
+        unique_days = summary['days']
         
         attendance_rate = (present / total * 100) if total > 0 else 0
         
-        # Get unique days with attendance
-        unique_days = queryset.values('date').distinct().count()
-        
         return Response({
             'year': year,
             'month': month,
@@ -275,4 +356,127 @@ class MonthlySummaryView(APIView):
             'late': late,
             'excused': excused,
             'attendance_rate': round(attendance_rate, 2)
-        })
\ No newline at end of file
+        })
+
+
+class AttendanceTrendView(ConditionalGetMixin, ReplicaReadMixin, APIView):
+    """
+    Attendance counts per day, week or month for a course, a teacher's
+    courses or the whole school
+    GET /api/reports/trend/?start_date=2025-01-01&end_date=2025-12-31&bucket=month&course_id=1&teacher_id=2
+    
+    Teachers always get their own courses; teacher_id is for admins.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_data_version(self, request):
+        return scope_courses(request.user, request.query_params.get('course_id')).data_version()
+    
+    def get(self, request):
+        if request.user.role == 'student':
+            return Response({
+                'error': 'Students cannot view summary reports'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = TrendQuerySerializer(data=request.query_params)
+        
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        params = serializer.validated_data
+        start_date = params['start_date']
+        end_date = params['end_date']
+        bucket = params['bucket']
+        course_id = params.get('course_id')
+        teacher_id = params.get('teacher_id')
+        
+        # Build query against the daily rollup
+        queryset = AttendanceRollup.objects.filter(date__range=[start_date, end_date])
+        courses = scope_courses(request.user, course_id)
+        
+        if course_id:
+            queryset = queryset.filter(course_id=course_id)
+        
+        if request.user.role == 'teacher':
+            queryset = queryset.filter(course__teacher=request.user)
+        elif teacher_id:
+            queryset = queryset.filter(course__teacher_id=teacher_id)
+            courses = courses.filter(teacher_id=teacher_id)
+        
+        trend = cached_result(
+            'attendance_trend', request.user, params,
+            lambda: queryset.trend(bucket), courses,
+            version=self.data_version
+        )
+        
+        results = []
+        for row in trend:
+            rate = (row['present'] / row['total'] * 100) if row['total'] > 0 else 0
+            results.append({**row, 'attendance_rate': round(rate, 2)})
+        
+        return Response({
+            'start_date': start_date,
+            'end_date': end_date,
+            'bucket': bucket,
+            'course_id': course_id,
+            'teacher_id': request.user.pk if request.user.role == 'teacher' else teacher_id,
+            'results': results
+        })
+
+
+class AbsenteeismView(ConditionalGetMixin, ReplicaReadMixin, APIView):
+    """
+    Find students with runs of consecutive absences or a falling
+    attendance rate, across every student in one pass
+    GET /api/reports/absenteeism/?start_date=2025-01-01&end_date=2025-06-30&course_id=1&min_streak=3&window=10&rate_drop=20
+    
+    All parameters are optional; the period defaults to the year up to
+    today. Teachers only see students in their own courses.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_data_version(self, request):
+        # The default period ends today
+        courses = scope_courses(request.user, request.query_params.get('course_id'))
+        return f"{courses.data_version()}:{timezone.localdate()}"
+    
+    def get(self, request):
+        if request.user.role == 'student':
+            return Response({
+                'error': 'Students cannot view absenteeism reports'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = AbsenteeismQuerySerializer(data=request.query_params)
+        
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        params = serializer.validated_data
+        course_id = params.get('course_id')
+        queryset = absenteeism_queryset(
+            params['start_date'], params['end_date'], course_id, request.user
+        )
+        
+        def detect():
+            return with_names(detect_absenteeism(
+                queryset,
+                min_streak=params['min_streak'],
+                window=params['window'],
+                rate_drop=params['rate_drop']
+            ))
+        
+        results = cached_result(
+            'absenteeism', request.user, params,
+            detect, scope_courses(request.user, course_id),
+            version=self.data_version
+        )
+        
+        return Response({
+            'start_date': params['start_date'],
+            'end_date': params['end_date'],
+            'min_streak': params['min_streak'],
+            'window': params['window'],
+            'rate_drop': params['rate_drop'],
+            'count': len(results),
+            'results': results
+        })
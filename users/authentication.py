@@ -0,0 +1,123 @@
+"""
+Stateless JWT authentication.
+
+Tokens from tokens_for_user() carry the user's username, role and
+is_active flag, plus an auth version derived from the password and
+is_active. StatelessJWTAuthentication builds request.user from those
+claims without a query: a real CustomUser with only those fields loaded.
+Any other field is fetched on first access, and full_user() loads (and
+re-checks) the whole row for endpoints that need it.
+
+Role changes and deactivation reach a client when it refreshes its access
+token (TokenRefreshSerializer re-reads the user), so within
+ACCESS_TOKEN_LIFETIME. Changing the password revokes refresh tokens.
+Tokens without these claims are authenticated from the database as before.
+"""
+from django.contrib.auth import get_user_model
+from django.db import router
+from django.utils.crypto import constant_time_compare, salted_hmac
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+CLAIM_FIELDS = ('username', 'role', 'is_active')
+AUTH_VERSION_CLAIM = 'auth_version'
+
+
+def auth_version(user):
+    """Changes whenever the password or is_active does"""
+    return salted_hmac(
+        'users.authentication.auth_version',
+        f"{user.password}:{user.is_active}",
+        algorithm='sha256',
+    ).hexdigest()[:16]
+
+
+def tokens_for_user(user):
+    """A refresh token (and through it, access tokens) carrying the user claims"""
+    refresh = RefreshToken.for_user(user)
+    stamp_claims(refresh, user)
+    return refresh
+
+
+def stamp_claims(token, user):
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    token[AUTH_VERSION_CLAIM] = auth_version(user)
+
+
+def has_user_claims(token):
+    return AUTH_VERSION_CLAIM in token and all(field in token for field in CLAIM_FIELDS)
+
+
+def user_from_claims(token):
+    """A CustomUser built from the token; unloaded fields are deferred"""
+    User = get_user_model()
+    claims = {field: token[field] for field in CLAIM_FIELDS}
+    claims[api_settings.USER_ID_FIELD] = token[api_settings.USER_ID_CLAIM]
+    # from_db() takes the values in field order
+    field_names = [
+        field.attname for field in User._meta.concrete_fields if field.attname in claims
+    ]
+    user = User.from_db(
+        router.db_for_read(User), field_names, [claims[name] for name in field_names]
+    )
+    user.from_token_claims = True
+    user.token_auth_version = token[AUTH_VERSION_CLAIM]
+    return user
+
+
+def full_user(user):
+    """
+    The complete database row for request.user, rejecting the token if the
+    account was disabled or its password changed since it was issued
+    """
+    if not getattr(user, 'from_token_claims', False):
+        return user
+    User = get_user_model()
+    try:
+        row = User.objects.get(pk=user.pk)
+    except User.DoesNotExist:
+        raise AuthenticationFailed('User not found', code='user_not_found')
+    if not row.is_active:
+        raise AuthenticationFailed('User is inactive', code='user_inactive')
+    if not constant_time_compare(auth_version(row), user.token_auth_version):
+        raise AuthenticationFailed('Token is no longer valid', code='token_not_valid')
+    return row
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that takes the user from the token claims"""
+
+    def get_user(self, validated_token):
+        if not has_user_claims(validated_token):
+            return super().get_user(validated_token)
+        if not validated_token['is_active']:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user_from_claims(validated_token)
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    """Re-read the user so new access tokens carry its current claims"""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        User = get_user_model()
+        try:
+            user = User.objects.get(
+                **{api_settings.USER_ID_FIELD: refresh[api_settings.USER_ID_CLAIM]}
+            )
+        except (KeyError, User.DoesNotExist):
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        if (AUTH_VERSION_CLAIM in refresh
+                and not constant_time_compare(refresh[AUTH_VERSION_CLAIM], auth_version(user))):
+            raise InvalidToken('Token is no longer valid')
+
+        stamp_claims(refresh, user)
+        return super().validate({'refresh': str(refresh)})
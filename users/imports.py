@@ -0,0 +1,244 @@
+"""
+Bulk user import from CSV or JSON Lines.
+
+Rows are read as a stream and handled in chunks: each row is validated by
+UserImportRowSerializer, checked for clashes against every existing
+username and email (loaded once up front) and against earlier rows of
+the file, and the chunk's passwords are hashed in a process pool before
+the users are inserted with bulk_create. Rows that fail are reported with
+their line number; the rest are created.
+
+The pool is started on the first password to hash and then shared by
+every import in the process (see hashing_pool()), so concurrent web
+imports queue for USER_IMPORT_WORKERS processes instead of each starting
+their own.
+"""
+import codecs
+import csv
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.signals import setting_changed
+from django.db import IntegrityError, transaction
+from django.dispatch import receiver
+from .serializers import UserImportRowSerializer
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+
+CHUNK_SIZE = 1000
+
+
+def import_workers():
+    """Hashing processes per import: USER_IMPORT_WORKERS, default all CPUs"""
+    return getattr(settings, 'USER_IMPORT_WORKERS', None) or os.cpu_count() or 1
+
+
+def guess_format(filename):
+    if filename and filename.lower().endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return 'csv'
+
+
+def read_rows(lines, import_format):
+    """
+    Yield (line_number, row) from an iterable of byte lines, with row None
+    for a line that cannot be parsed
+    """
+    text = codecs.iterdecode(lines, 'utf-8-sig')
+    if import_format == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, {
+                key.strip(): value.strip() for key, value in row.items()
+                if key and isinstance(value, str)
+            }
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def _hash(args):
+    password, algorithm = args
+    return make_password(password, hasher=algorithm)
+
+
+def start_pool(workers):
+    # spawn rather than fork: this may run in a threaded web worker
+    context = multiprocessing.get_context('spawn')
+    return ProcessPoolExecutor(workers, mp_context=context, initializer=django.setup)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def hashing_pool():
+    """This process's hashing pool of import_workers() processes, started on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = start_pool(import_workers())
+    return _pool
+
+
+@receiver(setting_changed)
+def reset_hashing_pool(setting, **kwargs):
+    global _pool
+    if setting == 'USER_IMPORT_WORKERS' and _pool is not None:
+        _pool.shutdown(wait=False)
+        _pool = None
+
+
+class UserImporter:
+    """
+    Runs one import. run() yields a result per chunk:
+        {'rows': n, 'created': n, 'errors': [{'line', 'username', 'errors'}]}
+    Passwords are hashed in the shared hashing_pool(), or in a pool of
+    `workers` processes kept for this import when `workers` is given.
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE, workers=None):
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.own_pool = None
+        User = get_user_model()
+        self.usernames = set(User.objects.values_list('username', flat=True))
+        self.emails = set(User.objects.values_list('email', flat=True))
+
+    def pool(self):
+        if self.workers is None:
+            return hashing_pool()
+        if self.own_pool is None:
+            self.own_pool = start_pool(self.workers)
+        return self.own_pool
+
+    def run(self, rows):
+        try:
+            chunk = []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) == self.chunk_size:
+                    yield self._import_chunk(chunk)
+                    chunk = []
+            if chunk:
+                yield self._import_chunk(chunk)
+        finally:
+            if self.own_pool is not None:
+                self.own_pool.shutdown()
+                self.own_pool = None
+
+    def _validate(self, line_number, row, errors):
+        if row is None:
+            errors.append({'line': line_number, 'username': None, 'errors': {
+                'non_field_errors': ['Row could not be parsed.']
+            }})
+            return None
+
+        serializer = UserImportRowSerializer(data={
+            key: value for key, value in row.items() if value not in ('', None)
+        })
+        if not serializer.is_valid():
+            errors.append({
+                'line': line_number,
+                'username': row.get('username'),
+                'errors': serializer.errors,
+            })
+            return None
+
+        data = serializer.validated_data
+        clashes = {}
+        if data['username'] in self.usernames:
+            clashes['username'] = ['A user with that username already exists.']
+        if data['email'] in self.emails:
+            clashes['email'] = ['A user with this email already exists.']
+        if clashes:
+            errors.append({'line': line_number, 'username': data['username'], 'errors': clashes})
+            return None
+
+        self.usernames.add(data['username'])
+        self.emails.add(data['email'])
+        return data
+
+    def _import_chunk(self, chunk):
+        User = get_user_model()
+        errors = []
+        valid = []
+        for line_number, row in chunk:
+            data = self._validate(line_number, row, errors)
+            if data is not None:
+                valid.append((line_number, data))
+
+        algorithm = get_hasher('default').algorithm
+        passwords = [data.get('password') for _, data in valid]
+        to_hash = [(password, algorithm) for password in passwords if password]
+        hashed = iter(())
+        if to_hash:
+            workers = self.workers or import_workers()
+            hashed = iter(self.pool().map(
+                _hash, to_hash, chunksize=max(1, len(to_hash) // (workers * 4))
+            ))
+
+        users = []
+        for (line_number, data), password in zip(valid, passwords):
+            fields = {key: value for key, value in data.items() if key != 'password'}
+            user = User(**fields)
+            user.password = next(hashed) if password else make_password(None)
+            user.normalize_search_fields()
+            users.append((line_number, user))
+
+        created = self._insert(users, errors)
+        errors.sort(key=lambda error: error['line'])
+        return {'rows': len(chunk), 'created': created, 'errors': errors}
+
+    def _clashes(self, user):
+        """Field errors for a user whose insert failed"""
+        User = get_user_model()
+        clashes = {}
+        if User.objects.filter(username=user.username).exists():
+            clashes['username'] = ['A user with that username already exists.']
+        if User.objects.filter(email=user.email).exists():
+            clashes['email'] = ['A user with this email already exists.']
+        return clashes or {'non_field_errors': ['User could not be created.']}
+
+    def _insert(self, users, errors):
+        """
+        bulk_create the chunk; if that fails (e.g. a clashing user was
+        created meanwhile by registration), insert the rows one at a time,
+        each in its own savepoint, and report the rows that fail
+        """
+        User = get_user_model()
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create([user for _, user in users], batch_size=self.chunk_size)
+            return len(users)
+        except IntegrityError:
+            pass
+
+        created = 0
+        for line_number, user in users:
+            try:
+                with transaction.atomic():
+                    User.objects.bulk_create([user])
+            except IntegrityError:
+                errors.append({
+                    'line': line_number,
+                    'username': user.username,
+                    'errors': self._clashes(user),
+                })
+            else:
+                created += 1
+        return created
@@ -0,0 +1,52 @@
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from users.imports import CHUNK_SIZE, IMPORT_FORMATS, UserImporter, guess_format, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users from a CSV or JSON Lines file with columns username, email, "
+        "first_name, last_name, role, phone and password"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import")
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help="Default: from the file extension")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Rows per bulk insert")
+        parser.add_argument('--workers', type=int, help="Password hashing processes (default: all CPUs)")
+        parser.add_argument('--errors', metavar='PATH', help="Write failed rows as JSON Lines to this file")
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be at least 1")
+        import_format = options['format'] or guess_format(options['path'])
+
+        try:
+            source = open(options['path'], 'rb')
+        except OSError as exc:
+            raise CommandError(f"Cannot read {options['path']}: {exc}")
+
+        errors_file = open(options['errors'], 'w') if options['errors'] else None
+        started = time.perf_counter()
+        rows = created = failed = 0
+        try:
+            importer = UserImporter(chunk_size=options['chunk_size'], workers=options['workers'])
+            for result in importer.run(read_rows(source, import_format)):
+                rows += result['rows']
+                created += result['created']
+                failed += len(result['errors'])
+                for error in result['errors']:
+                    if errors_file:
+                        errors_file.write(json.dumps(error) + '\n')
+                    else:
+                        self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+                self.stdout.write(f"{rows} rows read, {created} users created")
+        finally:
+            source.close()
+            if errors_file:
+                errors_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {created} users, {failed} rows failed, in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:02
+
+from django.db import migrations, models
+import users.models
+
+SEARCH_FIELDS = ('username', 'email', 'first_name', 'last_name')
+
+
+def populate_search_fields(apps, schema_editor):
+    # Lowercased in Python, as CustomUser.save() does; SQL LOWER() differs
+    # for non-ASCII text on some backends
+    CustomUser = apps.get_model('users', 'CustomUser')
+    db_alias = schema_editor.connection.alias
+    batch = []
+    for user in CustomUser.objects.using(db_alias).only('pk', *SEARCH_FIELDS).iterator(chunk_size=2000):
+        for field in SEARCH_FIELDS:
+            setattr(user, f'{field}_lower', (getattr(user, field) or '').lower())
+        batch.append(user)
+        if len(batch) == 2000:
+            CustomUser.objects.using(db_alias).bulk_update(batch, [f'{field}_lower' for field in SEARCH_FIELDS])
+            batch = []
+    if batch:
+        CustomUser.objects.using(db_alias).bulk_update(batch, [f'{field}_lower' for field in SEARCH_FIELDS])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0002_customuser_phone'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='customuser',
+            managers=[
+                ('objects', users.models.CustomUserManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='email_lower',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='first_name_lower',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='last_name_lower',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='username_lower',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=150),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['role', 'username'], name='user_role_username_idx'),
+        ),
+        migrations.RunPython(populate_search_fields, migrations.RunPython.noop),
+    ]
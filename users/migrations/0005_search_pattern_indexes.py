@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0004_user_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='email_lower',
+            field=models.CharField(blank=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='first_name_lower',
+            field=models.CharField(blank=True, default='', editable=False, max_length=150),
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='last_name_lower',
+            field=models.CharField(blank=True, default='', editable=False, max_length=150),
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='username_lower',
+            field=models.CharField(blank=True, default='', editable=False, max_length=150),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['username_lower'], name='user_username_lower_like', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['email_lower'], name='user_email_lower_like', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['first_name_lower'], name='user_first_name_lower_like', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['last_name_lower'], name='user_last_name_lower_like', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -1,5 +1,45 @@
-from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.db import connections, models
+from django.db.models import Q
+from django.contrib.auth.models import AbstractUser, UserManager
+
+# Sorts after any character a prefix can be followed by, in code point
+# order (SQLite's default BINARY collation)
+PREFIX_END = '\U0010ffff'
+
+
+class UserQuerySet(models.QuerySet):
+    """
+    QuerySet helpers for the user directory
+    """
+
+    def search(self, text):
+        """
+        Users matching every word of `text` as a case-insensitive prefix of
+        their username, email, first or last name, by startswith on the
+        *_lower columns.
+
+        On PostgreSQL the LIKE 'term%' this becomes is served by the
+        varchar_pattern_ops indexes whatever the database collation. SQLite's
+        LIKE is case-insensitive and can't use an index, so there the prefix
+        is also given as a range, which is exact under its code point order.
+        """
+        prefix_range = connections[self.db].vendor != 'postgresql'
+        queryset = self
+        for term in text.lower().split():
+            condition = Q()
+            for field in CustomUser.SEARCH_FIELDS:
+                column = f'{field}_lower'
+                lookups = {f'{column}__startswith': term}
+                if prefix_range:
+                    lookups.update({f'{column}__gte': term, f'{column}__lt': term + PREFIX_END})
+                condition |= Q(**lookups)
+            queryset = queryset.filter(condition)
+        return queryset
+
+
+class CustomUserManager(UserManager.from_queryset(UserQuerySet)):
+    pass
+
 
 # Create your models here.
 class CustomUser(AbstractUser):
@@ -27,14 +67,58 @@ class CustomUser(AbstractUser):
     help_text='Contact or Phone number',
     )
     date_joined= models.DateTimeField(auto_now_add=True)
+    # Any change to what the user serializers show, for ETags of responses
+    # that embed users (see CourseQuerySet.listing_version)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Lowercased copies of the searchable fields, kept in step by save(),
+    # so directory prefix searches are index scans (see UserQuerySet.search)
+    username_lower = models.CharField(max_length=150, blank=True, default='', editable=False)
+    email_lower = models.CharField(max_length=254, blank=True, default='', editable=False)
+    first_name_lower = models.CharField(max_length=150, blank=True, default='', editable=False)
+    last_name_lower = models.CharField(max_length=150, blank=True, default='', editable=False)
+
+    SEARCH_FIELDS = ('username', 'email', 'first_name', 'last_name')
+
+    objects = CustomUserManager()
 
     class Meta:
         verbose_name = 'User'
         verbose_name_plural = 'Users'
         ordering = ['username']
+        indexes = [
+            # The directory lists one role at a time, alphabetically
+            models.Index(fields=['role', 'username'], name='user_role_username_idx'),
+            # Prefix searches. The operator class lets PostgreSQL serve
+            # LIKE 'term%' under any collation; other backends ignore it.
+            *(
+                models.Index(
+                    fields=[f'{field}_lower'], name=f'user_{field}_lower_like',
+                    opclasses=['varchar_pattern_ops'],
+                )
+                for field in ('username', 'email', 'first_name', 'last_name')
+            ),
+        ]
     
     def __str__(self):
         return f"{self.username} ({self.role})"
+
+    def normalize_search_fields(self):
+        """Refresh the *_lower columns; bulk_create() callers must call this"""
+        for field in self.SEARCH_FIELDS:
+            setattr(self, f'{field}_lower', (getattr(self, field) or '').lower())
+
+    def save(self, *args, **kwargs):
+        self.normalize_search_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            changed = [field for field in self.SEARCH_FIELDS if field in update_fields]
+            update_fields = {*update_fields, *(f'{field}_lower' for field in changed)}
+            # A login only records last_login, which no response shows
+            if update_fields - {'last_login'}:
+                update_fields.add('updated_at')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
     
     @property
     def is_admin(self):
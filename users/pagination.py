@@ -0,0 +1,9 @@
+from attendance.pagination import KeysetPagination
+
+
+class UserDirectoryPagination(KeysetPagination):
+    """
+    Keyset pagination for the user directory, alphabetical by username.
+    Served by the (role, username) index when listing one role.
+    """
+    ordering = ('username', 'id')
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError as DjangoValidationError
 
 User = get_user_model()
 
@@ -78,6 +80,22 @@ class UserSerializer(serializers.ModelSerializer):
         return obj.get_full_name() or obj.username
 
 
+class UserDirectorySerializer(serializers.Serializer):
+    """
+    Lightweight projection for the user directory and typeahead lookups
+    """
+    FIELDS = ('id', 'username', 'email', 'first_name', 'last_name', 'role')
+    
+    id = serializers.IntegerField(read_only=True)
+    username = serializers.CharField(read_only=True)
+    full_name = serializers.SerializerMethodField()
+    email = serializers.EmailField(read_only=True)
+    role = serializers.CharField(read_only=True)
+    
+    def get_full_name(self, obj):
+        return f"{obj.first_name} {obj.last_name}".strip() or obj.username
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     """
     Serializer for user profile updates
@@ -111,4 +129,30 @@ class ChangePasswordSerializer(serializers.Serializer):
             raise serializers.ValidationError({
                 "new_password": "Password fields didn't match."
             })
-        return attrs
\ No newline at end of file
+        return attrs
+
+
+class UserImportRowSerializer(serializers.Serializer):
+    """
+    One row of a bulk user import. Validates fields and the password
+    policy without touching the database; uniqueness is checked by
+    users.imports against preloaded usernames and emails.
+    """
+    username = serializers.CharField(max_length=150, validators=[UnicodeUsernameValidator()])
+    email = serializers.EmailField(max_length=254)
+    first_name = serializers.CharField(max_length=150)
+    last_name = serializers.CharField(max_length=150)
+    role = serializers.ChoiceField(choices=User._meta.get_field('role').choices, default='student')
+    phone = serializers.CharField(max_length=15, required=False, allow_blank=True)
+    # Left out, the account gets an unusable password until it is reset
+    password = serializers.CharField(required=False, write_only=True)
+    
+    def validate(self, attrs):
+        password = attrs.get('password')
+        if password:
+            fields = {key: value for key, value in attrs.items() if key != 'password'}
+            try:
+                validate_password(password, user=User(**fields))
+            except DjangoValidationError as exc:
+                raise serializers.ValidationError({'password': list(exc.messages)})
+        return attrs
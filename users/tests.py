@@ -1,36 +1,343 @@
-from django.test import TestCase
+import json
+from importlib import import_module
+from types import SimpleNamespace
+from unittest import mock
+from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+from . import imports
+from .authentication import StatelessJWTAuthentication, full_user, tokens_for_user
+from .imports import UserImporter
+from .throttling import TokenBucketThrottle, hash_slots, password_check_slot
+
 User = get_user_model()
 
-# Create admin
-admin = User.objects.create_user(
-    username='admin',
-    email='admin@test.com',
-    password='admin123',
-    role='admin',
-    first_name='Admin',
-    last_name='User'
-)
-
-# Create teacher
-teacher = User.objects.create_user(
-    username='teacher1',
-    email='teacher@test.com',
-    password='teacher123',
-    role='teacher',
-    first_name='Teacher',
-    last_name='One'
-)
-
-# Create students
-for i in range(1, 6):
-    User.objects.create_user(
-        username=f'student{i}',
-        email=f'student{i}@test.com',
-        password='student123',
-        role='student',
-        first_name=f'Student',
-        last_name=f'{i}'
-    )
-
-exit()
\ No newline at end of file
+
+def new_user(username, email=None):
+    user = User(username=username, email=email or f'{username}@test.com', role='student')
+    user.password = make_password(None)
+    user.normalize_search_fields()
+    return user
+
+
+class UserImportInsertTests(TestCase):
+
+    def setUp(self):
+        self.importer = UserImporter(workers=1)
+
+    def test_chunk_is_inserted_at_once(self):
+        errors = []
+        users = [(line, new_user(f'student{line}')) for line in (2, 3)]
+        self.assertEqual(self.importer._insert(users, errors), 2)
+        self.assertEqual(errors, [])
+
+    def test_rows_clashing_since_validation_are_reported(self):
+        # Registered after the importer loaded the existing users
+        User.objects.create_user(username='taken', email='taken@test.com', role='student')
+        User.objects.create_user(username='other', email='shared@test.com', role='student')
+        users = [
+            (2, new_user('student2')),
+            (3, new_user('taken', 'fresh@test.com')),
+            (4, new_user('student4', 'shared@test.com')),
+            (5, new_user('student5')),
+        ]
+
+        errors = []
+        self.assertEqual(self.importer._insert(users, errors), 2)
+        self.assertEqual(
+            [(error['line'], sorted(error['errors'])) for error in errors],
+            [(3, ['username']), (4, ['email'])]
+        )
+        self.assertEqual(
+            set(User.objects.filter(role='student').values_list('username', flat=True)),
+            {'taken', 'other', 'student2', 'student5'}
+        )
+
+    def test_rows_clashing_within_the_chunk_are_reported(self):
+        users = [(2, new_user('dup', 'one@test.com')), (3, new_user('dup', 'two@test.com'))]
+
+        errors = []
+        self.assertEqual(self.importer._insert(users, errors), 1)
+        self.assertEqual([(error['line'], list(error['errors'])) for error in errors], [(3, ['username'])])
+        self.assertEqual(User.objects.get(username='dup').email, 'one@test.com')
+
+
+class UserImportViewTests(TestCase):
+    """POST /api/users/import/ streams rejected rows and a summary"""
+
+    HEADER = 'username,email,first_name,last_name,password\n'
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', email='admin@test.com', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def upload(self, rows):
+        response = self.client.post('/api/users/import/', {
+            'file': SimpleUploadedFile('users.csv', (self.HEADER + rows).encode('utf-8')),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        return [json.loads(line) for line in lines]
+
+    @override_settings(USER_IMPORT_WORKERS=1)
+    def test_rows_without_passwords_start_no_pool(self):
+        lines = self.upload(
+            'amy,amy@test.com,Amy,Pond,\n'
+            'admin,rory@test.com,Rory,Williams,\n'
+        )
+        self.assertEqual([line['line'] for line in lines[:-1]], [3])
+        self.assertEqual(lines[-1], {'summary': {'rows': 2, 'created': 1, 'failed': 1}})
+        self.assertFalse(User.objects.get(username='amy').has_usable_password())
+        self.assertIsNone(imports._pool)
+
+    @override_settings(USER_IMPORT_WORKERS=1)
+    def test_imports_share_one_hashing_pool(self):
+        self.upload('amy,amy@test.com,Amy,Pond,Tardis-Blue-1963\n')
+        pool = imports._pool
+        self.assertIsNotNone(pool)
+        self.upload('rory,rory@test.com,Rory,Williams,Centurion-2000ad\n')
+        self.assertIs(imports._pool, pool)
+        self.assertTrue(User.objects.get(username='amy').check_password('Tardis-Blue-1963'))
+        self.assertTrue(User.objects.get(username='rory').check_password('Centurion-2000ad'))
+
+    def test_only_admins_can_import(self):
+        self.client.force_authenticate(User.objects.create_user(
+            username='teacher', email='teacher@test.com', role='teacher'
+        ))
+        response = self.client.post('/api/users/import/', {
+            'file': SimpleUploadedFile('users.csv', self.HEADER.encode('utf-8')),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 403)
+
+
+class UserDirectoryTests(TestCase):
+    """Prefix search and keyset pages of /api/users/"""
+
+    def setUp(self):
+        for username, first_name, last_name, role in (
+            ('kofi', 'Kofi', 'Mensah', 'student'),
+            ('ama', 'Ama', 'Owusu', 'student'),
+            ('kwame', 'Kwame', 'Amankwah', 'student'),
+            ('efua', 'Efua', 'Mensah-Bonsu', 'teacher'),
+            ('yaw_1', 'Yaw', 'Boateng', 'student'),
+        ):
+            User.objects.create_user(
+                username=username, email=f'{username}@school.test',
+                first_name=first_name, last_name=last_name, role=role,
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            username='zadmin', email='admin@test.com', role='admin'
+        ))
+
+    def search(self, text):
+        return list(User.objects.search(text).order_by('username').values_list('username', flat=True))
+
+    def test_search_matches_word_prefixes(self):
+        self.assertEqual(self.search('am'), ['ama', 'kwame'])
+        self.assertEqual(self.search('MENS'), ['efua', 'kofi'])
+        self.assertEqual(self.search('mensah k'), ['kofi'])
+        self.assertEqual(self.search('ensah'), [])
+        self.assertEqual(self.search('school'), [])
+
+    def test_search_treats_wildcards_literally(self):
+        self.assertEqual(self.search('yaw_'), ['yaw_1'])
+        self.assertEqual(self.search('k%'), [])
+        self.assertEqual(self.search('y_w'), [])
+
+    def test_search_follows_renames(self):
+        user = User.objects.get(username='ama')
+        user.last_name = 'Asante'
+        user.save(update_fields=['last_name'])
+        self.assertEqual(self.search('asan'), ['ama'])
+        self.assertEqual(self.search('owu'), [])
+
+    def test_directory_pages_follow_the_cursor(self):
+        url = '/api/users/?cursor=&page_size=2'
+        usernames = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 2)
+            self.assertNotIn('count', response.data)
+            usernames.extend(user['username'] for user in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(usernames, sorted(User.objects.values_list('username', flat=True)))
+
+    def test_directory_search_and_role(self):
+        response = self.client.get('/api/users/', {'cursor': '', 'search': 'mensah', 'role': 'student'})
+        self.assertEqual(
+            [(user['username'], user['full_name']) for user in response.data['results']],
+            [('kofi', 'Kofi Mensah')]
+        )
+
+    def test_default_listing_is_page_numbered(self):
+        response = self.client.get('/api/users/', {'search': 'k'})
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([user['username'] for user in response.data['results']], ['kofi', 'kwame'])
+        self.assertIn('phone', response.data['results'][0])
+
+
+class SearchFieldBackfillTests(TestCase):
+    """Migration 0003 fills the *_lower columns of existing users"""
+
+    def test_backfill(self):
+        User.objects.create_user(
+            username='Kofi', email='Kofi.Mensah@School.test', first_name='KOFI', last_name='Ménsah'
+        )
+        User.objects.create_user(username='ama', email='ama@school.test')
+        User.objects.update(username_lower='', email_lower='', first_name_lower='', last_name_lower='')
+
+        migration = import_module('users.migrations.0003_user_directory_search')
+        migration.populate_search_fields(apps, SimpleNamespace(connection=connection))
+
+        self.assertEqual(
+            list(User.objects.order_by('pk').values_list(
+                'username_lower', 'email_lower', 'first_name_lower', 'last_name_lower'
+            )),
+            [
+                ('kofi', 'kofi.mensah@school.test', 'kofi', 'ménsah'),
+                ('ama', 'ama@school.test', '', ''),
+            ]
+        )
+
+
+class TokenClaimsTests(TestCase):
+    """Access tokens authenticate from their claims; changes are checked where they matter"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='teacher', email='teacher@test.com', password='old-secret-42', role='teacher'
+        )
+        self.client = APIClient()
+
+    def authenticate(self, token):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return StatelessJWTAuthentication().authenticate(request)[0]
+
+    def use(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def refresh(self, refresh):
+        return self.client.post('/api/auth/token/refresh/', {'refresh': str(refresh)}, format='json')
+
+    def test_login_tokens_authenticate_without_a_query(self):
+        response = self.client.post(
+            '/api/auth/login/', {'username': 'teacher', 'password': 'old-secret-42'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(0):
+            user = self.authenticate(response.data['tokens']['access'])
+            self.assertEqual((user.pk, user.username, user.role, user.is_active),
+                             (self.user.pk, 'teacher', 'teacher', True))
+        # Other fields are loaded on first access
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'teacher@test.com')
+
+    def test_tokens_without_claims_read_the_user(self):
+        with self.assertNumQueries(1):
+            user = self.authenticate(AccessToken.for_user(self.user))
+        self.assertEqual(user.role, 'teacher')
+        self.assertFalse(getattr(user, 'from_token_claims', False))
+
+    def test_password_change_rejects_old_tokens(self):
+        refresh = tokens_for_user(self.user)
+        self.use(refresh.access_token)
+        response = self.client.post('/api/auth/change-password/', {
+            'old_password': 'old-secret-42', 'new_password': 'new-secret-42', 'new_password2': 'new-secret-42',
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+
+        # The auth version moved: the full row is refused and so is the refresh
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 401)
+        with self.assertRaises(AuthenticationFailed):
+            full_user(self.authenticate(refresh.access_token))
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+
+        self.use(tokens_for_user(User.objects.get(pk=self.user.pk)).access_token)
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 200)
+
+    def test_deactivation(self):
+        refresh = tokens_for_user(self.user)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.use(refresh.access_token)
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 401)
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+
+        # Tokens issued while inactive are refused outright
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(tokens_for_user(User.objects.get(pk=self.user.pk)).access_token)
+
+    def test_refresh_carries_role_changes(self):
+        refresh = tokens_for_user(self.user)
+        User.objects.filter(pk=self.user.pk).update(role='admin')
+        self.assertEqual(self.authenticate(refresh.access_token).role, 'teacher')
+
+        response = self.refresh(refresh)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.authenticate(response.data['access']).role, 'admin')
+
+
+@mock.patch.object(TokenBucketThrottle, 'THROTTLE_RATES', {'login_ip': '4/min', 'login_username': '2/min'})
+class LoginAdmissionTests(TestCase):
+    """Login is throttled per IP and username, and password checks are bounded"""
+
+    def setUp(self):
+        caches['login_throttle'].clear()
+        User.objects.create_user(username='teacher', email='teacher@test.com', password='secret-42', role='teacher')
+        self.client = APIClient()
+        self.now = 1000.0
+        timer = mock.patch.object(TokenBucketThrottle, 'timer', lambda throttle: self.now)
+        timer.start()
+        self.addCleanup(timer.stop)
+
+    def login(self, username, password='wrong', ip='10.0.0.1'):
+        return self.client.post(
+            '/api/auth/login/', {'username': username, 'password': password}, format='json', REMOTE_ADDR=ip
+        )
+
+    def test_username_bucket(self):
+        self.assertEqual(self.login('teacher').status_code, 401)
+        self.assertEqual(self.login(' Teacher', ip='10.0.0.2').status_code, 401)
+        response = self.login('TEACHER', password='secret-42', ip='10.0.0.3')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(self.login('someone-else').status_code, 401)
+
+        # A token is back after half a minute
+        self.now += 30
+        self.assertEqual(self.login('teacher', password='secret-42').status_code, 200)
+        self.assertEqual(self.login('teacher', password='secret-42').status_code, 429)
+
+    def test_ip_bucket(self):
+        for i in range(4):
+            self.assertEqual(self.login(f'user{i}').status_code, 401)
+        self.assertEqual(self.login('user4').status_code, 429)
+        self.assertEqual(self.login('user4', ip='10.0.0.2').status_code, 401)
+
+    @override_settings(LOGIN_MAX_CONCURRENT_HASHES=1, LOGIN_HASH_WAIT=0)
+    def test_busy_hash_slots_turn_logins_away(self):
+        with password_check_slot() as acquired:
+            self.assertTrue(acquired)
+            response = self.login('teacher', password='secret-42')
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(self.login('teacher', password='secret-42', ip='10.0.0.2').status_code, 200)
+
+    @override_settings(LOGIN_MAX_CONCURRENT_HASHES=2, LOGIN_HASH_WAIT=0)
+    def test_slot_limit_follows_the_setting(self):
+        with password_check_slot() as first, password_check_slot() as second, password_check_slot() as third:
+            self.assertEqual((first, second, third), (True, True, False))
+        # Every slot is given back, including after a failed wait
+        self.assertTrue(all(hash_slots().acquire(blocking=False) for _ in range(2)))
+        for _ in range(2):
+            hash_slots().release()
@@ -0,0 +1,115 @@
+"""
+Admission control for login.
+
+Checking a password costs a deliberately slow hash, so a burst of logins
+can occupy every worker. Login attempts are therefore:
+    - throttled per client IP and per username with token buckets, whose
+      capacity and refill come from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']
+      ('login_ip', 'login_username'; '30/min' is a bucket of 30 refilled
+      over a minute). Buckets live in the LOGIN_THROTTLE_CACHE cache alias
+      (default 'login_throttle'), a local cache in each process
+    - limited to LOGIN_MAX_CONCURRENT_HASHES password checks at a time per
+      process (default half the CPUs). An attempt waits up to
+      LOGIN_HASH_WAIT seconds (default 2) for a slot and is then turned
+      away, leaving the remaining threads to other requests
+"""
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework.throttling import SimpleRateThrottle
+
+_bucket_lock = threading.Lock()
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token bucket over SimpleRateThrottle's rate setting: num_requests
+    tokens, refilled evenly over the rate's duration. Allows bursts up to
+    the bucket size without the request history SimpleRateThrottle keeps.
+    """
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'LOGIN_THROTTLE_CACHE', 'login_throttle')]
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        capacity = self.num_requests
+        refill = capacity / self.duration
+        with _bucket_lock:
+            now = self.timer()
+            tokens, updated = self.cache.get(self.key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            # Expires once it would have refilled anyway
+            self.cache.set(self.key, (tokens, now), self.duration)
+        self.wait_seconds = 0 if allowed else (1 - tokens) / refill
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginUsernameThrottle(TokenBucketThrottle):
+    scope = 'login_username'
+
+    def get_cache_key(self, request, view):
+        username = request.data.get('username')
+        if not isinstance(username, str) or not username.strip():
+            return None
+        ident = hashlib.sha256(username.strip().lower().encode('utf-8')).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+_hash_slots = None
+_hash_slots_lock = threading.Lock()
+
+
+def hash_slots():
+    global _hash_slots
+    if _hash_slots is None:
+        with _hash_slots_lock:
+            if _hash_slots is None:
+                limit = getattr(settings, 'LOGIN_MAX_CONCURRENT_HASHES', None)
+                if not limit:
+                    limit = max(1, (os.cpu_count() or 2) // 2)
+                _hash_slots = threading.BoundedSemaphore(limit)
+    return _hash_slots
+
+
+@receiver(setting_changed)
+def reset_hash_slots(setting, **kwargs):
+    global _hash_slots
+    if setting == 'LOGIN_MAX_CONCURRENT_HASHES':
+        _hash_slots = None
+
+
+@contextmanager
+def password_check_slot():
+    """Yield whether a password-checking slot was free within LOGIN_HASH_WAIT"""
+    slots = hash_slots()
+    acquired = slots.acquire(timeout=getattr(settings, 'LOGIN_HASH_WAIT', 2))
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            slots.release()
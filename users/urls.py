@@ -6,6 +6,7 @@ from .views import (
     UserProfileView,
     ChangePasswordView,
     UserListView,
+    UserImportView,
 )
 
 # app_name = 'users'
@@ -20,4 +21,5 @@ urlpatterns = [
     
     # User management
     path('users/', UserListView.as_view(), name='user_list'),
+    path('users/import/', UserImportView.as_view(), name='user_import'),
 ]
\ No newline at end of file
@@ -1,12 +1,20 @@
+import json
+from django.http import StreamingHttpResponse
 from rest_framework import status, generics, permissions
+from rest_framework.parsers import MultiPartParser
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model, authenticate
+from .authentication import full_user, tokens_for_user
+from .imports import IMPORT_FORMATS, UserImporter, guess_format, read_rows
+from .throttling import LoginIPThrottle, LoginUsernameThrottle, password_check_slot
+from .pagination import UserDirectoryPagination
 from .serializers import (
     UserRegistrationSerializer, 
     UserSerializer,
+    UserDirectorySerializer,
     UserProfileSerializer,
     ChangePasswordSerializer
 )
@@ -29,7 +37,7 @@ class UserRegistrationView(generics.CreateAPIView):
         user = serializer.save()
         
         # Generate tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = tokens_for_user(user)
         
         return Response({
             'message': 'User registered successfully',
@@ -47,6 +55,7 @@ class UserLoginView(APIView):
     POST /api/auth/login/
     """
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [LoginIPThrottle, LoginUsernameThrottle]
     
     def post(self, request):
         username = request.data.get('username')
@@ -57,7 +66,13 @@ class UserLoginView(APIView):
                 'error': 'Please provide both username and password'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        user = authenticate(username=username, password=password)
+        # Bound how many workers can be busy hashing passwords at once
+        with password_check_slot() as acquired:
+            if not acquired:
+                return Response({
+                    'error': 'Too many login attempts in progress, please try again shortly'
+                }, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '1'})
+            user = authenticate(username=username, password=password)
         
         if user is None:
             return Response({
@@ -70,7 +85,7 @@ class UserLoginView(APIView):
             }, status=status.HTTP_403_FORBIDDEN)
         
         # Generate tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = tokens_for_user(user)
         
         return Response({
             'message': 'Login successful',
@@ -91,7 +106,7 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        return self.request.user
+        return full_user(self.request.user)
 
 
 class ChangePasswordView(APIView):
@@ -105,7 +120,7 @@ class ChangePasswordView(APIView):
         serializer = ChangePasswordSerializer(data=request.data)
         
         if serializer.is_valid():
-            user = request.user
+            user = full_user(request.user)
             
             # Check old password
             if not user.check_password(serializer.validated_data['old_password']):
@@ -126,16 +141,39 @@ class ChangePasswordView(APIView):
 
 class UserListView(generics.ListAPIView):
     """
-    List all users (admin/teacher only)
-    GET /api/users/
+    List all users (admin/teacher only), alphabetically by username
+    GET /api/users/?role=<role>&search=<text>
+    
+    `search` matches the start of the username, email, first or last name
+    (every word must match), for typeahead pickers.
+    
+    Pass ?cursor= (empty on the first request) for the compact directory:
+    a few fields per user, keyset pages sized by ?page_size= and no
+    count; follow the `next` link for further pages.
     """
-    queryset = User.objects.all()
-    serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    @property
+    def directory(self):
+        return UserDirectoryPagination.cursor_query_param in self.request.query_params
+    
+    @property
+    def pagination_class(self):
+        if self.directory:
+            return UserDirectoryPagination
+        return api_settings.DEFAULT_PAGINATION_CLASS
+    
+    def get_serializer_class(self):
+        if self.directory:
+            return UserDirectorySerializer
+        return UserSerializer
+    
     def get_queryset(self):
         user = self.request.user
-        queryset = User.objects.all()
+        if self.directory:
+            queryset = User.objects.only(*UserDirectorySerializer.FIELDS)
+        else:
+            queryset = User.objects.order_by('username')
         
         # Filter by role if specified
         role = self.request.query_params.get('role')
@@ -146,4 +184,54 @@ class UserListView(generics.ListAPIView):
         if user.role == 'teacher':
             queryset = queryset.filter(role='student')
         
-        return queryset.order_by('username')
\ No newline at end of file
+        search = self.request.query_params.get('search', '').strip()
+        if search:
+            queryset = queryset.search(search)
+        
+        return queryset
+
+
+class UserImportView(APIView):
+    """
+    Create users in bulk from an uploaded CSV or JSON Lines file (admin only)
+    POST /api/users/import/  multipart: file=<users.csv>, format=csv|jsonl
+    
+    Streams JSON Lines back: one {"line", "username", "errors"} object per
+    rejected row as each chunk is imported, then {"summary": {...}}.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+    
+    def post(self, request):
+        if request.user.role != 'admin':
+            return Response({
+                'error': 'Only admins can import users'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({
+                'error': 'file is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        import_format = request.data.get('format') or guess_format(upload.name)
+        if import_format not in IMPORT_FORMATS:
+            return Response({
+                'error': f"format must be one of: {', '.join(IMPORT_FORMATS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        importer = UserImporter()
+        return StreamingHttpResponse(
+            self._stream(importer, read_rows(upload, import_format)),
+            content_type='application/x-ndjson'
+        )
+    
+    def _stream(self, importer, rows):
+        summary = {'rows': 0, 'created': 0, 'failed': 0}
+        for result in importer.run(rows):
+            summary['rows'] += result['rows']
+            summary['created'] += result['created']
+            summary['failed'] += len(result['errors'])
+            for error in result['errors']:
+                yield json.dumps(error) + '\n'
+        yield json.dumps({'summary': summary}) + '\n'